@@ -11,6 +11,7 @@ from pydantic import BaseModel
 
 import cmd_arg
 import config
+from main import flush_data
 from media_platform.xhs import XiaoHongShuCrawler
 from tools import utils
 
@@ -250,7 +251,11 @@ async def handle_crawler_request(task_info: CrawlerTaskInfo):
             # 开启抓取任务
             crawler = XiaoHongShuCrawler()
             crawler.set_username(selected_username)
-            await crawler.start()
+            try:
+                await crawler.start()
+            finally:
+                # 开启异步写入队列时数据可能还在队列中，读取文件之前先全部写入
+                await flush_data()
             # 读取json文件数据
             if os.path.exists(save_file_name):
                 async with aiofiles.open(save_file_name, 'r', encoding='utf-8') as file:
@@ -56,6 +56,32 @@ class AsyncMysqlDB:
                 lastrowid = cur.lastrowid
                 return lastrowid
 
+    async def bulk_upsert(self, table_name: str, items: List[Dict[str, Any]], update_columns: List[str]) -> int:
+        """
+        批量插入数据，唯一索引冲突的记录改为更新 update_columns 中的字段
+        aiomysql 会把 executemany 合并成多行 INSERT ... ON DUPLICATE KEY UPDATE 语句，语句过长时自动拆分成多条
+        :param table_name: 表名
+        :param items: 记录的字典信息列表，字段以第一条记录为准
+        :param update_columns: 冲突时需要更新的字段
+        :return: 影响的行数，新增的记录算 1 行，更新的记录算 2 行
+        """
+        if not items:
+            return 0
+        fields = list(items[0].keys())
+        fieldstr = ','.join([f'`{field}`' for field in fields])
+        valstr = ','.join(['%s'] * len(fields))
+        sql = "INSERT INTO %s (%s) VALUES (%s)" % (table_name, fieldstr, valstr)
+        if update_columns:
+            sql += " ON DUPLICATE KEY UPDATE " + ','.join([f'`{col}`=VALUES(`{col}`)' for col in update_columns])
+        else:
+            # 没有需要更新的字段时忽略重复的记录
+            sql = sql.replace("INSERT INTO", "INSERT IGNORE INTO", 1)
+        values = [[item.get(field) for field in fields] for item in items]
+        async with self.__pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                rows = await cur.executemany(sql, values)
+                return rows
+
     async def update_table(self, table_name: str, updates: Dict[str, Any], field_where: str,
                            value_where: Union[str, int, float]) -> int:
         """
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/20 20:10
+# @Desc    : 异步 SQLite 的增删改查封装，接口和 AsyncMysqlDB 保持一致，各平台的 sql 接口可以直接复用
+import asyncio
+import os
+import pathlib
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Union
+
+# ON CONFLICT DO UPDATE 不指定冲突字段需要 3.35.0 以上的版本
+MIN_SQLITE_VERSION = (3, 35, 0)
+
+
+class AsyncSqliteDB:
+    def __init__(self, db_path: str) -> None:
+        """
+        sqlite3 是阻塞接口，所有操作放在同一个线程中执行，不阻塞事件循环
+        :param db_path: 数据库文件路径
+        """
+        if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+            raise RuntimeError(
+                f"sqlite version {sqlite3.sqlite_version} is too old, "
+                f"{'.'.join(map(str, MIN_SQLITE_VERSION))} or later is required")
+        self.db_path = db_path
+        self.__conn: Optional[sqlite3.Connection] = None
+        self.__executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="async_sqlite")
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.__conn is None:
+            pathlib.Path(os.path.dirname(self.db_path) or ".").mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            # WAL 模式下读写不互相阻塞，synchronous=NORMAL 在 WAL 模式下不会损坏数据库
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.__conn = conn
+        return self.__conn
+
+    async def _run(self, func: Callable, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self.__executor, func, *args)
+
+    @staticmethod
+    def _format(sql: str) -> str:
+        # 兼容 AsyncMysqlDB 的 %s 占位符
+        return sql.replace("%s", "?")
+
+    async def init_schema(self, schema_file: str) -> None:
+        """
+        执行建表语句
+        :param schema_file: sql 文件路径
+        :return:
+        """
+        with open(schema_file, encoding="utf-8") as f:
+            schema_sql = f.read()
+        await self._run(lambda: self._connect().executescript(schema_sql))
+
+    async def query(self, sql: str, *args: Union[str, int]) -> List[Dict[str, Any]]:
+        """
+        从给定的 SQL 中查询记录，返回的是一个列表
+        :param sql: 查询的sql
+        :param args: sql中传递动态参数列表
+        :return:
+        """
+
+        def _query():
+            return [dict(row) for row in self._connect().execute(self._format(sql), args).fetchall()]
+
+        return await self._run(_query)
+
+    async def get_first(self, sql: str, *args: Union[str, int]) -> Union[Dict[str, Any], None]:
+        """
+        从给定的 SQL 中查询记录，返回的是符合条件的第一个结果
+        :param sql: 查询的sql
+        :param args:sql中传递动态参数列表
+        :return:
+        """
+
+        def _get_first():
+            row = self._connect().execute(self._format(sql), args).fetchone()
+            return dict(row) if row is not None else None
+
+        return await self._run(_get_first)
+
+    async def item_to_table(self, table_name: str, item: Dict[str, Any]) -> int:
+        """
+        表中插入数据
+        :param table_name: 表名
+        :param item: 一条记录的字典信息
+        :return:
+        """
+        fieldstr = ','.join([f'`{field}`' for field in item.keys()])
+        valstr = ','.join(['?'] * len(item))
+        sql = "INSERT INTO %s (%s) VALUES(%s)" % (table_name, fieldstr, valstr)
+
+        def _insert():
+            conn = self._connect()
+            with conn:
+                return conn.execute(sql, list(item.values())).lastrowid
+
+        return await self._run(_insert)
+
+    async def bulk_upsert(self, table_name: str, items: List[Dict[str, Any]], update_columns: List[str]) -> int:
+        """
+        批量插入数据，唯一索引冲突的记录改为更新 update_columns 中的字段，整批数据在一个事务中写入
+        :param table_name: 表名
+        :param items: 记录的字典信息列表，字段以第一条记录为准
+        :param update_columns: 冲突时需要更新的字段
+        :return: 影响的行数
+        """
+        if not items:
+            return 0
+        fields = list(items[0].keys())
+        fieldstr = ','.join([f'`{field}`' for field in fields])
+        valstr = ','.join(['?'] * len(fields))
+        sql = "INSERT INTO %s (%s) VALUES (%s)" % (table_name, fieldstr, valstr)
+        if update_columns:
+            sql += " ON CONFLICT DO UPDATE SET " + ','.join([f'`{col}`=excluded.`{col}`' for col in update_columns])
+        else:
+            sql += " ON CONFLICT DO NOTHING"
+        values = [[item.get(field) for field in fields] for item in items]
+
+        def _upsert():
+            conn = self._connect()
+            with conn:
+                return conn.executemany(sql, values).rowcount
+
+        return await self._run(_upsert)
+
+    async def update_table(self, table_name: str, updates: Dict[str, Any], field_where: str,
+                           value_where: Union[str, int, float]) -> int:
+        """
+        更新指定表的记录
+        :param table_name: 表名
+        :param updates: 需要更新的字段和值的 key - value 映射
+        :param field_where: update 语句 where 条件中的字段名
+        :param value_where: update 语句 where 条件中的字段值
+        :return:
+        """
+        upsets = ','.join([f'`{k}`=?' for k in updates.keys()])
+        sql = 'UPDATE %s SET %s WHERE `%s`=?' % (table_name, upsets, field_where)
+
+        def _update():
+            conn = self._connect()
+            with conn:
+                return conn.execute(sql, [*updates.values(), value_where]).rowcount
+
+        return await self._run(_update)
+
+    async def execute(self, sql: str, *args: Union[str, int]) -> int:
+        """
+        需要更新、写入等操作的 excute 执行语句
+        :param sql:
+        :param args:
+        :return:
+        """
+
+        def _execute():
+            conn = self._connect()
+            with conn:
+                return conn.execute(self._format(sql), args).rowcount
+
+        return await self._run(_execute)
+
+    async def close(self) -> None:
+        def _close():
+            if self.__conn is not None:
+                self.__conn.close()
+                self.__conn = None
+
+        await self._run(_close)
+        self.__executor.shutdown(wait=False)
@@ -1,8 +1,20 @@
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Type
 
+import httpx
 from playwright.async_api import BrowserContext, BrowserType
 
+import config
+from proxy.proxy_ip_pool import ProxyIpPool
+from proxy.proxy_rotator import ProxyRotator
+from proxy.types import IpInfoModel
+from tools.concurrency_limiter import AdaptiveConcurrencyLimiter, get_concurrency_limiter
+from tools.crawler_util import format_proxy_info
+from tools.http_client_pool import ProxiesType, http_client_pool
+from tools.rate_limiter import rate_limiter
+
 
 class AbstractCrawler(ABC):
     @abstractmethod
@@ -66,6 +78,24 @@ class AbstractStore(ABC):
     async def store_creator(self, creator: Dict):
         pass
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        批量保存内容，默认逐条调用 store_content，支持批量写入的存储实现覆盖该方法
+        :param content_items:
+        :return:
+        """
+        for content_item in content_items:
+            await self.store_content(content_item)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        批量保存评论，默认逐条调用 store_comment，支持批量写入的存储实现覆盖该方法
+        :param comment_items:
+        :return:
+        """
+        for comment_item in comment_items:
+            await self.store_comment(comment_item)
+
 
 class AbstractStoreImage(ABC):
     # TODO: support all platform
@@ -76,6 +106,15 @@ class AbstractStoreImage(ABC):
 
 
 class AbstractApiClient(ABC):
+    # 平台名称，用于在 http_client_pool 中区分不同平台的长连接
+    platform: str = ""
+    _host: str = ""
+    # 没有开启代理轮换时所有请求使用的代理
+    proxies: ProxiesType = None
+    proxy_rotator: Optional[ProxyRotator] = None
+    # 代理IP被平台封禁时抛出的异常，出现时换一个代理IP
+    ip_block_errors: Tuple[Type[Exception], ...] = ()
+
     @abstractmethod
     async def request(self, method, url, **kwargs):
         pass
@@ -83,3 +122,80 @@ class AbstractApiClient(ABC):
     @abstractmethod
     async def update_cookies(self, browser_context: BrowserContext):
         pass
+
+    def get_http_client(self, proxies: ProxiesType = None) -> httpx.AsyncClient:
+        """
+        获取当前平台 + 代理对应的长连接客户端
+        :param proxies: httpx 格式的代理配置
+        :return:
+        """
+        return http_client_pool.get_client(self.platform, proxies)
+
+    def set_proxy_pool(self, ip_pool: ProxyIpPool, proxy: Optional[IpInfoModel] = None):
+        """
+        开启代理轮换，API 请求按 config.IP_PROXY_ROTATE_EVERY 从代理池中换代理IP，每个代理IP使用自己的长连接
+        config.IP_PROXY_STICKY_PLATFORMS 中的平台登录态和 IP 绑定，固定使用一个代理IP
+        :param ip_pool: 代理池
+        :param proxy: 初始的代理IP，一般是浏览器使用的代理IP
+        :return:
+        """
+        self.proxy_rotator = ProxyRotator(ip_pool, proxy, sticky=self.platform in config.IP_PROXY_STICKY_PLATFORMS)
+
+    @property
+    def concurrency_limiter(self) -> AdaptiveConcurrencyLimiter:
+        """
+        当前平台共用的自适应并发控制器，爬虫用它代替 asyncio.Semaphore 控制并发
+        :return:
+        """
+        return get_concurrency_limiter(self.platform)
+
+    @asynccontextmanager
+    async def track_request(self) -> AsyncIterator[httpx.AsyncClient]:
+        """
+        获取本次请求使用的长连接客户端，统计请求的耗时和结果，反馈给自适应并发控制器和代理池，请求抛出异常时记为失败
+        开启代理轮换时每次请求从轮换器中取代理IP，被封禁的代理IP直接隔离，下次请求换一个
+        :return:
+        """
+        proxy, proxies = None, self.proxies
+        if self.proxy_rotator is not None:
+            proxy = await self.proxy_rotator.get_proxy()
+            _, proxies = format_proxy_info(proxy)
+        start = time.perf_counter()
+        try:
+            yield self.get_http_client(proxies)
+        except Exception as e:
+            self.concurrency_limiter.record_failure(f"{type(e).__name__}: {str(e)[:100]}")
+            if proxy is not None:
+                if isinstance(e, self.ip_block_errors):
+                    self.proxy_rotator.report_blocked(proxy)
+                elif isinstance(e, httpx.TransportError):
+                    # 连接失败、超时才算代理IP的问题，接口返回的业务错误不影响代理IP的健康度
+                    self.proxy_rotator.report_failure(proxy)
+            raise
+        latency = time.perf_counter() - start
+        self.concurrency_limiter.record_success(latency * 1000)
+        if proxy is not None:
+            self.proxy_rotator.report_success(proxy, latency)
+
+    async def acquire_rate_limit(self, url: str):
+        """
+        请求之前获取当前平台、当前接口的限流令牌
+        :param url: 请求地址
+        :return:
+        """
+        await rate_limiter.acquire(self.platform, url)
+
+    async def warm_up(self, proxies: ProxiesType = None):
+        """
+        预热到平台 API host 的连接
+        :param proxies: httpx 格式的代理配置
+        :return:
+        """
+        await http_client_pool.warm_up(self.platform, self._host, proxies)
+
+    async def close(self):
+        """
+        关闭当前平台的长连接客户端
+        :return:
+        """
+        await http_client_pool.close(self.platform)
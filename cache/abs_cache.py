@@ -5,7 +5,7 @@
 # @Desc    : 抽象类
 
 from abc import ABC, abstractmethod
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 
 
 class AbstractCache(ABC):
@@ -40,3 +40,47 @@ class AbstractCache(ABC):
         :return:
         """
         raise NotImplementedError
+
+    async def async_get(self, key: str) -> Optional[Any]:
+        """
+        异步从缓存中获取键的值，默认直接调用 get，网络缓存在异步代码中应该覆盖这个方法
+        :param key: 键
+        :return:
+        """
+        return self.get(key)
+
+    async def async_set(self, key: str, value: Any, expire_time: int) -> None:
+        """
+        异步将键的值设置到缓存中，默认直接调用 set
+        :param key: 键
+        :param value: 值
+        :param expire_time: 过期时间
+        :return:
+        """
+        self.set(key, value, expire_time)
+
+    async def async_keys(self, pattern: str) -> List[str]:
+        """
+        异步获取所有符合pattern的key，默认直接调用 keys
+        :param pattern: 匹配模式
+        :return:
+        """
+        return self.keys(pattern)
+
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        批量获取键的值，不存在的键返回 None，默认逐个调用 async_get
+        :param keys: 键列表
+        :return: 和 keys 顺序一致的值列表
+        """
+        return [await self.async_get(key) for key in keys]
+
+    async def mset(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        """
+        批量设置键的值，默认逐个调用 async_set
+        :param mapping: 键值对
+        :param expire_time: 过期时间
+        :return:
+        """
+        for key, value in mapping.items():
+            await self.async_set(key, value, expire_time)
@@ -24,6 +24,6 @@ class CacheFactory:
             return ExpiringLocalCache(*args, **kwargs)
         elif cache_type == 'redis':
             from .redis_cache import RedisCache
-            return RedisCache()
+            return RedisCache(*args, **kwargs)
         else:
             raise ValueError(f'Unknown cache type: {cache_type}')
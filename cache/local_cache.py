@@ -5,23 +5,62 @@
 # @Desc    : 本地缓存
 
 import asyncio
+import bisect
+import heapq
+import itertools
+import sys
 import time
+from collections import OrderedDict
+from fnmatch import fnmatchcase
 from typing import Any, Dict, List, Optional, Tuple
 
 from cache.abs_cache import AbstractCache
 
+# glob 模式中的通配符，第一个通配符之前的部分是字面量前缀
+GLOB_SPECIAL_CHARS = "*?[\\"
+
+
+def get_literal_prefix(pattern: str) -> str:
+    """
+    获取 glob 模式中第一个通配符之前的字面量前缀
+    :param pattern: 匹配模式
+    :return:
+    """
+    for i, char in enumerate(pattern):
+        if char in GLOB_SPECIAL_CHARS:
+            return pattern[:i]
+    return pattern
+
 
 class ExpiringLocalCache(AbstractCache):
 
-    def __init__(self, cron_interval: int = 10):
+    def __init__(self, cron_interval: int = 10, max_entries: int = 0, max_bytes: int = 0):
         """
         初始化本地缓存
+        过期时间保存在最小堆中，清理时只弹出已经过期的键；超过容量时按 LRU 淘汰最久没有访问的键
         :param cron_interval: 定时清楚cache的时间间隔
+        :param max_entries: 最多缓存多少个键，0 表示不限制
+        :param max_bytes: 缓存值的最大总大小（按 sys.getsizeof 估算），0 表示不限制
         :return:
         """
         self._cron_interval = cron_interval
-        self._cache_container: Dict[str, Tuple[Any, float]] = {}
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        # key -> (value, 过期时间, 估算大小)，按访问顺序排列，最久没有访问的在最前面
+        self._cache_container: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        # (过期时间, key) 的最小堆，键被覆盖或删除之后堆中的旧记录在弹出时跳过
+        self._expire_heap: List[Tuple[float, str]] = []
+        # 有序的 key 列表，keys() 按字面量前缀二分查找；新增的 key 先放到 _pending_keys，查询时再合并
+        self._sorted_keys: List[str] = []
+        self._pending_keys: List[str] = []
+        self._index_has_removed = False
+        self._total_bytes = 0
         self._cron_task: Optional[asyncio.Task] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
         # 开启定时清理任务
         self._schedule_clear()
 
@@ -33,22 +72,45 @@ class ExpiringLocalCache(AbstractCache):
         if self._cron_task is not None:
             self._cron_task.cancel()
 
+    def __len__(self) -> int:
+        return len(self._cache_container)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        缓存的命中、未命中、淘汰和过期次数，bytes 只在设置了 max_bytes 时统计
+        :return:
+        """
+        return {
+            "size": len(self._cache_container),
+            "bytes": self._total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
     def get(self, key: str) -> Optional[Any]:
         """
         从缓存中获取键的值
         :param key:
         :return:
         """
-        value, expire_time = self._cache_container.get(key, (None, 0))
-        if value is None:
+        item = self._cache_container.get(key)
+        if item is None:
+            self.misses += 1
             return None
 
         # 如果键已过期，则删除键并返回None
-        if expire_time < time.time():
-            del self._cache_container[key]
+        if item[1] < time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
             return None
 
-        return value
+        self._cache_container.move_to_end(key)
+        self.hits += 1
+        return item[0]
 
     def set(self, key: str, value: Any, expire_time: int) -> None:
         """
@@ -58,22 +120,92 @@ class ExpiringLocalCache(AbstractCache):
         :param expire_time:
         :return:
         """
-        self._cache_container[key] = (value, time.time() + expire_time)
+        expire_at = time.monotonic() + expire_time
+        # 估算大小有额外开销，只在限制了总大小时计算
+        size = sys.getsizeof(key) + sys.getsizeof(value) if self._max_bytes else 0
+        old_item = self._cache_container.get(key)
+        if old_item is None:
+            self._pending_keys.append(key)
+        else:
+            self._total_bytes -= old_item[2]
+            self._cache_container.move_to_end(key)
+        self._cache_container[key] = (value, expire_at, size)
+        self._total_bytes += size
+        heapq.heappush(self._expire_heap, (expire_at, key))
+        self._evict()
+        self._compact_heap()
+
+    def delete(self, key: str) -> None:
+        """
+        删除缓存中的键
+        :param key:
+        :return:
+        """
+        if key in self._cache_container:
+            self._remove(key)
 
     def keys(self, pattern: str) -> List[str]:
         """
-        获取所有符合pattern的key
+        获取所有符合pattern的key，pattern 使用 glob 语法（*、?、[abc]），和 redis 的 keys 一致
         :param pattern: 匹配模式
         :return:
         """
+        now = time.monotonic()
         if pattern == '*':
-            return list(self._cache_container.keys())
+            return [key for key, item in self._cache_container.items() if item[1] >= now]
 
-        # 本地缓存通配符暂时将*替换为空
-        if '*' in pattern:
-            pattern = pattern.replace('*', '')
+        prefix = get_literal_prefix(pattern)
+        sorted_keys = self._get_sorted_keys()
+        result = []
+        for i in range(bisect.bisect_left(sorted_keys, prefix), len(sorted_keys)):
+            key = sorted_keys[i]
+            if not key.startswith(prefix):
+                break
+            if fnmatchcase(key, pattern) and self._cache_container[key][1] >= now:
+                result.append(key)
+        return result
 
-        return [key for key in self._cache_container.keys() if pattern in key]
+    def _get_sorted_keys(self) -> List[str]:
+        """
+        合并新增的 key 到有序列表中，两个有序序列拼接之后排序是线性的；有 key 被删除过时顺便去掉删除和重复的 key
+        :return:
+        """
+        if self._pending_keys:
+            self._pending_keys.sort()
+            self._sorted_keys += self._pending_keys
+            self._sorted_keys.sort()
+            self._pending_keys = []
+        if self._index_has_removed:
+            self._sorted_keys = [key for key, _ in itertools.groupby(self._sorted_keys)
+                                 if key in self._cache_container]
+            self._index_has_removed = False
+        return self._sorted_keys
+
+    def _remove(self, key: str) -> None:
+        _, _, size = self._cache_container.pop(key)
+        self._total_bytes -= size
+        self._index_has_removed = True
+
+    def _evict(self) -> None:
+        """
+        超过容量时按 LRU 淘汰最久没有访问的键
+        :return:
+        """
+        while self._cache_container and (
+                (self._max_entries and len(self._cache_container) > self._max_entries) or
+                (self._max_bytes and self._total_bytes > self._max_bytes)):
+            key = next(iter(self._cache_container))
+            self._remove(key)
+            self.evictions += 1
+
+    def _compact_heap(self) -> None:
+        """
+        堆中被覆盖、删除的旧记录太多时重建堆，避免反复 set 同一个键时堆无限增长
+        :return:
+        """
+        if len(self._expire_heap) > 2 * len(self._cache_container) + 1024:
+            self._expire_heap = [(item[1], key) for key, item in self._cache_container.items()]
+            heapq.heapify(self._expire_heap)
 
     def _schedule_clear(self):
         """
@@ -91,12 +223,18 @@ class ExpiringLocalCache(AbstractCache):
 
     def _clear(self):
         """
-        根据过期时间清理缓存
+        根据过期时间清理缓存，只从堆顶弹出已经过期的记录，复杂度 O(k log n)，k 是过期的键数量
         :return:
         """
-        for key, (value, expire_time) in self._cache_container.items():
-            if expire_time < time.time():
-                del self._cache_container[key]
+        now = time.monotonic()
+        heap = self._expire_heap
+        while heap and heap[0][0] < now:
+            expire_at, key = heapq.heappop(heap)
+            item = self._cache_container.get(key)
+            # 键被重新设置过或者已经删除时，堆中的是旧记录
+            if item is not None and item[1] == expire_at:
+                self._remove(key)
+                self.expirations += 1
 
     async def _start_clear_cron(self):
         """
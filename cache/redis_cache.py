@@ -3,34 +3,70 @@
 # @Name    : 程序员阿江-Relakkes
 # @Time    : 2024/5/29 22:57
 # @Desc    : RedisCache实现
-import pickle
-import time
-from typing import Any, List
+import asyncio
+from typing import Any, Dict, List, Optional
 
 from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
 
+from cache import serializer
 from cache.abs_cache import AbstractCache
 from config import db_config
+from tools import utils
 
 
 class RedisCache(AbstractCache):
 
-    def __init__(self) -> None:
-        # 连接redis, 返回redis客户端
-        self._redis_client = self._connet_redis()
+    def __init__(self, host: Optional[str] = None, port: Optional[int] = None, db: Optional[int] = None,
+                 password: Optional[str] = None, scan_count: int = 1000) -> None:
+        """
+        异步代码中使用 async_get、async_set、async_keys、mget、mset，基于 redis.asyncio 不会阻塞事件循环
+        同步的 get、set、keys 只给同步代码使用；值使用 cache.serializer 序列化，不再使用 pickle
+        :param host: 默认使用 db_config 中的配置
+        :param port:
+        :param db:
+        :param password:
+        :param scan_count: SCAN 每次迭代的数量
+        """
+        self._connection_kwargs = dict(
+            host=db_config.REDIS_DB_HOST if host is None else host,
+            port=db_config.REDIS_DB_PORT if port is None else port,
+            db=db_config.REDIS_DB_NUM if db is None else db,
+            password=db_config.REDIS_DB_PWD if password is None else password,
+        )
+        self._scan_count = scan_count
+        # 连接redis, 返回redis客户端，用到时才创建
+        self._redis_client: Optional[Redis] = None
+        self._async_redis_client: Optional[AsyncRedis] = None
 
-    @staticmethod
-    def _connet_redis() -> Redis:
+    def _connet_redis(self) -> Redis:
         """
         连接redis, 返回redis客户端, 这里按需配置redis连接信息
         :return:
         """
-        return Redis(
-            host=db_config.REDIS_DB_HOST,
-            port=db_config.REDIS_DB_PORT,
-            db=db_config.REDIS_DB_NUM,
-            password=db_config.REDIS_DB_PWD,
-        )
+        if self._redis_client is None:
+            self._redis_client = Redis(**self._connection_kwargs)
+        return self._redis_client
+
+    def _connet_async_redis(self) -> AsyncRedis:
+        """
+        连接redis, 返回异步redis客户端
+        :return:
+        """
+        if self._async_redis_client is None:
+            self._async_redis_client = AsyncRedis(**self._connection_kwargs)
+        return self._async_redis_client
+
+    @staticmethod
+    def _loads(key: str, value: Optional[bytes]) -> Any:
+        if value is None:
+            return None
+        try:
+            return serializer.loads(value)
+        except serializer.SerializeError as e:
+            # 之前用 pickle 保存的值按不存在处理，过期之后会被覆盖
+            utils.logger.warning(f"[RedisCache] skip value of key {key}, err: {e}")
+            return None
 
     def get(self, key: str) -> Any:
         """
@@ -38,10 +74,7 @@ class RedisCache(AbstractCache):
         :param key:
         :return:
         """
-        value = self._redis_client.get(key)
-        if value is None:
-            return None
-        return pickle.loads(value)
+        return self._loads(key, self._connet_redis().get(key))
 
     def set(self, key: str, value: Any, expire_time: int) -> None:
         """
@@ -51,26 +84,76 @@ class RedisCache(AbstractCache):
         :param expire_time:
         :return:
         """
-        self._redis_client.set(key, pickle.dumps(value), ex=expire_time)
+        self._connet_redis().set(key, serializer.dumps(value), ex=expire_time)
 
     def keys(self, pattern: str) -> List[str]:
         """
-        获取所有符合pattern的key
+        获取所有符合pattern的key，使用 SCAN 迭代，不会像 KEYS 一样长时间阻塞 redis
         """
-        return [key.decode() for key in self._redis_client.keys(pattern)]
+        return [key.decode() for key in self._connet_redis().scan_iter(match=pattern, count=self._scan_count)]
 
+    async def async_get(self, key: str) -> Optional[Any]:
+        return self._loads(key, await self._connet_async_redis().get(key))
 
-if __name__ == '__main__':
+    async def async_set(self, key: str, value: Any, expire_time: int) -> None:
+        await self._connet_async_redis().set(key, serializer.dumps(value), ex=expire_time)
+
+    async def async_keys(self, pattern: str) -> List[str]:
+        client = self._connet_async_redis()
+        return [key.decode() async for key in client.scan_iter(match=pattern, count=self._scan_count)]
+
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        一次 MGET 批量获取键的值
+        :param keys:
+        :return:
+        """
+        if not keys:
+            return []
+        values = await self._connet_async_redis().mget(keys)
+        return [self._loads(key, value) for key, value in zip(keys, values)]
+
+    async def mset(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        """
+        MSET 不支持过期时间，用不带事务的 pipeline 一次发送所有的 SET
+        :param mapping:
+        :param expire_time:
+        :return:
+        """
+        if not mapping:
+            return
+        async with self._connet_async_redis().pipeline(transaction=False) as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, serializer.dumps(value), ex=expire_time)
+            await pipe.execute()
+
+    async def close(self) -> None:
+        """
+        关闭redis连接
+        :return:
+        """
+        if self._async_redis_client is not None:
+            await self._async_redis_client.close()
+            self._async_redis_client = None
+        if self._redis_client is not None:
+            self._redis_client.close()
+            self._redis_client = None
+
+
+async def main():
     redis_cache = RedisCache()
     # basic usage
-    redis_cache.set("name", "程序员阿江-Relakkes", 1)
-    print(redis_cache.get("name"))  # Relakkes
-    print(redis_cache.keys("*"))  # ['name']
-    time.sleep(2)
-    print(redis_cache.get("name"))  # None
-
-    # special python type usage
-    # list
-    redis_cache.set("list", [1, 2, 3], 10)
-    _value = redis_cache.get("list")
-    print(_value, f"value type:{type(_value)}")  # [1, 2, 3]
+    await redis_cache.async_set("name", "程序员阿江-Relakkes", 1)
+    print(await redis_cache.async_get("name"))  # Relakkes
+    print(await redis_cache.async_keys("*"))  # ['name']
+    await asyncio.sleep(2)
+    print(await redis_cache.async_get("name"))  # None
+
+    # batch usage
+    await redis_cache.mset({"list": [1, 2, 3], "dict": {"name": "Relakkes"}}, 10)
+    print(await redis_cache.mget(["list", "dict", "not_exists"]))  # [[1, 2, 3], {'name': 'Relakkes'}, None]
+    await redis_cache.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
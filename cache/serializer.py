@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/28 20:10
+# @Desc    : 缓存值的序列化，代替 pickle，反序列化时不会执行任意代码
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 第一个字节标记值的类型，字符串和二进制不经过 json 直接保存
+STR_TAG = b"s"
+BYTES_TAG = b"b"
+JSON_TAG = b"j"
+
+
+class SerializeError(ValueError):
+    """缓存值无法序列化或者反序列化"""
+
+
+def dumps(value: Any) -> bytes:
+    """
+    序列化缓存值，支持 str、bytes 和 json 可以表示的类型（tuple 会变成 list）
+    :param value:
+    :return:
+    """
+    if isinstance(value, str):
+        return STR_TAG + value.encode("utf-8")
+    if isinstance(value, (bytes, bytearray)):
+        return BYTES_TAG + bytes(value)
+    try:
+        if orjson is not None:
+            return JSON_TAG + orjson.dumps(value)
+        return JSON_TAG + json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    except TypeError as e:
+        raise SerializeError(f"can not serialize {type(value).__name__} value: {e}")
+
+
+def loads(data: bytes) -> Any:
+    """
+    反序列化缓存值
+    :param data:
+    :return:
+    """
+    tag, payload = data[:1], data[1:]
+    if tag == STR_TAG:
+        return payload.decode("utf-8")
+    if tag == BYTES_TAG:
+        return payload
+    if tag == JSON_TAG:
+        if orjson is not None:
+            return orjson.loads(payload)
+        return json.loads(payload)
+    # 例如之前用 pickle 保存的值
+    raise SerializeError(f"unknown serialize tag: {tag!r}")
@@ -18,6 +18,86 @@ IP_PROXY_POOL_COUNT = 2
 # 代理IP提供商名称
 IP_PROXY_PROVIDER_NAME = "kuaidaili"
 
+# 代理IP加载时并发检测，之后每隔多少秒在后台重新检测一次，0 表示不定期检测
+IP_PROXY_VALIDATE_INTERVAL = 60
+# 检测代理IP的超时时间（秒）
+IP_PROXY_VALIDATE_TIMEOUT = 10
+# 代理IP连续失败多少次之后隔离，隔离期间不会被分配，后台检测通过之后恢复
+IP_PROXY_MAX_FAILURES = 3
+IP_PROXY_QUARANTINE_SECONDS = 120
+# 可用的代理IP不超过这个数量时在后台提前补充
+IP_PROXY_REFILL_THRESHOLD = 1
+# 代理IP过期前多少秒不再分配
+IP_PROXY_EXPIRE_MARGIN = 30
+# API 请求每隔多少次从代理池中换一个代理IP，1 表示每次请求都换，0 表示只有被封禁或者不可用时才换
+IP_PROXY_ROTATE_EVERY = 1
+# 登录态和 IP 绑定的平台，同一个账号固定使用一个代理IP，只有被封禁或者不可用时才换
+IP_PROXY_STICKY_PLATFORMS = ["xhs", "dy"]
+
+# HTTP 连接池配置，每个 (平台, 代理) 共用一个长连接客户端
+# 是否开启 HTTP/2，需要安装 h2 依赖: pip install httpx[http2]
+ENABLE_HTTP2 = True
+# 单个客户端的最大连接数
+HTTP_POOL_MAX_CONNECTIONS = 100
+# 单个客户端保持的最大空闲长连接数
+HTTP_POOL_MAX_KEEPALIVE_CONNECTIONS = 20
+# 空闲长连接的存活时间（秒）
+HTTP_POOL_KEEPALIVE_EXPIRY = 30
+
+# 签名页面池配置，大于 1 时会在同一个浏览器上下文中额外打开页面并发执行签名 JS（目前支持 xhs 和 dy）
+SIGN_PAGE_POOL_SIZE = 1
+# 单个签名页面最多使用次数，超过之后关闭重建，0 表示不限制
+SIGN_PAGE_MAX_USES = 2000
+# 签名页面健康检查间隔（秒），0 表示不开启
+SIGN_PAGE_HEALTH_CHECK_INTERVAL = 60
+
+# 签名后端，playwright(浏览器页面中执行) | js_engine(进程内 V8 引擎执行，需要安装 mini-racer 依赖)
+# js_engine 模式下浏览器只用于登录，需要提供平台的签名脚本，加载前会先执行 libs/sign_env.js 补全浏览器环境
+SIGN_BACKEND = "playwright"
+# 小红书签名脚本路径，加载后需要提供 window._webmsxyw
+XHS_SIGN_SCRIPT_PATH = ""
+# 抖音签名脚本路径，加载后需要提供 window.bdms
+DY_SIGN_SCRIPT_PATH = ""
+
+# 是否开启请求限流
+ENABLE_RATE_LIMIT = True
+# 请求限流规则，按平台配置，每个平台按顺序匹配第一个符合的接口路径（fnmatch 通配符），同一个规则匹配到的接口共用一个令牌桶
+# rate: 每秒允许的请求数，burst: 允许的突发请求数，jitter: 每次请求额外的随机延时上限（秒）
+# 没有匹配到任何规则的接口不限速
+RATE_LIMIT_RULES = {
+    "xhs": [
+        # 查询笔记详情
+        {"pattern": "/api/sns/web/v1/feed", "rate": 1, "burst": 1, "jitter": 0.5},
+        # 网页版笔记详情
+        {"pattern": "/explore/*", "rate": 1, "burst": 1, "jitter": 0.5},
+        {"pattern": "*", "rate": 2, "burst": 2, "jitter": 0.5},
+    ],
+    "dy": [
+        {"pattern": "*", "rate": 2, "burst": 2, "jitter": 0.5},
+    ],
+    "ks": [
+        {"pattern": "*", "rate": 2, "burst": 2, "jitter": 0.5},
+    ],
+    "bili": [
+        {"pattern": "*", "rate": 2, "burst": 2, "jitter": 0.5},
+    ],
+    # 微博对API的限流比较严重，所以速率低一些
+    "wb": [
+        {"pattern": "*", "rate": 0.5, "burst": 1, "jitter": 1},
+    ],
+    "tieba": [
+        {"pattern": "*", "rate": 2, "burst": 2, "jitter": 0.5},
+    ],
+}
+
+# 是否开启详情请求合并，同一个笔记/视频详情并发请求时只发一次请求，结果共享
+ENABLE_REQUEST_COALESCING = True
+# 详情请求结果的缓存时间（秒），吸收短时间内重复的请求，0 表示只合并并发的请求
+REQUEST_COALESCING_CACHE_TTL = 60
+
+# B站 wbi 签名 key 的缓存时间（秒），过期之后先继续使用旧的 key 签名，同时在后台刷新
+BILI_WBI_KEYS_TTL = 600
+
 # 设置为True不会打开浏览器（无头浏览器）
 # 设置False会打开一个浏览器
 # 小红书如果一直扫码登录不通过，打开浏览器手动过一下滑动验证码
@@ -27,8 +107,43 @@ HEADLESS = False
 # 是否保存登录状态
 SAVE_LOGIN_STATE = True
 
-# 数据保存类型选项配置,支持三种类型：csv、db、json
-SAVE_DATA_OPTION = "json"  # csv or db or json
+# 数据保存类型选项配置,支持六种类型：csv、db、json、jsonl、parquet、sqlite
+# jsonl 每条数据追加一行，不会重写整个文件，数据量大的时候推荐使用，可以通过 python -m tools.jsonl_writer 导出成 json 数组文件
+# parquet 列式存储，按行组写入，文件小、分析查询快，需要安装 pyarrow
+# sqlite 保存到本地的 SQLite 数据库文件，不需要安装 MySQL，表结构和 db 一样
+SAVE_DATA_OPTION = "json"  # csv or db or json or jsonl or parquet or sqlite
+
+# SQLite 数据库文件路径
+SQLITE_DB_PATH = "data/media_crawler.db"
+
+# csv 写入缓冲，文件在一次运行中只打开一次，缓冲的数据达到条数或者距离上次写入超过时间（秒）时写入磁盘
+CSV_FLUSH_RECORDS = 100
+CSV_FLUSH_INTERVAL = 5
+
+# jsonl 单个文件的最大字节数，超过之后写入新的文件，0 表示不按大小切分
+JSONL_ROTATE_MAX_BYTES = 128 * 1024 * 1024
+# jsonl 单个文件的最长写入时间（秒），超过之后写入新的文件，0 表示不按时间切分
+JSONL_ROTATE_INTERVAL = 0
+# jsonl 写入缓冲，缓冲的数据达到条数或者距离上次写入超过时间（秒）时写入磁盘
+JSONL_FLUSH_RECORDS = 100
+JSONL_FLUSH_INTERVAL = 5
+
+# parquet 每个行组的行数，缓冲的数据达到行数时写入一个行组，爬虫结束时写入剩余的数据
+PARQUET_ROW_GROUP_SIZE = 1000
+# parquet 压缩算法，snappy | zstd | gzip | none
+PARQUET_COMPRESSION = "zstd"
+
+# 是否开启异步写入队列，开启后数据先放入队列，由后台任务批量写入存储，爬取和存储并行执行
+# 爬虫结束、异常退出或者 Ctrl+C 时会把队列中的数据写完再退出
+ENABLE_WRITE_BEHIND = True
+# 每个写入队列的最大长度，队列满了之后爬虫等待存储写入
+WRITE_BEHIND_QUEUE_SIZE = 1000
+# 每个写入队列的后台写入任务数
+WRITE_BEHIND_WORKERS = 1
+# 每批最多写入的数据条数
+WRITE_BEHIND_BATCH_SIZE = 100
+# 一批数据最长的等待时间（秒），数据不够一批时也会写入
+WRITE_BEHIND_BATCH_AGE = 1.0
 
 # 用户浏览器缓存的浏览器文件配置
 USER_DATA_DIR = "%s_user_data_dir"  # %s will be replaced by platform name
@@ -40,12 +155,37 @@ START_PAGE = 1
 # 爬取视频/帖子的数量控制
 CRAWLER_MAX_NOTES_COUNT = 100
 
-# 并发爬虫数量控制
+# 并发爬虫数量控制，开启自适应并发时作为初始并发数
 MAX_CONCURRENCY_NUM = 1
 
+# 是否开启自适应并发，根据请求成功率和延迟在 [ADAPTIVE_CONCURRENCY_MIN, ADAPTIVE_CONCURRENCY_MAX] 之间自动调整并发数
+# 请求失败（被风控、数据获取失败）或者延迟突增时并发数减半，一个统计窗口内都正常时并发数加 1
+# 默认关闭，并发数固定为 MAX_CONCURRENCY_NUM；开启之后最多会有 ADAPTIVE_CONCURRENCY_MAX 个并发请求
+ENABLE_ADAPTIVE_CONCURRENCY = False
+ADAPTIVE_CONCURRENCY_MIN = 1
+ADAPTIVE_CONCURRENCY_MAX = 8
+# 每个统计窗口包含的请求数
+ADAPTIVE_CONCURRENCY_WINDOW_SIZE = 20
+
 # 是否开启爬图片模式, 默认不开启爬图片
 ENABLE_GET_IMAGES = False
 
+# 同时下载的图片、视频文件数，文件分块流式写入磁盘，内存占用和文件大小无关
+MEDIA_DOWNLOAD_WORKERS = 4
+# 每次写入磁盘的数据块大小（字节）
+MEDIA_DOWNLOAD_CHUNK_SIZE = 256 * 1024
+# 单个文件的最大字节数，超过之后放弃下载，0 表示不限制
+MEDIA_MAX_FILE_SIZE = 2 * 1024 * 1024 * 1024
+# 单个文件的最长下载时间（秒），超时的文件保留 .part 临时文件，下次运行时通过 Range 续传，0 表示不限制
+MEDIA_MAX_FILE_SECONDS = 600
+
+# 图片、视频按内容去重保存，同一个 url 或者相同内容的文件跨笔记、跨运行只下载和保存一次
+# 文件保存在 MEDIA_STORE_PATH/blobs 下，笔记目录下的 manifest.jsonl 记录笔记中的文件对应的 blob
+ENABLE_MEDIA_DEDUP = True
+MEDIA_STORE_PATH = "data/media"
+# 在原来的文件路径创建指向 blob 的硬链接，保持原来的目录结构，不占用额外的磁盘空间
+MEDIA_STORE_HARDLINK = True
+
 # 是否开启爬评论模式, 默认不开启爬评论
 ENABLE_GET_COMMENTS = False
 
@@ -146,3 +286,15 @@ STOP_WORDS_FILE = "./docs/hit_stopwords.txt"
 
 # 中文字体文件路径
 FONT_PATH = "./docs/STZHONGS.TTF"
+
+# 词频文件写入的最小间隔（秒），每次只统计新增评论的词频，爬虫结束时会再写入一次
+WORDCLOUD_SAVE_INTERVAL = 10
+# 词云图生成的最小间隔（秒），爬虫结束时会再生成一次
+WORDCLOUD_RENDER_INTERVAL = 60
+# 生成词云图的进程数
+WORDCLOUD_WORKERS = 1
+
+# 分词服务的进程数，每个进程启动时加载一次 jieba 词典、自定义词语和停用词
+SEGMENTATION_WORKERS = 2
+# 分词服务每批发送给一个进程的文本数
+SEGMENTATION_BATCH_SIZE = 200
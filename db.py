@@ -11,6 +11,7 @@ import aiomysql
 
 import config
 from async_db import AsyncMysqlDB
+from async_sqlite import AsyncSqliteDB
 from tools import utils
 from var import db_conn_pool_var, media_crawler_db_var
 
@@ -53,6 +54,18 @@ async def init_mediacrawler_db():
     media_crawler_db_var.set(async_db_obj)
 
 
+async def init_sqlite_db():
+    """
+    初始化SQLite数据库，表不存在时自动创建，并将封装的CRUD sql接口对象塞给media_crawler_db_var上下文变量
+    各平台的 sql 接口和 MySQL 共用
+    Returns:
+
+    """
+    async_db_obj = AsyncSqliteDB(config.SQLITE_DB_PATH)
+    await async_db_obj.init_schema("schema/sqlite_tables.sql")
+    media_crawler_db_var.set(async_db_obj)
+
+
 async def init_db():
     """
     初始化db连接池
@@ -60,7 +73,10 @@ async def init_db():
 
     """
     utils.logger.info("[init_db] start init mediacrawler db connect object")
-    await init_mediacrawler_db()
+    if config.SAVE_DATA_OPTION == "sqlite":
+        await init_sqlite_db()
+    else:
+        await init_mediacrawler_db()
     utils.logger.info("[init_db] end init mediacrawler db connect object")
 
 
@@ -71,6 +87,9 @@ async def close():
 
     """
     utils.logger.info("[close] close mediacrawler db pool")
+    if config.SAVE_DATA_OPTION == "sqlite":
+        await media_crawler_db_var.get().close()
+        return
     db_pool: aiomysql.Pool = db_conn_pool_var.get()
     if db_pool is not None:
         db_pool.close()
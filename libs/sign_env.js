@@ -0,0 +1,99 @@
+/*
+ * 内嵌 JS 引擎的浏览器环境补丁，加载平台签名脚本之前执行
+ * 只补全签名脚本会访问到的对象，__SIGN_ENV__ 由 Python 端在加载前注入:
+ * {userAgent, cookie, href, localStorage}
+ */
+(function (global) {
+    var env = global.__SIGN_ENV__ || {};
+
+    function Storage(initial) {
+        var data = {};
+        Object.keys(initial || {}).forEach(function (key) {
+            data[key] = String(initial[key]);
+        });
+        this.getItem = function (key) {
+            return Object.prototype.hasOwnProperty.call(data, key) ? data[key] : null;
+        };
+        this.setItem = function (key, value) {
+            data[key] = String(value);
+        };
+        this.removeItem = function (key) {
+            delete data[key];
+        };
+        this.clear = function () {
+            data = {};
+        };
+        this.key = function (index) {
+            return Object.keys(data)[index] || null;
+        };
+        Object.defineProperty(this, "length", {
+            get: function () {
+                return Object.keys(data).length;
+            }
+        });
+    }
+
+    function noop() {
+    }
+
+    var href = env.href || "";
+    var hostMatch = href.match(/^(\w+:)\/\/([^/]+)/) || ["", "https:", ""];
+
+    global.window = global;
+    global.self = global;
+    global.top = global;
+    global.parent = global;
+    global.globalThis = global;
+    global.localStorage = new Storage(env.localStorage);
+    global.sessionStorage = new Storage({});
+    global.navigator = {
+        userAgent: env.userAgent || "",
+        platform: "MacIntel",
+        language: "zh-CN",
+        languages: ["zh-CN", "zh"],
+        webdriver: false,
+        cookieEnabled: true,
+        hardwareConcurrency: 8,
+        plugins: {length: 0},
+        mimeTypes: {length: 0}
+    };
+    global.location = {
+        href: href,
+        protocol: hostMatch[1],
+        host: hostMatch[2],
+        hostname: hostMatch[2].split(":")[0],
+        origin: hostMatch[1] + "//" + hostMatch[2],
+        pathname: "/",
+        search: "",
+        hash: ""
+    };
+    global.screen = {width: 1920, height: 1080, availWidth: 1920, availHeight: 1080, colorDepth: 24};
+    global.document = {
+        cookie: env.cookie || "",
+        referrer: "",
+        location: global.location,
+        readyState: "complete",
+        documentElement: {style: {}},
+        createElement: function () {
+            return {style: {}, getContext: noop, appendChild: noop, setAttribute: noop};
+        },
+        getElementById: noop,
+        getElementsByTagName: function () {
+            return [];
+        },
+        querySelector: noop,
+        addEventListener: noop,
+        removeEventListener: noop
+    };
+    global.addEventListener = noop;
+    global.removeEventListener = noop;
+    global.setTimeout = global.setTimeout || function (fn) {
+        fn();
+        return 0;
+    };
+    global.clearTimeout = global.clearTimeout || noop;
+    global.setInterval = global.setInterval || function () {
+        return 0;
+    };
+    global.clearInterval = global.clearInterval || noop;
+})(this);
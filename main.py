@@ -11,6 +11,15 @@ from media_platform.kuaishou import KuaishouCrawler
 from media_platform.tieba import TieBaCrawler
 from media_platform.weibo import WeiboCrawler
 from media_platform.xhs import XiaoHongShuCrawler
+from proxy.proxy_ip_pool import close_ip_pools
+from tools.csv_writer import csv_writers
+from tools.http_client_pool import http_client_pool
+from tools.jsonl_writer import jsonl_writers
+from tools.media_store import media_store
+from tools.parquet_writer import parquet_writers
+from tools.segmentation import segmentation_service
+from tools.words import word_cloud_generator
+from tools.write_behind import write_behind_stores
 
 
 class CrawlerFactory:
@@ -36,19 +45,61 @@ async def main():
     cmd_arg.parse_cmd()
 
     # init db
-    if config.SAVE_DATA_OPTION == "db":
+    if config.SAVE_DATA_OPTION in ("db", "sqlite"):
         await db.init_db()
 
     crawler = CrawlerFactory.create_crawler(platform=config.PLATFORM)
-    await crawler.start()
+    try:
+        await crawler.start()
+    finally:
+        # 正常结束、异常退出或者 Ctrl+C 时都要把还没写入的数据写完
+        await close()
+
+
+async def flush_data():
+    """
+    write all queued and buffered data to files and db, e.g. before api_server reads the saved files
+    """
+    # flush write-behind queues first, they still write to files and db
+    await write_behind_stores.close_all()
+
+    # flush buffered csv, jsonl and parquet data, parquet files are unreadable until closed
+    await csv_writers.close_all()
+    await jsonl_writers.close_all()
+    await parquet_writers.close_all()
+
+
+async def close():
+    await flush_data()
+
+    # save the latest word frequency and word cloud, then stop the worker processes
+    await word_cloud_generator.close()
+    await segmentation_service.close()
+
+    # log media dedup stats
+    await media_store.close()
+
+    # stop background proxy validation
+    await close_ip_pools()
+
+    # close pooled http connections
+    await http_client_pool.close_all()
 
-    if config.SAVE_DATA_OPTION == "db":
+    if config.SAVE_DATA_OPTION in ("db", "sqlite"):
         await db.close()
 
 
 if __name__ == '__main__':
+    # asyncio.run(main())
+    loop = asyncio.get_event_loop()
+    main_task = loop.create_task(main())
     try:
-        # asyncio.run(main())
-        asyncio.get_event_loop().run_until_complete(main())
+        loop.run_until_complete(main_task)
     except KeyboardInterrupt:
+        # 取消爬虫任务，main 中的 finally 会把队列中的数据写完再退出
+        main_task.cancel()
+        try:
+            loop.run_until_complete(main_task)
+        except (asyncio.CancelledError, KeyboardInterrupt):
+            pass
         sys.exit()
@@ -4,21 +4,29 @@
 # @Desc    : bilibili 请求客户端
 import asyncio
 import json
+import time
+from functools import partial
 from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext, Page
 
+import config
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.media_downloader import media_downloader
+from tools.media_store import media_store
+from tools.single_flight import single_flight
 
-from .exception import DataFetchError
+from .exception import DataFetchError, IPBlockError
 from .field import CommentOrderType, SearchOrderType
 from .help import BilibiliSign
 
 
 class BilibiliClient(AbstractApiClient):
+    platform = "bili"
+    ip_block_errors = (IPBlockError,)
+
     def __init__(
             self,
             timeout=10,
@@ -32,20 +40,32 @@ class BilibiliClient(AbstractApiClient):
         self.timeout = timeout
         self.headers = headers
         self._host = "https://api.bilibili.com"
+        # 请求被风控拦截时返回的错误码
+        self.IP_BLOCK_CODE = -412
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
+        # wbi 签名对象缓存，key 过期之后在后台刷新
+        self._wbi_sign: Optional[BilibiliSign] = None
+        self._wbi_sign_expire_at = 0.0
+        self._wbi_refresh_task: Optional[asyncio.Task] = None
 
     async def request(self, method, url, **kwargs) -> Any:
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
+        await self.acquire_rate_limit(url)
+        # 请求结果和耗时反馈给自适应并发控制器
+        async with self.track_request() as client:
             response = await client.request(
                 method, url, timeout=self.timeout,
                 **kwargs
             )
-        data: Dict = response.json()
-        if data.get("code") != 0:
-            raise DataFetchError(data.get("message", "unkonw error"))
-        else:
-            return data.get("data", {})
+            if response.status_code == 412:
+                raise IPBlockError(f"request {url} blocked by risk control, status code: 412")
+            data: Dict = response.json()
+            if data.get("code") == self.IP_BLOCK_CODE:
+                raise IPBlockError(data.get("message", "request blocked by risk control"))
+            if data.get("code") != 0:
+                raise DataFetchError(data.get("message", "unkonw error"))
+            else:
+                return data.get("data", {})
 
     async def pre_request_data(self, req_data: Dict) -> Dict:
         """
@@ -57,8 +77,37 @@ class BilibiliClient(AbstractApiClient):
         """
         if not req_data:
             return {}
-        img_key, sub_key = await self.get_wbi_keys()
-        return BilibiliSign(img_key, sub_key).sign(req_data)
+        wbi_sign = await self.get_wbi_sign()
+        return wbi_sign.sign(req_data)
+
+    async def get_wbi_sign(self) -> BilibiliSign:
+        """
+        获取缓存的签名对象，第一次调用时同步获取 wbi key，之后过期了在后台刷新，不阻塞当前请求
+        :return:
+        """
+        if self._wbi_sign is None:
+            await self.refresh_wbi_sign()
+        elif time.monotonic() >= self._wbi_sign_expire_at and \
+                (self._wbi_refresh_task is None or self._wbi_refresh_task.done()):
+            self._wbi_refresh_task = asyncio.create_task(self.refresh_wbi_sign())
+        return self._wbi_sign
+
+    async def refresh_wbi_sign(self):
+        """
+        重新获取 img_key 和 sub_key，key 没有变化时继续复用原来的签名对象
+        :return:
+        """
+        try:
+            img_key, sub_key = await self.get_wbi_keys()
+        except Exception as e:
+            if self._wbi_sign is None:
+                raise
+            utils.logger.error(f"[BilibiliClient.refresh_wbi_sign] refresh wbi keys failed, use the old keys, err: {e}")
+            return
+        wbi_sign = self._wbi_sign
+        if wbi_sign is None or (wbi_sign.img_key, wbi_sign.sub_key) != (img_key, sub_key):
+            self._wbi_sign = BilibiliSign(img_key, sub_key)
+        self._wbi_sign_expire_at = time.monotonic() + config.BILI_WBI_KEYS_TTL
 
     async def get_wbi_keys(self) -> Tuple[str, str]:
         """
@@ -114,6 +163,8 @@ class BilibiliClient(AbstractApiClient):
         cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         self.headers["Cookie"] = cookie_str
         self.cookie_dict = cookie_dict
+        # 登录之后页面中的 wbi key 可能更新，下次签名时在后台刷新
+        self._wbi_sign_expire_at = 0.0
 
     async def search_video_by_keyword(self, keyword: str, page: int = 1, page_size: int = 20,
                                       order: SearchOrderType = SearchOrderType.DEFAULT):
@@ -151,7 +202,10 @@ class BilibiliClient(AbstractApiClient):
             params.update({"aid": aid})
         else:
             params.update({"bvid": bvid})
-        return await self.get(uri, params, enable_params_sign=False)
+        # 同一个视频并发或者短时间内重复请求时只发一次请求
+        return await single_flight.do(
+            (self.platform, "video_detail", aid or bvid), self.get, uri, params, enable_params_sign=False
+        )
 
     async def get_video_play_url(self, aid: int, cid: int) -> Dict:
         """
@@ -175,13 +229,25 @@ class BilibiliClient(AbstractApiClient):
         return await self.get(uri, params, enable_params_sign=True)
 
     async def get_video_media(self, url: str) -> Union[bytes, None]:
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request("GET", url, timeout=self.timeout, headers=self.headers)
-            if not response.reason_phrase == "OK":
-                utils.logger.error(f"[BilibiliClient.get_video_media] request {url} err, res:{response.text}")
-                return None
-            else:
-                return response.content
+        client = self.get_http_client(self.proxies)
+        response = await client.request("GET", url, timeout=self.timeout, headers=self.headers)
+        if not response.reason_phrase == "OK":
+            utils.logger.error(f"[BilibiliClient.get_video_media] request {url} err, res:{response.text}")
+            return None
+        else:
+            return response.content
+
+    async def download_video_media(self, url: str, file_name: str) -> bool:
+        """
+        流式下载视频到本地文件，视频可能有几百 MB，不把整个文件读到内存中
+        :param url: 视频地址
+        :param file_name: 保存路径
+        :return: 是否下载成功
+        """
+        client = self.get_http_client(self.proxies)
+        return await media_store.fetch(
+            url, file_name,
+            partial(media_downloader.download, client, url, headers=self.headers, timeout=self.timeout))
 
     async def get_video_comments(self,
                                  video_id: str,
@@ -204,7 +270,7 @@ class BilibiliClient(AbstractApiClient):
         }
         return await self.get(uri, post_data)
 
-    async def get_video_all_comments(self, video_id: str, crawl_interval: float = 1.0, is_fetch_sub_comments=False,
+    async def get_video_all_comments(self, video_id: str, crawl_interval: float = 0, is_fetch_sub_comments=False,
                                      callback: Optional[Callable] = None, ):
         """
         get video all comments include sub comments
@@ -245,7 +311,7 @@ class BilibiliClient(AbstractApiClient):
                                                level_one_comment_id: int,
                                                order_mode: CommentOrderType,
                                                ps: int = 10,
-                                               crawl_interval: float = 1.0,
+                                               crawl_interval: float = 0,
                                                callback: Optional[Callable] = None,
                                                ) -> Dict:
         """
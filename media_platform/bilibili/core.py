@@ -5,7 +5,6 @@
 
 import asyncio
 import os
-import random
 from asyncio import Task
 from typing import Dict, List, Optional, Tuple, Union
 
@@ -17,6 +16,7 @@ from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import bilibili as bilibili_store
 from tools import utils
+from tools.concurrency_limiter import AdaptiveConcurrencyLimiter
 from var import crawler_type_var, source_keyword_var
 
 from .client import BilibiliClient
@@ -36,6 +36,7 @@ class BilibiliCrawler(AbstractCrawler):
 
     async def start(self):
         playwright_proxy_format, httpx_proxy_format = None, None
+        ip_proxy_pool, ip_proxy_info = None, None
         if config.ENABLE_IP_PROXY:
             ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
             ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
@@ -58,6 +59,9 @@ class BilibiliCrawler(AbstractCrawler):
 
             # Create a client to interact with the xiaohongshu website.
             self.bili_client = await self.create_bilibili_client(httpx_proxy_format)
+            if ip_proxy_pool is not None:
+                # API 请求从代理池中轮换代理IP，浏览器继续使用初始的代理IP
+                self.bili_client.set_proxy_pool(ip_proxy_pool, ip_proxy_info)
             if not await self.bili_client.pong():
                 login_obj = BilibiliLogin(
                     login_type=config.LOGIN_TYPE,
@@ -117,7 +121,7 @@ class BilibiliCrawler(AbstractCrawler):
                 )
                 video_list: List[Dict] = videos_res.get("result")
 
-                semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+                semaphore = self.bili_client.concurrency_limiter
                 task_list = [
                     self.get_video_info_task(aid=video_item.get(
                         "aid"), bvid="", semaphore=semaphore)
@@ -146,7 +150,7 @@ class BilibiliCrawler(AbstractCrawler):
 
         utils.logger.info(
             f"[BilibiliCrawler.batch_get_video_comments] video ids:{video_id_list}")
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.bili_client.concurrency_limiter
         task_list: List[Task] = []
         for video_id in video_id_list:
             task = asyncio.create_task(self.get_comments(
@@ -154,7 +158,7 @@ class BilibiliCrawler(AbstractCrawler):
             task_list.append(task)
         await asyncio.gather(*task_list)
 
-    async def get_comments(self, video_id: str, semaphore: asyncio.Semaphore):
+    async def get_comments(self, video_id: str, semaphore: AdaptiveConcurrencyLimiter):
         """
         get comment for video id
         :param video_id:
@@ -167,7 +171,6 @@ class BilibiliCrawler(AbstractCrawler):
                     f"[BilibiliCrawler.get_comments] begin get video_id: {video_id} comments ...")
                 await self.bili_client.get_video_all_comments(
                     video_id=video_id,
-                    crawl_interval=random.random(),
                     is_fetch_sub_comments=config.ENABLE_GET_SUB_COMMENTS,
                     callback=bilibili_store.batch_update_bilibili_video_comments
                 )
@@ -193,7 +196,6 @@ class BilibiliCrawler(AbstractCrawler):
                 video_bvids_list.append(video["bvid"])
             if (int(result["page"]["count"]) <= pn * ps):
                 break
-            await asyncio.sleep(random.random())
             pn += 1
         await self.get_specified_videos(video_bvids_list)
 
@@ -202,7 +204,7 @@ class BilibiliCrawler(AbstractCrawler):
         get specified videos info
         :return:
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.bili_client.concurrency_limiter
         task_list = [
             self.get_video_info_task(aid=0, bvid=video_id, semaphore=semaphore) for video_id in
             bvids_list
@@ -219,7 +221,7 @@ class BilibiliCrawler(AbstractCrawler):
                 await self.get_bilibili_video(video_detail, semaphore)
         await self.batch_get_video_comments(video_aids_list)
 
-    async def get_video_info_task(self, aid: int, bvid: str, semaphore: asyncio.Semaphore) -> Optional[Dict]:
+    async def get_video_info_task(self, aid: int, bvid: str, semaphore: AdaptiveConcurrencyLimiter) -> Optional[Dict]:
         """
         Get video detail task
         :param aid:
@@ -240,7 +242,7 @@ class BilibiliCrawler(AbstractCrawler):
                     f"[BilibiliCrawler.get_video_info_task] have not fund note detail video_id:{bvid}, err: {ex}")
                 return None
 
-    async def get_video_play_url_task(self, aid: int, cid: int, semaphore: asyncio.Semaphore) -> Union[Dict, None]:
+    async def get_video_play_url_task(self, aid: int, cid: int, semaphore: AdaptiveConcurrencyLimiter) -> Union[Dict, None]:
         """
                 Get video play url
                 :param aid:
@@ -282,6 +284,7 @@ class BilibiliCrawler(AbstractCrawler):
             playwright_page=self.context_page,
             cookie_dict=cookie_dict,
         )
+        await bilibili_client_obj.warm_up(httpx_proxy)
         return bilibili_client_obj
 
     @staticmethod
@@ -341,7 +344,13 @@ class BilibiliCrawler(AbstractCrawler):
             )
             return browser_context
 
-    async def get_bilibili_video(self, video_item: Dict, semaphore: asyncio.Semaphore):
+    async def close(self):
+        """Close browser context"""
+        await self.bili_client.close()
+        await self.browser_context.close()
+        utils.logger.info("[BilibiliCrawler.close] Browser context closed ...")
+
+    async def get_bilibili_video(self, video_item: Dict, semaphore: AdaptiveConcurrencyLimiter):
         """
         download bilibili video
         :param video_item:
@@ -370,9 +379,6 @@ class BilibiliCrawler(AbstractCrawler):
             utils.logger.info("[BilibiliCrawler.get_bilibili_video] get video url failed")
             return
 
-        content = await self.bili_client.get_video_media(video_url)
-        if content is None:
-            return
-        extension_file_name = f"video.mp4"
-        await bilibili_store.store_video(aid, content, extension_file_name)
+        # 流式写入文件，视频再大内存占用也不会增加
+        await self.bili_client.download_video_media(video_url, bilibili_store.get_video_file_name(aid, "video.mp4"))
 
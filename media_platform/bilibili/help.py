@@ -4,53 +4,66 @@
 # @Desc    : bilibili 请求参数签名
 # 逆向实现参考：https://socialsisteryi.github.io/bilibili-API-collect/docs/misc/sign/wbi.html#wbi%E7%AD%BE%E5%90%8D%E7%AE%97%E6%B3%95
 import urllib.parse
+from functools import lru_cache
 from hashlib import md5
-from typing import Dict
+from typing import Dict, Optional
 
 from tools import utils
 
+MIXIN_KEY_ENC_TAB = (
+    46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5, 49,
+    33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13, 37, 48, 7, 16, 24, 55, 40,
+    61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
+    36, 20, 34, 44, 52
+)
+
+# 需要从 value 中过滤掉的字符 "!'()*"
+VALUE_FILTER_TABLE = str.maketrans("", "", "!'()*")
+
+
+@lru_cache(maxsize=16)
+def get_mixin_key(img_key: str, sub_key: str) -> str:
+    """
+    根据 img_key 和 sub_key 计算加盐的 key，同一对 key 只计算一次
+    :param img_key:
+    :param sub_key:
+    :return:
+    """
+    mixin_key = img_key + sub_key
+    return "".join(mixin_key[mt] for mt in MIXIN_KEY_ENC_TAB)[:32]
+
 
 class BilibiliSign:
     def __init__(self, img_key: str, sub_key: str):
         self.img_key = img_key
         self.sub_key = sub_key
-        self.map_table = [
-            46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5, 49,
-            33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13, 37, 48, 7, 16, 24, 55, 40,
-            61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
-            36, 20, 34, 44, 52
-        ]
+        self.map_table = list(MIXIN_KEY_ENC_TAB)
+        self.salt = get_mixin_key(img_key, sub_key)
 
     def get_salt(self) -> str:
         """
         获取加盐的 key
         :return:
         """
-        salt = ""
-        mixin_key = self.img_key + self.sub_key
-        for mt in self.map_table:
-            salt += mixin_key[mt]
-        return salt[:32]
+        return self.salt
 
-    def sign(self, req_data: Dict) -> Dict:
+    def sign(self, req_data: Dict, wts: Optional[int] = None) -> Dict:
         """
         请求参数中加上当前时间戳对请求参数中的key进行字典序排序
         再将请求参数进行 url 编码集合 salt 进行 md5 就可以生成w_rid参数了
         :param req_data:
+        :param wts: 签名时间戳，默认使用当前时间
         :return:
         """
-        current_ts = utils.get_unix_timestamp()
-        req_data.update({"wts": current_ts})
-        req_data = dict(sorted(req_data.items()))
+        req_data.update({"wts": utils.get_unix_timestamp() if wts is None else wts})
         req_data = {
             # 过滤 value 中的 "!'()*" 字符
-            k: ''.join(filter(lambda ch: ch not in "!'()*", str(v)))
+            k: str(v).translate(VALUE_FILTER_TABLE)
             for k, v
-            in req_data.items()
+            in sorted(req_data.items())
         }
         query = urllib.parse.urlencode(req_data)
-        salt = self.get_salt()
-        wbi_sign = md5((query + salt).encode()).hexdigest()  # 计算 w_rid
+        wbi_sign = md5((query + self.salt).encode()).hexdigest()  # 计算 w_rid
         req_data['w_rid'] = wbi_sign
         return req_data
 
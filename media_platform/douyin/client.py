@@ -4,11 +4,11 @@ import json
 import urllib.parse
 from typing import Any, Callable, Dict, Optional
 
-import requests
 from playwright.async_api import BrowserContext
 
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.signer import AbstractSigner, PlaywrightSigner
 from var import request_keyword_var
 
 from .exception import *
@@ -17,6 +17,9 @@ from .help import *
 
 
 class DOUYINClient(AbstractApiClient):
+    platform = "dy"
+    ip_block_errors = (IPBlockError,)
+
     def __init__(
             self,
             timeout=30,
@@ -24,13 +27,16 @@ class DOUYINClient(AbstractApiClient):
             *,
             headers: Dict,
             playwright_page: Optional[Page],
-            cookie_dict: Dict
+            cookie_dict: Dict,
+            signer: Optional[AbstractSigner] = None,
     ):
         self.proxies = proxies
         self.timeout = timeout
         self.headers = headers
         self._host = "https://www.douyin.com"
         self.playwright_page = playwright_page
+        # a_bogus 签名 JS 的执行后端，没有指定的时候直接在 playwright_page 中执行
+        self.signer: AbstractSigner = signer or PlaywrightSigner(playwright_page)
         self.cookie_dict = cookie_dict
 
     async def __process_req_params(
@@ -41,7 +47,7 @@ class DOUYINClient(AbstractApiClient):
         if not params:
             return
         headers = headers or self.headers
-        local_storage: Dict = await self.playwright_page.evaluate("() => window.localStorage")  # type: ignore
+        ms_token: str = await self.signer.evaluate("() => window.localStorage.getItem('xmst')")  # type: ignore
         common_params = {
             "device_platform": "webapp",
             "aid": "6383",
@@ -68,7 +74,7 @@ class DOUYINClient(AbstractApiClient):
             'effective_type': '4g',
             "round_trip_time": "50",
             "webid": get_web_id(),
-            "msToken": local_storage.get("xmst"),
+            "msToken": ms_token,
         }
         params.update(common_params)
         query_string = urllib.parse.urlencode(params)
@@ -77,22 +83,23 @@ class DOUYINClient(AbstractApiClient):
         post_data = {}
         if request_method == "POST":
             post_data = params
-        a_bogus = await get_a_bogus(query_string, post_data, headers["User-Agent"], self.playwright_page)
+        a_bogus = await get_a_bogus(query_string, post_data, headers["User-Agent"], self.signer)
         params["a_bogus"] = a_bogus
 
     async def request(self, method, url, **kwargs):
-        response = None
-        if method == "GET":
-            response = requests.request(method, url, **kwargs)
-        elif method == "POST":
-            response = requests.request(method, url, **kwargs)
-        try:
-            if response.text == "" or response.text == "blocked":
-                utils.logger.error(f"request params incrr, response.text: {response.text}")
-                raise Exception("account blocked")
-            return response.json()
-        except Exception as e:
-            raise DataFetchError(f"{e}, {response.text}")
+        await self.acquire_rate_limit(url)
+        # 请求结果和耗时反馈给自适应并发控制器
+        async with self.track_request() as client:
+            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+            if response.text == "blocked":
+                raise IPBlockError(f"request {url} blocked, response.text: {response.text}")
+            try:
+                if response.text == "":
+                    utils.logger.error(f"request params incrr, response.text: {response.text}")
+                    raise Exception("account blocked")
+                return response.json()
+            except Exception as e:
+                raise DataFetchError(f"{e}, {response.text}")
 
     async def get(self, uri: str, params: Optional[Dict] = None, headers: Optional[Dict] = None):
         """
@@ -216,7 +223,7 @@ class DOUYINClient(AbstractApiClient):
     async def get_aweme_all_comments(
             self,
             aweme_id: str,
-            crawl_interval: float = 1.0,
+            crawl_interval: float = 0,
             is_fetch_sub_comments=False,
             callback: Optional[Callable] = None,
     ):
@@ -1,6 +1,5 @@
 import asyncio
 import os
-import random
 from asyncio import Task
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -12,6 +11,9 @@ from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import douyin as douyin_store
 from tools import utils
+from tools.concurrency_limiter import AdaptiveConcurrencyLimiter
+from tools.page_pool import PlaywrightPagePool
+from tools.signer import AbstractSigner, create_signer
 from var import crawler_type_var, source_keyword_var
 
 from .client import DOUYINClient
@@ -24,12 +26,14 @@ class DouYinCrawler(AbstractCrawler):
     context_page: Page
     dy_client: DOUYINClient
     browser_context: BrowserContext
+    signer: AbstractSigner
 
     def __init__(self) -> None:
         self.index_url = "https://www.douyin.com"
 
     async def start(self) -> None:
         playwright_proxy_format, httpx_proxy_format = None, None
+        ip_proxy_pool, ip_proxy_info = None, None
         if config.ENABLE_IP_PROXY:
             ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
             ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
@@ -50,6 +54,9 @@ class DouYinCrawler(AbstractCrawler):
             await self.context_page.goto(self.index_url)
 
             self.dy_client = await self.create_douyin_client(httpx_proxy_format)
+            if ip_proxy_pool is not None:
+                # API 请求从代理池中轮换代理IP，浏览器继续使用初始的代理IP
+                self.dy_client.set_proxy_pool(ip_proxy_pool, ip_proxy_info)
             if not await self.dy_client.pong(browser_context=self.browser_context):
                 login_obj = DouYinLogin(
                     login_type=config.LOGIN_TYPE,
@@ -60,6 +67,10 @@ class DouYinCrawler(AbstractCrawler):
                 )
                 await login_obj.begin()
                 await self.dy_client.update_cookies(browser_context=self.browser_context)
+
+            # 登录之后再准备签名环境（打开其他签名页面或者同步浏览器环境到内嵌引擎）
+            await self.signer.start()
+
             crawler_type_var.set(config.CRAWLER_TYPE)
             if config.CRAWLER_TYPE == "search":
                 # Search for notes and retrieve their comment information.
@@ -71,6 +82,7 @@ class DouYinCrawler(AbstractCrawler):
                 # Get the information and comments of the specified creator
                 await self.get_creators_and_videos()
 
+            await self.signer.close()
             utils.logger.info("[DouYinCrawler.start] Douyin Crawler finished ...")
 
     async def search(self) -> None:
@@ -120,7 +132,7 @@ class DouYinCrawler(AbstractCrawler):
 
     async def get_specified_awemes(self):
         """Get the information and comments of the specified post"""
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.dy_client.concurrency_limiter
         task_list = [
             self.get_aweme_detail(aweme_id=aweme_id, semaphore=semaphore) for aweme_id in config.DY_SPECIFIED_ID_LIST
         ]
@@ -130,7 +142,7 @@ class DouYinCrawler(AbstractCrawler):
                 await douyin_store.update_douyin_aweme(aweme_detail)
         await self.batch_get_note_comments(config.DY_SPECIFIED_ID_LIST)
 
-    async def get_aweme_detail(self, aweme_id: str, semaphore: asyncio.Semaphore) -> Any:
+    async def get_aweme_detail(self, aweme_id: str, semaphore: AdaptiveConcurrencyLimiter) -> Any:
         """Get note detail"""
         async with semaphore:
             try:
@@ -152,7 +164,7 @@ class DouYinCrawler(AbstractCrawler):
             return
 
         task_list: List[Task] = []
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.dy_client.concurrency_limiter
         for aweme_id in aweme_list:
             task = asyncio.create_task(
                 self.get_comments(aweme_id, semaphore), name=aweme_id)
@@ -160,13 +172,12 @@ class DouYinCrawler(AbstractCrawler):
         if len(task_list) > 0:
             await asyncio.wait(task_list)
 
-    async def get_comments(self, aweme_id: str, semaphore: asyncio.Semaphore) -> None:
+    async def get_comments(self, aweme_id: str, semaphore: AdaptiveConcurrencyLimiter) -> None:
         async with semaphore:
             try:
                 # 将关键词列表传递给 get_aweme_all_comments 方法
                 await self.dy_client.get_aweme_all_comments(
                     aweme_id=aweme_id,
-                    crawl_interval=random.random(),
                     is_fetch_sub_comments=config.ENABLE_GET_SUB_COMMENTS,
                     callback=douyin_store.batch_update_dy_aweme_comments
                 )
@@ -198,7 +209,7 @@ class DouYinCrawler(AbstractCrawler):
         """
         Concurrently obtain the specified post list and save the data
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.dy_client.concurrency_limiter
         task_list = [
             self.get_aweme_detail(post_item.get("aweme_id"), semaphore) for post_item in video_list
         ]
@@ -224,6 +235,16 @@ class DouYinCrawler(AbstractCrawler):
     async def create_douyin_client(self, httpx_proxy: Optional[str]) -> DOUYINClient:
         """Create douyin client"""
         cookie_str, cookie_dict = utils.convert_cookies(await self.browser_context.cookies())  # type: ignore
+        sign_page_pool = PlaywrightPagePool(
+            browser_context=self.browser_context,
+            url=self.index_url,
+            main_page=self.context_page,
+            ready_js="() => !!(window.bdms && window.bdms.init)",
+            size=config.SIGN_PAGE_POOL_SIZE,
+            max_uses=config.SIGN_PAGE_MAX_USES,
+            health_check_interval=config.SIGN_PAGE_HEALTH_CHECK_INTERVAL,
+        )
+        self.signer = create_signer(config.SIGN_BACKEND, sign_page_pool, config.DY_SIGN_SCRIPT_PATH)
         douyin_client = DOUYINClient(
             proxies=httpx_proxy,
             headers={
@@ -236,7 +257,9 @@ class DouYinCrawler(AbstractCrawler):
             },
             playwright_page=self.context_page,
             cookie_dict=cookie_dict,
+            signer=self.signer,
         )
+        await douyin_client.warm_up(httpx_proxy)
         return douyin_client
 
     async def launch_browser(
@@ -269,5 +292,7 @@ class DouYinCrawler(AbstractCrawler):
 
     async def close(self) -> None:
         """Close browser context"""
+        await self.dy_client.close()
+        await self.signer.close()
         await self.browser_context.close()
         utils.logger.info("[DouYinCrawler.close] Browser context closed ...")
@@ -5,9 +5,12 @@
 # @Desc    : 获取 a_bogus 参数, 学习交流使用，请勿用作商业用途，侵权联系作者删除
 
 import random
+from typing import Union
 
 from playwright.async_api import Page
 
+from tools.signer import AbstractSigner
+
 
 def get_web_id():
     """
@@ -30,14 +33,15 @@ def get_web_id():
     return web_id.replace('-', '')[:19]
 
 
-async def get_a_bogus(params: str, post_data: dict, user_agent: str, page: Page = None):
+async def get_a_bogus(params: str, post_data: dict, user_agent: str, page: Union[Page, AbstractSigner] = None):
     """
     获取 a_bogus 参数
     """
     return await get_a_bogus_from_playright(params, post_data, user_agent, page)
 
 
-async def get_a_bogus_from_playright(params: str, post_data: dict, user_agent: str, page: Page):
+async def get_a_bogus_from_playright(params: str, post_data: dict, user_agent: str,
+                                     page: Union[Page, AbstractSigner]):
     """
     通过playright获取 a_bogus 参数
     Returns:
@@ -135,13 +135,13 @@ class DouYinLogin(AbstractLogin):
             utils.logger.info(f"[DouYinLogin.login_by_mobile] get douyin sms code from redis remaining time {max_get_sms_code_time}s ...")
             await asyncio.sleep(1)
             sms_code_key = f"dy_{self.login_phone}"
-            sms_code_value = cache_client.get(sms_code_key)
+            sms_code_value = await cache_client.async_get(sms_code_key)
             if not sms_code_value:
                 max_get_sms_code_time -= 1
                 continue
 
             sms_code_input_ele = self.context_page.locator("xpath=//input[@placeholder='请输入验证码']")
-            await sms_code_input_ele.fill(value=sms_code_value.decode())
+            await sms_code_input_ele.fill(value=sms_code_value)
             await asyncio.sleep(0.5)
             submit_btn_ele = self.context_page.locator("xpath=//button[@class='web-login-button']")
             await submit_btn_ele.click()  # 点击登录
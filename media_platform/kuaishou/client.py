@@ -4,18 +4,20 @@ import json
 from typing import Any, Callable, Dict, List, Optional
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext, Page
 
 import config
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.single_flight import single_flight
 
 from .exception import DataFetchError
 from .graphql import KuaiShouGraphQL
 
 
 class KuaiShouClient(AbstractApiClient):
+    platform = "ks"
+
     def __init__(
             self,
             timeout=10,
@@ -34,16 +36,18 @@ class KuaiShouClient(AbstractApiClient):
         self.graphql = KuaiShouGraphQL()
 
     async def request(self, method, url, **kwargs) -> Any:
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
+        await self.acquire_rate_limit(url)
+        # 请求结果和耗时反馈给自适应并发控制器
+        async with self.track_request() as client:
             response = await client.request(
                 method, url, timeout=self.timeout,
                 **kwargs
             )
-        data: Dict = response.json()
-        if data.get("errors"):
-            raise DataFetchError(data.get("errors", "unkonw error"))
-        else:
-            return data.get("data", {})
+            data: Dict = response.json()
+            if data.get("errors"):
+                raise DataFetchError(data.get("errors", "unkonw error"))
+            else:
+                return data.get("data", {})
 
     async def get(self, uri: str, params=None) -> Dict:
         final_uri = uri
@@ -114,7 +118,8 @@ class KuaiShouClient(AbstractApiClient):
             },
             "query": self.graphql.get("video_detail")
         }
-        return await self.post("", post_data)
+        # 同一个视频并发或者短时间内重复请求时只发一次请求
+        return await single_flight.do((self.platform, "video_detail", photo_id), self.post, "", post_data)
 
     async def get_video_comments(self, photo_id: str, pcursor: str = "") -> Dict:
         """get video comments
@@ -176,7 +181,7 @@ class KuaiShouClient(AbstractApiClient):
     async def get_video_all_comments(
         self,
         photo_id: str,
-        crawl_interval: float = 1.0,
+        crawl_interval: float = 0,
         callback: Optional[Callable] = None,
     ):
         """
@@ -211,7 +216,7 @@ class KuaiShouClient(AbstractApiClient):
         self,
         comments: List[Dict],
         photo_id,
-        crawl_interval: float = 1.0,
+        crawl_interval: float = 0,
         callback: Optional[Callable] = None,
     ) -> List[Dict]:
         """
@@ -269,7 +274,7 @@ class KuaiShouClient(AbstractApiClient):
     async def get_all_videos_by_creator(
         self,
         user_id: str,
-        crawl_interval: float = 1.0,
+        crawl_interval: float = 0,
         callback: Optional[Callable] = None,
     ) -> List[Dict]:
         """
@@ -1,6 +1,5 @@
 import asyncio
 import os
-import random
 import time
 from asyncio import Task
 from typing import Dict, List, Optional, Tuple
@@ -13,6 +12,7 @@ from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import kuaishou as kuaishou_store
 from tools import utils
+from tools.concurrency_limiter import AdaptiveConcurrencyLimiter
 from var import comment_tasks_var, crawler_type_var, source_keyword_var
 
 from .client import KuaiShouClient
@@ -31,6 +31,7 @@ class KuaishouCrawler(AbstractCrawler):
 
     async def start(self):
         playwright_proxy_format, httpx_proxy_format = None, None
+        ip_proxy_pool, ip_proxy_info = None, None
         if config.ENABLE_IP_PROXY:
             ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
             ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
@@ -52,6 +53,9 @@ class KuaishouCrawler(AbstractCrawler):
 
             # Create a client to interact with the kuaishou website.
             self.ks_client = await self.create_ks_client(httpx_proxy_format)
+            if ip_proxy_pool is not None:
+                # API 请求从代理池中轮换代理IP，浏览器继续使用初始的代理IP
+                self.ks_client.set_proxy_pool(ip_proxy_pool, ip_proxy_info)
             if not await self.ks_client.pong():
                 login_obj = KuaishouLogin(
                     login_type=config.LOGIN_TYPE,
@@ -118,7 +122,7 @@ class KuaishouCrawler(AbstractCrawler):
 
     async def get_specified_videos(self):
         """Get the information and comments of the specified post"""
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.ks_client.concurrency_limiter
         task_list = [
             self.get_video_info_task(video_id=video_id, semaphore=semaphore) for video_id in config.KS_SPECIFIED_ID_LIST
         ]
@@ -128,7 +132,7 @@ class KuaishouCrawler(AbstractCrawler):
                 await kuaishou_store.update_kuaishou_video(video_detail)
         await self.batch_get_video_comments(config.KS_SPECIFIED_ID_LIST)
 
-    async def get_video_info_task(self, video_id: str, semaphore: asyncio.Semaphore) -> Optional[Dict]:
+    async def get_video_info_task(self, video_id: str, semaphore: AdaptiveConcurrencyLimiter) -> Optional[Dict]:
         """Get video detail task"""
         async with semaphore:
             try:
@@ -153,7 +157,7 @@ class KuaishouCrawler(AbstractCrawler):
             return
 
         utils.logger.info(f"[KuaishouCrawler.batch_get_video_comments] video ids:{video_id_list}")
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.ks_client.concurrency_limiter
         task_list: List[Task] = []
         for video_id in video_id_list:
             task = asyncio.create_task(self.get_comments(video_id, semaphore), name=video_id)
@@ -162,7 +166,7 @@ class KuaishouCrawler(AbstractCrawler):
         comment_tasks_var.set(task_list)
         await asyncio.gather(*task_list)
 
-    async def get_comments(self, video_id: str, semaphore: asyncio.Semaphore):
+    async def get_comments(self, video_id: str, semaphore: AdaptiveConcurrencyLimiter):
         """
         get comment for video id
         :param video_id:
@@ -174,7 +178,6 @@ class KuaishouCrawler(AbstractCrawler):
                 utils.logger.info(f"[KuaishouCrawler.get_comments] begin get video_id: {video_id} comments ...")
                 await self.ks_client.get_video_all_comments(
                     photo_id=video_id,
-                    crawl_interval=random.random(),
                     callback=kuaishou_store.batch_update_ks_video_comments
                 )
             except DataFetchError as ex:
@@ -219,6 +222,7 @@ class KuaishouCrawler(AbstractCrawler):
             playwright_page=self.context_page,
             cookie_dict=cookie_dict,
         )
+        await ks_client_obj.warm_up(httpx_proxy)
         return ks_client_obj
 
     async def launch_browser(
@@ -262,7 +266,6 @@ class KuaishouCrawler(AbstractCrawler):
             # Get all video information of the creator
             all_video_list = await self.ks_client.get_all_videos_by_creator(
                 user_id = user_id,
-                crawl_interval = random.random(),
                 callback = self.fetch_creator_video_detail
             )
 
@@ -273,7 +276,7 @@ class KuaishouCrawler(AbstractCrawler):
         """
         Concurrently obtain the specified post list and save the data
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.ks_client.concurrency_limiter
         task_list = [
             self.get_video_info_task(post_item.get("photo", {}).get("id"), semaphore) for post_item in video_list
         ]
@@ -285,5 +288,6 @@ class KuaishouCrawler(AbstractCrawler):
 
     async def close(self):
         """Close browser context"""
+        await self.ks_client.close()
         await self.browser_context.close()
         utils.logger.info("[KuaishouCrawler.close] Browser context closed ...")
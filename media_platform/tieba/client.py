@@ -3,14 +3,14 @@ import json
 from typing import Any, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext
-from tenacity import RetryError, retry, stop_after_attempt, wait_fixed
+from tenacity import (RetryError, retry, retry_if_not_exception_type,
+                      stop_after_attempt, wait_fixed)
 
 import config
 from base.base_crawler import AbstractApiClient
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
-from proxy.proxy_ip_pool import ProxyIpPool
+from proxy.proxy_ip_pool import NoAvailableProxyError
 from tools import utils
 
 from .field import SearchNoteType, SearchSortType
@@ -18,13 +18,14 @@ from .help import TieBaExtractor
 
 
 class BaiduTieBaClient(AbstractApiClient):
+    platform = "tieba"
+
     def __init__(
             self,
             timeout=10,
-            ip_pool=None,
-            default_ip_proxy=None,
+            proxies=None,
     ):
-        self.ip_pool: Optional[ProxyIpPool] = ip_pool
+        self.proxies = proxies
         self.timeout = timeout
         self.headers = {
             "User-Agent": utils.get_user_agent(),
@@ -32,42 +33,42 @@ class BaiduTieBaClient(AbstractApiClient):
         }
         self._host = "https://tieba.baidu.com"
         self._page_extractor = TieBaExtractor()
-        self.default_ip_proxy = default_ip_proxy
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
-    async def request(self, method, url, return_ori_content=False, proxies=None, **kwargs) -> Union[str, Any]:
+    # 代理池中没有可用的代理IP时重试也没有用，直接抛出
+    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1), retry=retry_if_not_exception_type(NoAvailableProxyError))
+    async def request(self, method, url, return_ori_content=False, **kwargs) -> Union[str, Any]:
         """
         封装httpx的公共请求方法，对请求响应做一些处理
         Args:
             method: 请求方法
             url: 请求的URL
             return_ori_content: 是否返回原始内容
-            proxies: 代理IP
             **kwargs: 其他请求参数，例如请求头、请求体等
 
         Returns:
 
         """
-        actual_proxies = proxies if proxies else self.default_ip_proxy
-        async with httpx.AsyncClient(proxies=actual_proxies) as client:
+        await self.acquire_rate_limit(url)
+        # 请求结果和耗时反馈给自适应并发控制器
+        async with self.track_request() as client:
             response = await client.request(
                 method, url, timeout=self.timeout,
                 headers=self.headers, **kwargs
             )
 
-        if response.status_code != 200:
-            utils.logger.error(f"Request failed, method: {method}, url: {url}, status code: {response.status_code}")
-            utils.logger.error(f"Request failed, response: {response.text}")
-            raise Exception(f"Request failed, method: {method}, url: {url}, status code: {response.status_code}")
+            if response.status_code != 200:
+                utils.logger.error(f"Request failed, method: {method}, url: {url}, status code: {response.status_code}")
+                utils.logger.error(f"Request failed, response: {response.text}")
+                raise Exception(f"Request failed, method: {method}, url: {url}, status code: {response.status_code}")
 
-        if response.text == "" or response.text == "blocked":
-            utils.logger.error(f"request params incrr, response.text: {response.text}")
-            raise Exception("account blocked")
+            if response.text == "" or response.text == "blocked":
+                utils.logger.error(f"request params incrr, response.text: {response.text}")
+                raise Exception("account blocked")
 
-        if return_ori_content:
-            return response.text
+            if return_ori_content:
+                return response.text
 
-        return response.json()
+            return response.json()
 
     async def get(self, uri: str, params=None, return_ori_content=False, **kwargs) -> Any:
         """
@@ -90,15 +91,14 @@ class BaiduTieBaClient(AbstractApiClient):
                                      **kwargs)
             return res
         except RetryError as e:
-            if self.ip_pool:
-                proxie_model = await self.ip_pool.get_proxy()
-                _, proxies = utils.format_proxy_info(proxie_model)
-                res = await self.request(method="GET", url=f"{self._host}{final_uri}",
-                                         return_ori_content=return_ori_content,
-                                         proxies=proxies,
-                                         **kwargs)
-                self.default_ip_proxy = proxies
-                return res
+            if self.proxy_rotator:
+                # 重试多次都失败了，当前代理IP可能已经被封禁，隔离之后换一个代理IP再试
+                if self.proxy_rotator.current is not None:
+                    self.proxy_rotator.report_blocked(self.proxy_rotator.current)
+                await self.proxy_rotator.rotate()
+                return await self.request(method="GET", url=f"{self._host}{final_uri}",
+                                          return_ori_content=return_ori_content,
+                                          **kwargs)
 
             utils.logger.error(f"[BaiduTieBaClient.get] 达到了最大重试次数，IP已经被Block，请尝试更换新的IP代理: {e}")
             raise Exception(f"[BaiduTieBaClient.get] 达到了最大重试次数，IP已经被Block，请尝试更换新的IP代理: {e}")
@@ -192,7 +192,7 @@ class BaiduTieBaClient(AbstractApiClient):
         page_content = await self.get(uri, return_ori_content=True)
         return self._page_extractor.extract_note_detail(page_content)
 
-    async def get_note_all_comments(self, note_detail: TiebaNote, crawl_interval: float = 1.0,
+    async def get_note_all_comments(self, note_detail: TiebaNote, crawl_interval: float = 0,
                                     callback: Optional[Callable] = None) -> List[TiebaComment]:
         """
         获取指定帖子下的所有一级评论，该方法会一直查找一个帖子下的所有评论信息
@@ -225,7 +225,7 @@ class BaiduTieBaClient(AbstractApiClient):
             current_page += 1
         return result
 
-    async def get_comments_all_sub_comments(self, comments: List[TiebaComment], crawl_interval: float = 1.0,
+    async def get_comments_all_sub_comments(self, comments: List[TiebaComment], crawl_interval: float = 0,
                                             callback: Optional[Callable] = None) -> List[TiebaComment]:
         """
         获取指定评论下的所有子评论
@@ -318,7 +318,7 @@ class BaiduTieBaClient(AbstractApiClient):
         return await self.get(uri, params=params)
 
     async def get_all_notes_by_creator_user_name(self,
-                                                 user_name: str, crawl_interval: float = 1.0,
+                                                 user_name: str, crawl_interval: float = 0,
                                                  callback: Optional[Callable] = None,
                                                  max_note_count: int = 0) -> List[TiebaNote]:
         """
@@ -1,6 +1,5 @@
 import asyncio
 import os
-import random
 from asyncio import Task
 from typing import Dict, List, Optional, Tuple
 
@@ -13,6 +12,7 @@ from model.m_baidu_tieba import TiebaCreator, TiebaNote
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import tieba as tieba_store
 from tools import utils
+from tools.concurrency_limiter import AdaptiveConcurrencyLimiter
 from tools.crawler_util import format_proxy_info
 from var import crawler_type_var, source_keyword_var
 
@@ -36,7 +36,7 @@ class TieBaCrawler(AbstractCrawler):
         Returns:
 
         """
-        ip_proxy_pool, httpx_proxy_format = None, None
+        ip_proxy_pool, ip_proxy_info, httpx_proxy_format = None, None, None
         if config.ENABLE_IP_PROXY:
             utils.logger.info("[BaiduTieBaCrawler.start] Begin create ip proxy pool ...")
             ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
@@ -45,10 +45,10 @@ class TieBaCrawler(AbstractCrawler):
             utils.logger.info(f"[BaiduTieBaCrawler.start] Init default ip proxy, value: {httpx_proxy_format}")
 
         # Create a client to interact with the baidutieba website.
-        self.tieba_client = BaiduTieBaClient(
-            ip_pool=ip_proxy_pool,
-            default_ip_proxy=httpx_proxy_format,
-        )
+        self.tieba_client = BaiduTieBaClient(proxies=httpx_proxy_format)
+        if ip_proxy_pool is not None:
+            self.tieba_client.set_proxy_pool(ip_proxy_pool, ip_proxy_info)
+        await self.tieba_client.warm_up(httpx_proxy_format)
         crawler_type_var.set(config.CRAWLER_TYPE)
         if config.CRAWLER_TYPE == "search":
             # Search for notes and retrieve their comment information.
@@ -142,7 +142,7 @@ class TieBaCrawler(AbstractCrawler):
         Returns:
 
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.tieba_client.concurrency_limiter
         task_list = [
             self.get_note_detail_async_task(note_id=note_id, semaphore=semaphore) for note_id in note_id_list
         ]
@@ -154,7 +154,7 @@ class TieBaCrawler(AbstractCrawler):
                 await tieba_store.update_tieba_note(note_detail)
         await self.batch_get_note_comments(note_details_model)
 
-    async def get_note_detail_async_task(self, note_id: str, semaphore: asyncio.Semaphore) -> Optional[TiebaNote]:
+    async def get_note_detail_async_task(self, note_id: str, semaphore: AdaptiveConcurrencyLimiter) -> Optional[TiebaNote]:
         """
         Get note detail
         Args:
@@ -193,14 +193,14 @@ class TieBaCrawler(AbstractCrawler):
         if not config.ENABLE_GET_COMMENTS:
             return
 
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.tieba_client.concurrency_limiter
         task_list: List[Task] = []
         for note_detail in note_detail_list:
             task = asyncio.create_task(self.get_comments_async_task(note_detail, semaphore), name=note_detail.note_id)
             task_list.append(task)
         await asyncio.gather(*task_list)
 
-    async def get_comments_async_task(self, note_detail: TiebaNote, semaphore: asyncio.Semaphore):
+    async def get_comments_async_task(self, note_detail: TiebaNote, semaphore: AdaptiveConcurrencyLimiter):
         """
         Get comments async task
         Args:
@@ -214,7 +214,6 @@ class TieBaCrawler(AbstractCrawler):
             utils.logger.info(f"[BaiduTieBaCrawler.get_comments] Begin get note id comments {note_detail.note_id}")
             await self.tieba_client.get_note_all_comments(
                 note_detail=note_detail,
-                crawl_interval=random.random(),
                 callback=tieba_store.batch_update_tieba_note_comments
             )
 
@@ -295,5 +294,6 @@ class TieBaCrawler(AbstractCrawler):
         Returns:
 
         """
+        await self.tieba_client.close()
         await self.browser_context.close()
         utils.logger.info("[BaiduTieBaCrawler.close] Browser context closed ...")
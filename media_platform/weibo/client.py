@@ -7,21 +7,27 @@ import asyncio
 import copy
 import json
 import re
+from functools import partial
 from typing import Callable, Dict, List, Optional, Union
 from urllib.parse import parse_qs, unquote, urlencode
 
-import httpx
 from httpx import Response
 from playwright.async_api import BrowserContext, Page
 
 import config
+from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.media_downloader import media_downloader
+from tools.media_store import media_store
 
-from .exception import DataFetchError
+from .exception import DataFetchError, IPBlockError
 from .field import SearchType
 
 
-class WeiboClient:
+class WeiboClient(AbstractApiClient):
+    platform = "wb"
+    ip_block_errors = (IPBlockError,)
+
     def __init__(
             self,
             timeout=10,
@@ -35,28 +41,34 @@ class WeiboClient:
         self.timeout = timeout
         self.headers = headers
         self._host = "https://m.weibo.cn"
+        # 请求太频繁 IP 被封禁时返回的状态码
+        self.IP_BLOCK_STATUS_CODE = 418
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
         self._image_agent_host = "https://i1.wp.com/"
 
     async def request(self, method, url, **kwargs) -> Union[Response, Dict]:
         enable_return_response = kwargs.pop("return_response", False)
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
+        await self.acquire_rate_limit(url)
+        # 请求结果和耗时反馈给自适应并发控制器
+        async with self.track_request() as client:
             response = await client.request(
                 method, url, timeout=self.timeout,
                 **kwargs
             )
+            if response.status_code == self.IP_BLOCK_STATUS_CODE:
+                raise IPBlockError(f"request {url} blocked, status code: {response.status_code}")
 
-        if enable_return_response:
-            return response
+            if enable_return_response:
+                return response
 
-        data: Dict = response.json()
-        ok_code = data.get("ok")
-        if ok_code not in [0, 1]:
-            utils.logger.error(f"[WeiboClient.request] request {method}:{url} err, res:{data}")
-            raise DataFetchError(data.get("msg", "unkonw error"))
-        else:
-            return data.get("data", {})
+            data: Dict = response.json()
+            ok_code = data.get("ok")
+            if ok_code not in [0, 1]:
+                utils.logger.error(f"[WeiboClient.request] request {method}:{url} err, res:{data}")
+                raise DataFetchError(data.get("msg", "unkonw error"))
+            else:
+                return data.get("data", {})
 
     async def get(self, uri: str, params=None, headers=None, **kwargs) -> Union[Response, Dict]:
         final_uri = uri
@@ -137,7 +149,7 @@ class WeiboClient:
 
         return await self.get(uri, params, headers=headers)
 
-    async def get_note_all_comments(self, note_id: str, crawl_interval: float = 1.0,
+    async def get_note_all_comments(self, note_id: str, crawl_interval: float = 0,
                                     callback: Optional[Callable] = None, ):
         """
         get note all comments include sub comments
@@ -196,26 +208,26 @@ class WeiboClient:
         :return:
         """
         url = f"{self._host}/detail/{note_id}"
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request(
-                "GET", url, timeout=self.timeout, headers=self.headers
-            )
-            if response.status_code != 200:
-                raise DataFetchError(f"get weibo detail err: {response.text}")
-            match = re.search(r'var \$render_data = (\[.*?\])\[0\]', response.text, re.DOTALL)
-            if match:
-                render_data_json = match.group(1)
-                render_data_dict = json.loads(render_data_json)
-                note_detail = render_data_dict[0].get("status")
-                note_item = {
-                    "mblog": note_detail
-                }
-                return note_item
-            else:
-                utils.logger.info(f"[WeiboClient.get_note_info_by_id] 未找到$render_data的值")
-                return dict()
+        client = self.get_http_client(self.proxies)
+        response = await client.request(
+            "GET", url, timeout=self.timeout, headers=self.headers
+        )
+        if response.status_code != 200:
+            raise DataFetchError(f"get weibo detail err: {response.text}")
+        match = re.search(r'var \$render_data = (\[.*?\])\[0\]', response.text, re.DOTALL)
+        if match:
+            render_data_json = match.group(1)
+            render_data_dict = json.loads(render_data_json)
+            note_detail = render_data_dict[0].get("status")
+            note_item = {
+                "mblog": note_detail
+            }
+            return note_item
+        else:
+            utils.logger.info(f"[WeiboClient.get_note_info_by_id] 未找到$render_data的值")
+            return dict()
 
-    async def get_note_image(self, image_url: str) -> bytes:
+    def make_note_image_url(self, image_url: str) -> str:
         image_url = image_url[8:]  # 去掉 https://
         sub_url = image_url.split("/")
         image_url = ""
@@ -228,14 +240,29 @@ class WeiboClient:
                 image_url += sub_url[i] + "/"
         # 微博图床对外存在防盗链，所以需要代理访问
         # 由于微博图片是通过 i1.wp.com 来访问的，所以需要拼接一下
-        final_uri = (f"{self._image_agent_host}" f"{image_url}")
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request("GET", final_uri, timeout=self.timeout)
-            if not response.reason_phrase == "OK":
-                utils.logger.error(f"[WeiboClient.get_note_image] request {final_uri} err, res:{response.text}")
-                return None
-            else:
-                return response.content
+        return f"{self._image_agent_host}" f"{image_url}"
+
+    async def get_note_image(self, image_url: str) -> bytes:
+        final_uri = self.make_note_image_url(image_url)
+        client = self.get_http_client(self.proxies)
+        response = await client.request("GET", final_uri, timeout=self.timeout)
+        if not response.reason_phrase == "OK":
+            utils.logger.error(f"[WeiboClient.get_note_image] request {final_uri} err, res:{response.text}")
+            return None
+        else:
+            return response.content
+
+    async def download_note_image(self, image_url: str, file_name: str) -> bool:
+        """
+        流式下载微博高清大图到本地文件
+        :param image_url: 图片地址
+        :param file_name: 保存路径
+        :return: 是否下载成功
+        """
+        client = self.get_http_client(self.proxies)
+        final_uri = self.make_note_image_url(image_url)
+        return await media_store.fetch(
+            final_uri, file_name, partial(media_downloader.download, client, final_uri, timeout=self.timeout))
 
 
 
@@ -314,7 +341,7 @@ class WeiboClient:
         }
         return await self.get(uri, params)
 
-    async def get_all_notes_by_creator_id(self, creator_id: str, container_id: str, crawl_interval: float = 1.0,
+    async def get_all_notes_by_creator_id(self, creator_id: str, container_id: str, crawl_interval: float = 0,
                                           callback: Optional[Callable] = None) -> List[Dict]:
         """
         获取指定用户下的所有发过的帖子，该方法会一直查找一个用户下的所有帖子信息
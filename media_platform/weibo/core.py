@@ -6,7 +6,6 @@
 
 import asyncio
 import os
-import random
 from asyncio import Task
 from typing import Dict, List, Optional, Tuple
 
@@ -18,6 +17,7 @@ from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import weibo as weibo_store
 from tools import utils
+from tools.concurrency_limiter import AdaptiveConcurrencyLimiter
 from var import crawler_type_var, source_keyword_var
 
 from .client import WeiboClient
@@ -40,6 +40,7 @@ class WeiboCrawler(AbstractCrawler):
 
     async def start(self):
         playwright_proxy_format, httpx_proxy_format = None, None
+        ip_proxy_pool, ip_proxy_info = None, None
         if config.ENABLE_IP_PROXY:
             ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
             ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
@@ -61,6 +62,9 @@ class WeiboCrawler(AbstractCrawler):
 
             # Create a client to interact with the xiaohongshu website.
             self.wb_client = await self.create_weibo_client(httpx_proxy_format)
+            if ip_proxy_pool is not None:
+                # API 请求从代理池中轮换代理IP，浏览器继续使用初始的代理IP
+                self.wb_client.set_proxy_pool(ip_proxy_pool, ip_proxy_info)
             if not await self.wb_client.pong():
                 login_obj = WeiboLogin(
                     login_type=config.LOGIN_TYPE,
@@ -134,7 +138,7 @@ class WeiboCrawler(AbstractCrawler):
         get specified notes info
         :return:
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.wb_client.concurrency_limiter
         task_list = [
             self.get_note_info_task(note_id=note_id, semaphore=semaphore) for note_id in
             config.WEIBO_SPECIFIED_ID_LIST
@@ -145,7 +149,7 @@ class WeiboCrawler(AbstractCrawler):
                 await weibo_store.update_weibo_note(note_item)
         await self.batch_get_notes_comments(config.WEIBO_SPECIFIED_ID_LIST)
 
-    async def get_note_info_task(self, note_id: str, semaphore: asyncio.Semaphore) -> Optional[Dict]:
+    async def get_note_info_task(self, note_id: str, semaphore: AdaptiveConcurrencyLimiter) -> Optional[Dict]:
         """
         Get note detail task
         :param note_id:
@@ -175,14 +179,14 @@ class WeiboCrawler(AbstractCrawler):
             return
 
         utils.logger.info(f"[WeiboCrawler.batch_get_notes_comments] note ids:{note_id_list}")
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.wb_client.concurrency_limiter
         task_list: List[Task] = []
         for note_id in note_id_list:
             task = asyncio.create_task(self.get_note_comments(note_id, semaphore), name=note_id)
             task_list.append(task)
         await asyncio.gather(*task_list)
 
-    async def get_note_comments(self, note_id: str, semaphore: asyncio.Semaphore):
+    async def get_note_comments(self, note_id: str, semaphore: AdaptiveConcurrencyLimiter):
         """
         get comment for note id
         :param note_id:
@@ -194,7 +198,6 @@ class WeiboCrawler(AbstractCrawler):
                 utils.logger.info(f"[WeiboCrawler.get_note_comments] begin get note_id: {note_id} comments ...")
                 await self.wb_client.get_note_all_comments(
                     note_id=note_id,
-                    crawl_interval=random.randint(1,3), # 微博对API的限流比较严重，所以延时提高一些
                     callback=weibo_store.batch_update_weibo_note_comments
                 )
             except DataFetchError as ex:
@@ -215,14 +218,12 @@ class WeiboCrawler(AbstractCrawler):
         pics: Dict = mblog.get("pics")
         if not pics:
             return
-        for pic in pics:
-            url = pic.get("url")
-            if not url:
-                continue
-            content = await self.wb_client.get_note_image(url)
-            if content != None:
-                extension_file_name = url.split(".")[-1]
-                await weibo_store.update_weibo_note_image(pic["pid"], content, extension_file_name)
+        # 并发下载，下载器限制了同时下载的文件数
+        await asyncio.gather(*[
+            self.wb_client.download_note_image(
+                pic["url"], weibo_store.get_weibo_note_image_file_name(pic["pid"], pic["url"].split(".")[-1]))
+            for pic in pics if pic.get("url")
+        ])
 
 
     async def get_creators_and_notes(self) -> None:
@@ -275,6 +276,7 @@ class WeiboCrawler(AbstractCrawler):
             playwright_page=self.context_page,
             cookie_dict=cookie_dict,
         )
+        await weibo_client_obj.warm_up(httpx_proxy)
         return weibo_client_obj
 
     @staticmethod
@@ -318,3 +320,9 @@ class WeiboCrawler(AbstractCrawler):
                 user_agent=user_agent
             )
             return browser_context
+
+    async def close(self):
+        """Close browser context"""
+        await self.wb_client.close()
+        await self.browser_context.close()
+        utils.logger.info("[WeiboCrawler.close] Browser context closed ...")
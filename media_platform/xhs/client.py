@@ -1,24 +1,41 @@
 import asyncio
 import json
-import random
 import re
+from functools import partial
 from typing import Any, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext, Page
 from tenacity import retry, stop_after_attempt, wait_fixed
 
 import config
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.media_downloader import media_downloader
+from tools.media_store import media_store
+from tools.metrics import LatencyCounter
+from tools.signer import AbstractSigner, PlaywrightSigner
+from tools.single_flight import single_flight
 
 from .exception import DataFetchError, IPBlockError
 from .field import SearchNoteType, SearchSortType
 from .help import get_search_id, sign
 
+# 只读取签名需要的字段，避免每次把整个 localStorage 序列化后经过 CDP 传回来
+SIGN_WITH_B1_JS = """([url, data]) => {
+    const encrypt_params = window._webmsxyw(url, data);
+    return {"X-s": encrypt_params["X-s"], "X-t": encrypt_params["X-t"], "b1": window.localStorage.getItem("b1")};
+}"""
+SIGN_JS = """([url, data]) => {
+    const encrypt_params = window._webmsxyw(url, data);
+    return {"X-s": encrypt_params["X-s"], "X-t": encrypt_params["X-t"]};
+}"""
+
 
 class XiaoHongShuClient(AbstractApiClient):
+    platform = "xhs"
+    ip_block_errors = (IPBlockError,)
+
     def __init__(
             self,
             timeout=10,
@@ -27,6 +44,7 @@ class XiaoHongShuClient(AbstractApiClient):
             headers: Dict[str, str],
             playwright_page: Page,
             cookie_dict: Dict[str, str],
+            signer: Optional[AbstractSigner] = None,
     ):
         self.proxies = proxies
         self.timeout = timeout
@@ -38,11 +56,25 @@ class XiaoHongShuClient(AbstractApiClient):
         self.NOTE_ABNORMAL_STR = "笔记状态异常，请稍后查看"
         self.NOTE_ABNORMAL_CODE = -510001
         self.playwright_page = playwright_page
+        # 签名 JS 的执行后端，没有指定的时候直接在 playwright_page 中执行
+        self.signer: AbstractSigner = signer or PlaywrightSigner(playwright_page)
         self.cookie_dict = cookie_dict
+        # 签名上下文缓存 {"a1": ..., "b1": ...}，cookies 更新之后失效
+        self._sign_context: Optional[Dict[str, str]] = None
+        self.sign_latency = LatencyCounter("xhs_sign")
+        self.request_latency = LatencyCounter("xhs_request")
+
+    def invalidate_sign_context(self):
+        """
+        清空签名上下文缓存，下一次签名时重新从浏览器读取 b1
+        Returns:
+
+        """
+        self._sign_context = None
 
     async def _pre_headers(self, url: str, data=None) -> Dict:
         """
-        请求头参数签名
+        请求头参数签名，返回本次请求的请求头，不修改共用的 self.headers，并发请求之间的签名互不覆盖
         Args:
             url:
             data:
@@ -50,14 +82,25 @@ class XiaoHongShuClient(AbstractApiClient):
         Returns:
 
         """
-        encrypt_params = await self.playwright_page.evaluate("([url, data]) => window._webmsxyw(url,data)", [url, data])
-        local_storage = await self.playwright_page.evaluate("() => window.localStorage")
-        signs = sign(
-            a1=self.cookie_dict.get("a1", ""),
-            b1=local_storage.get("b1", ""),
-            x_s=encrypt_params.get("X-s", ""),
-            x_t=str(encrypt_params.get("X-t", ""))
-        )
+        with self.sign_latency.measure():
+            sign_context = self._sign_context
+            if sign_context is None:
+                encrypt_params = await self.signer.evaluate(SIGN_WITH_B1_JS, [url, data])
+                sign_context = {
+                    "a1": self.cookie_dict.get("a1", ""),
+                    "b1": encrypt_params.get("b1") or "",
+                }
+                # b1 还没有生成的时候不缓存，下次签名继续读取
+                if sign_context["b1"]:
+                    self._sign_context = sign_context
+            else:
+                encrypt_params = await self.signer.evaluate(SIGN_JS, [url, data])
+            signs = sign(
+                a1=sign_context["a1"],
+                b1=sign_context["b1"],
+                x_s=encrypt_params.get("X-s", ""),
+                x_t=str(encrypt_params.get("X-t", ""))
+            )
 
         headers = {
             "X-S": signs["x-s"],
@@ -65,8 +108,7 @@ class XiaoHongShuClient(AbstractApiClient):
             "x-S-Common": signs["x-s-common"],
             "X-B3-Traceid": signs["x-b3-traceid"]
         }
-        self.headers.update(headers)
-        return self.headers
+        return {**self.headers, **headers}
 
     # @retry(stop=stop_after_attempt(1), wait=wait_fixed(3))
     async def request(self, method, url, **kwargs) -> Union[str, Any]:
@@ -82,37 +124,32 @@ class XiaoHongShuClient(AbstractApiClient):
         """
         # return response.text
         return_response = kwargs.pop('return_response', False)
-
-        # 特定接口 随机停止
-        # api/sns/web/v1/feed 查询笔记互动数据
-        if "api/sns/web/v1/feed" in url:
-            # random_second = random.uniform(0.8, 1.5)
-            random_second = random.randint(1, 1)
-            utils.logger.info(f"{url} 暂停{random_second}秒")
-            await asyncio.sleep(random_second)
-        # elif "api/sns/web/v1/user_posted" in url:  # 查询指定用户已发布的笔记
-        # random_second = random.uniform(0.8, 1.5)
-        # random_second = random.randint(1, 1)
-        # utils.logger.info(f"{url} 暂停{random_second}秒")
-        # await asyncio.sleep(random_second)
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request(
-                method, url, timeout=self.timeout,
-                **kwargs
-            )
-        if return_response:
-            return response.text
-        data: Dict = response.json()
-        if data["success"]:
-            return data.get("data", data.get("success", {}))
-        elif data["code"] == self.IP_ERROR_CODE:
-            raise IPBlockError(self.IP_ERROR_STR)
-        else:
-            raise Exception(data.get("msg", "数据获取失败"))
+        # get、post 在签名之前已经获取了限流令牌
+        rate_limit_acquired = kwargs.pop('rate_limit_acquired', False)
+
+        # 各个接口的请求频率在 config.RATE_LIMIT_RULES 中配置
+        if not rate_limit_acquired:
+            await self.acquire_rate_limit(url)
+        # 请求结果和耗时反馈给自适应并发控制器
+        async with self.track_request() as client:
+            with self.request_latency.measure():
+                response = await client.request(
+                    method, url, timeout=self.timeout,
+                    **kwargs
+                )
+            if return_response:
+                return response.text
+            data: Dict = response.json()
+            if data["success"]:
+                return data.get("data", data.get("success", {}))
+            elif data["code"] == self.IP_ERROR_CODE:
+                raise IPBlockError(self.IP_ERROR_STR)
+            else:
+                raise Exception(data.get("msg", "数据获取失败"))
 
     async def get(self, uri: str, params=None) -> Dict:
         """
-        GET请求，对请求头签名
+        GET请求，先获取限流令牌再对请求头签名，等待限流时签名中的时间戳不会过期
         Args:
             uri: 请求路由
             params: 请求参数
@@ -124,12 +161,14 @@ class XiaoHongShuClient(AbstractApiClient):
         if isinstance(params, dict):
             final_uri = (f"{uri}?"
                          f"{urlencode(params)}")
+        url = f"{self._host}{final_uri}"
+        await self.acquire_rate_limit(url)
         headers = await self._pre_headers(final_uri)
-        return await self.request(method="GET", url=f"{self._host}{final_uri}", headers=headers)
+        return await self.request(method="GET", url=url, headers=headers, rate_limit_acquired=True)
 
     async def post(self, uri: str, data: dict, **kwargs) -> Dict:
         """
-        POST请求，对请求头签名
+        POST请求，先获取限流令牌再对请求头签名
         Args:
             uri: 请求路由
             data: 请求体参数
@@ -137,19 +176,35 @@ class XiaoHongShuClient(AbstractApiClient):
         Returns:
 
         """
+        url = f"{self._host}{uri}"
+        await self.acquire_rate_limit(url)
         headers = await self._pre_headers(uri, data)
         json_str = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
-        return await self.request(method="POST", url=f"{self._host}{uri}",
-                                  data=json_str, headers=headers, **kwargs)
+        return await self.request(method="POST", url=url,
+                                  data=json_str, headers=headers, rate_limit_acquired=True, **kwargs)
 
     async def get_note_media(self, url: str) -> Union[bytes, None]:
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
-            response = await client.request("GET", url, timeout=self.timeout)
-            if not response.reason_phrase == "OK":
-                utils.logger.error(f"[XiaoHongShuClient.get_note_media] request {url} err, res:{response.text}")
-                return None
-            else:
-                return response.content
+        client = self.get_http_client(self.proxies)
+        response = await client.request("GET", url, timeout=self.timeout)
+        if not response.reason_phrase == "OK":
+            utils.logger.error(f"[XiaoHongShuClient.get_note_media] request {url} err, res:{response.text}")
+            return None
+        else:
+            return response.content
+
+    async def download_note_media(self, url: str, file_name: str) -> bool:
+        """
+        流式下载笔记的图片、视频到本地文件，不把整个文件读到内存中
+        Args:
+            url: 图片或者视频地址
+            file_name: 保存路径
+
+        Returns: 是否下载成功
+
+        """
+        client = self.get_http_client(self.proxies)
+        return await media_store.fetch(
+            url, file_name, partial(media_downloader.download, client, url, timeout=self.timeout))
 
     async def pong(self) -> bool:
         """
@@ -181,6 +236,7 @@ class XiaoHongShuClient(AbstractApiClient):
         cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         self.headers["Cookie"] = cookie_str
         self.cookie_dict = cookie_dict
+        self.invalidate_sign_context()
 
     async def get_note_by_keyword(
             self, keyword: str,
@@ -213,7 +269,7 @@ class XiaoHongShuClient(AbstractApiClient):
 
     async def get_note_by_id(self, note_id: str, xsec_source: str, xsec_token: str) -> Dict:
         """
-        获取笔记详情API
+        获取笔记详情API，同一个笔记并发或者短时间内重复请求时只发一次请求
         Args:
             note_id:笔记ID
             xsec_source: 渠道来源
@@ -222,6 +278,11 @@ class XiaoHongShuClient(AbstractApiClient):
         Returns:
 
         """
+        return await single_flight.do(
+            (self.platform, "note_detail", note_id), self._get_note_by_id, note_id, xsec_source, xsec_token
+        )
+
+    async def _get_note_by_id(self, note_id: str, xsec_source: str, xsec_token: str) -> Dict:
         if xsec_source == "":
             xsec_source = "pc_search"
 
@@ -281,7 +342,7 @@ class XiaoHongShuClient(AbstractApiClient):
         }
         return await self.get(uri, params)
 
-    async def get_note_all_comments(self, note_id: str, crawl_interval: float = 1.0,
+    async def get_note_all_comments(self, note_id: str, crawl_interval: float = 0,
                                     callback: Optional[Callable] = None) -> List[Dict]:
         """
         获取指定笔记下的所有一级评论，该方法会一直查找一个帖子下的所有评论信息
@@ -313,7 +374,7 @@ class XiaoHongShuClient(AbstractApiClient):
             result.extend(sub_comments)
         return result
 
-    async def get_comments_all_sub_comments(self, comments: List[Dict], crawl_interval: float = 1.0,
+    async def get_comments_all_sub_comments(self, comments: List[Dict], crawl_interval: float = 0,
                                             callback: Optional[Callable] = None) -> List[Dict]:
         """
         获取指定一级评论下的所有二级评论, 该方法会一直查找一级评论下的所有二级评论信息
@@ -401,7 +462,7 @@ class XiaoHongShuClient(AbstractApiClient):
         }
         return await self.get(uri, data)
 
-    async def get_all_notes_by_creator(self, user_id: str, crawl_interval: float = 1.0,
+    async def get_all_notes_by_creator(self, user_id: str, crawl_interval: float = 0,
                                        callback: Optional[Callable] = None) -> List[Dict]:
         """
         获取指定用户下的所有发过的帖子，该方法会一直查找一个用户下的所有帖子信息
@@ -492,10 +553,6 @@ class XiaoHongShuClient(AbstractApiClient):
                     dict_new[new_key] = value
             return dict_new
 
-        random_second = random.randint(1, 1)
-        utils.logger.info(f"[get_note_by_id_from_html] 暂停{random_second}秒")
-        await asyncio.sleep(random_second)
-
         url = "https://www.xiaohongshu.com/explore/" + note_id
         html = await self.request(method="GET", url=url, return_response=True, headers=self.headers)
         states = re.findall(r"window.__INITIAL_STATE__=({.*})</script>", html)
@@ -13,6 +13,9 @@ from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import xhs as xhs_store
 from tools import utils
+from tools.concurrency_limiter import AdaptiveConcurrencyLimiter
+from tools.page_pool import PlaywrightPagePool
+from tools.signer import AbstractSigner, create_signer
 from var import crawler_type_var, source_keyword_var
 
 from .client import XiaoHongShuClient
@@ -25,6 +28,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
     context_page: Page
     xhs_client: XiaoHongShuClient
     browser_context: BrowserContext
+    signer: AbstractSigner
 
     def __init__(self) -> None:
         self.username = "user_data_dir"
@@ -157,6 +161,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
     async def start(self) -> None:
         playwright_proxy_format, httpx_proxy_format = None, None
+        ip_proxy_pool, ip_proxy_info = None, None
         if config.ENABLE_IP_PROXY:
             ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
             ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
@@ -186,6 +191,9 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
             # Create a client to interact with the xiaohongshu website.
             self.xhs_client = await self.create_xhs_client(httpx_proxy_format)
+            if ip_proxy_pool is not None:
+                # API 请求从代理池中轮换代理IP，浏览器继续使用初始的代理IP
+                self.xhs_client.set_proxy_pool(ip_proxy_pool, ip_proxy_info)
             if not await self.xhs_client.pong():
                 login_obj = XiaoHongShuLogin(
                     login_type=config.LOGIN_TYPE,
@@ -197,6 +205,9 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 await login_obj.begin()
                 await self.xhs_client.update_cookies(browser_context=self.browser_context)
 
+            # 登录之后再准备签名环境（打开其他签名页面或者同步浏览器环境到内嵌引擎）
+            await self.signer.start()
+
             crawler_type_var.set(config.CRAWLER_TYPE)
             if config.CRAWLER_TYPE == "search":
                 # Search for notes and retrieve their comment information.
@@ -210,6 +221,10 @@ class XiaoHongShuCrawler(AbstractCrawler):
             else:
                 pass
 
+            await self.signer.close()
+            utils.logger.info(
+                f"[XiaoHongShuCrawler.start] latency stats, {self.xhs_client.sign_latency}, "
+                f"{self.xhs_client.request_latency}, {self.xhs_client.concurrency_limiter}")
             utils.logger.info("[XiaoHongShuCrawler.start] Xhs Crawler finished ...")
 
     async def search(self) -> None:
@@ -241,7 +256,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
                     if not notes_res or not notes_res.get('has_more', False):
                         utils.logger.info("No more content!")
                         break
-                    semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+                    semaphore = self.xhs_client.concurrency_limiter
                     task_list = [
                         self.get_note_detail_async_task(
                             note_id=post_item.get("id"),
@@ -282,7 +297,6 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 # Get all note information of the creator
                 all_notes_list = await self.xhs_client.get_all_notes_by_creator(
                     user_id=user_id,
-                    crawl_interval=random.random(),
                     callback=self.fetch_creator_notes_detail_sync
                 )
 
@@ -307,7 +321,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
         """
         Concurrently obtain the specified post list and save the data
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.xhs_client.concurrency_limiter
         task_list = [
             self.get_note_detail_async_task(
                 note_id=post_item.get("note_id"),
@@ -326,7 +340,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
     async def get_specified_notes(self):
         """Get the information and comments of the specified post"""
 
-        async def get_note_detail_from_html_task(note_id: str, semaphore: asyncio.Semaphore) -> Dict:
+        async def get_note_detail_from_html_task(note_id: str, semaphore: AdaptiveConcurrencyLimiter) -> Dict:
             async with semaphore:
                 try:
                     _note_detail: Dict = await self.xhs_client.get_note_by_id_from_html(note_id)
@@ -347,7 +361,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
                         f"[XiaoHongShuCrawler.get_note_detail_from_html] Retry error, note_id:{note_id}, err: {ex}")
 
         get_note_detail_task_list = [
-            get_note_detail_from_html_task(note_id=note_id, semaphore=asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)) for
+            get_note_detail_from_html_task(note_id=note_id, semaphore=self.xhs_client.concurrency_limiter) for
             note_id in config.XHS_SPECIFIED_ID_LIST
         ]
 
@@ -390,7 +404,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
             return None
 
     async def get_note_detail_async_task(self, note_id: str, xsec_source: str, xsec_token: str,
-                                         semaphore: asyncio.Semaphore) -> \
+                                         semaphore: AdaptiveConcurrencyLimiter) -> \
             Optional[Dict]:
         """Get note detail"""
         async with semaphore:
@@ -419,20 +433,19 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
         utils.logger.info(
             f"[XiaoHongShuCrawler.batch_get_note_comments] Begin batch get note comments, note list: {note_list}")
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.xhs_client.concurrency_limiter
         task_list: List[Task] = []
         for note_id in note_list:
             task = asyncio.create_task(self.get_comments(note_id, semaphore), name=note_id)
             task_list.append(task)
         await asyncio.gather(*task_list)
 
-    async def get_comments(self, note_id: str, semaphore: asyncio.Semaphore):
+    async def get_comments(self, note_id: str, semaphore: AdaptiveConcurrencyLimiter):
         """Get note comments with keyword filtering and quantity limitation"""
         async with semaphore:
             utils.logger.info(f"[XiaoHongShuCrawler.get_comments] Begin get note id comments {note_id}")
             await self.xhs_client.get_note_all_comments(
                 note_id=note_id,
-                crawl_interval=random.random(),
                 callback=xhs_store.batch_update_xhs_note_comments
             )
 
@@ -453,6 +466,16 @@ class XiaoHongShuCrawler(AbstractCrawler):
         """Create xhs client"""
         utils.logger.info("[XiaoHongShuCrawler.create_xhs_client] Begin create xiaohongshu API client ...")
         cookie_str, cookie_dict = utils.convert_cookies(await self.browser_context.cookies())
+        sign_page_pool = PlaywrightPagePool(
+            browser_context=self.browser_context,
+            url=self.index_url,
+            main_page=self.context_page,
+            ready_js="() => typeof window._webmsxyw === 'function'",
+            size=config.SIGN_PAGE_POOL_SIZE,
+            max_uses=config.SIGN_PAGE_MAX_USES,
+            health_check_interval=config.SIGN_PAGE_HEALTH_CHECK_INTERVAL,
+        )
+        self.signer = create_signer(config.SIGN_BACKEND, sign_page_pool, config.XHS_SIGN_SCRIPT_PATH)
         xhs_client_obj = XiaoHongShuClient(
             proxies=httpx_proxy,
             headers={
@@ -464,7 +487,9 @@ class XiaoHongShuCrawler(AbstractCrawler):
             },
             playwright_page=self.context_page,
             cookie_dict=cookie_dict,
+            signer=self.signer,
         )
+        await xhs_client_obj.warm_up(httpx_proxy)
         return xhs_client_obj
 
     async def launch_browser(
@@ -501,6 +526,8 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
     async def close(self):
         """Close browser context"""
+        await self.xhs_client.close()
+        await self.signer.close()
         await self.browser_context.close()
         utils.logger.info("[XiaoHongShuCrawler.close] Browser context closed ...")
 
@@ -528,17 +555,12 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
         if not image_list:
             return
-        picNum = 0
-        for pic in image_list:
-            url = pic.get("url")
-            if not url:
-                continue
-            content = await self.xhs_client.get_note_media(url)
-            if content is None:
-                continue
-            extension_file_name = f"{picNum}.jpg"
-            picNum += 1
-            await xhs_store.update_xhs_note_image(note_id, content, extension_file_name)
+        # 并发下载，下载器限制了同时下载的文件数
+        urls = [pic.get("url") for pic in image_list if pic.get("url")]
+        await asyncio.gather(*[
+            self.xhs_client.download_note_media(url, xhs_store.get_xhs_note_media_file_name(note_id, f"{picNum}.jpg"))
+            for picNum, url in enumerate(urls)
+        ])
 
     async def get_notice_video(self, note_item: Dict):
         """
@@ -554,11 +576,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
         if not videos:
             return
-        videoNum = 0
-        for url in videos:
-            content = await self.xhs_client.get_note_media(url)
-            if content is None:
-                continue
-            extension_file_name = f"{videoNum}.mp4"
-            videoNum += 1
-            await xhs_store.update_xhs_note_image(note_id, content, extension_file_name)
+        await asyncio.gather(*[
+            self.xhs_client.download_note_media(url, xhs_store.get_xhs_note_media_file_name(note_id, f"{videoNum}.mp4"))
+            for videoNum, url in enumerate(videos)
+        ])
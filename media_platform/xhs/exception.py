@@ -5,5 +5,5 @@ class DataFetchError(RequestError):
     """something error when fetch"""
 
 
-class IPBlockError(RequestError):
+class IPBlockError(DataFetchError):
     """fetch so fast that the server block us ip"""
@@ -96,7 +96,7 @@ class XiaoHongShuLogin(AbstractLogin):
             utils.logger.info(f"[XiaoHongShuLogin.login_by_mobile] get sms code from redis remaining time {max_get_sms_code_time}s ...")
             await asyncio.sleep(1)
             sms_code_key = f"xhs_{self.login_phone}"
-            sms_code_value = cache_client.get(sms_code_key)
+            sms_code_value = await cache_client.async_get(sms_code_key)
             if not sms_code_value:
                 max_get_sms_code_time -= 1
                 continue
@@ -105,7 +105,7 @@ class XiaoHongShuLogin(AbstractLogin):
             _, cookie_dict = utils.convert_cookies(current_cookie)
             no_logged_in_session = cookie_dict.get("web_session")
 
-            await sms_code_input_ele.fill(value=sms_code_value.decode())  # 输入短信验证码
+            await sms_code_input_ele.fill(value=sms_code_value)  # 输入短信验证码
             await asyncio.sleep(0.5)
             agree_privacy_ele = self.context_page.locator("xpath=//div[@class='agreements']//*[local-name()='svg']")
             await agree_privacy_ele.click()  # 点击同意隐私协议
@@ -35,7 +35,7 @@ class IpCache:
     def __init__(self):
         self.cache_client: AbstractCache = CacheFactory.create_cache(cache_type=config.CACHE_TYPE_MEMORY)
 
-    def set_ip(self, ip_key: str, ip_value_info: str, ex: int):
+    async def set_ip(self, ip_key: str, ip_value_info: str, ex: int):
         """
         设置IP并带有过期时间，到期之后由 redis 负责删除
         :param ip_key:
@@ -43,19 +43,19 @@ class IpCache:
         :param ex:
         :return:
         """
-        self.cache_client.set(key=ip_key, value=ip_value_info, expire_time=ex)
+        await self.cache_client.async_set(key=ip_key, value=ip_value_info, expire_time=ex)
 
-    def load_all_ip(self, proxy_brand_name: str) -> List[IpInfoModel]:
+    async def load_all_ip(self, proxy_brand_name: str) -> List[IpInfoModel]:
         """
         从 redis 中加载所有还未过期的 IP 信息
         :param proxy_brand_name: 代理商名称
         :return:
         """
         all_ip_list: List[IpInfoModel] = []
-        all_ip_keys: List[str] = self.cache_client.keys(pattern=f"{proxy_brand_name}_*")
         try:
-            for ip_key in all_ip_keys:
-                ip_value = self.cache_client.get(ip_key)
+            all_ip_keys: List[str] = await self.cache_client.async_keys(pattern=f"{proxy_brand_name}_*")
+            # 一次批量获取所有的 IP 信息
+            for ip_value in await self.cache_client.mget(all_ip_keys):
                 if not ip_value:
                     continue
                 all_ip_list.append(IpInfoModel(**json.loads(ip_value)))
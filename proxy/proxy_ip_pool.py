@@ -2,24 +2,90 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2023/12/2 13:45
 # @Desc    : ip代理池实现
+import asyncio
 import random
-from typing import Dict, List
+import time
+from typing import Dict, List, Optional, Set
 
 import httpx
-from tenacity import retry, stop_after_attempt, wait_fixed
 
 import config
 from proxy.providers import new_jisu_http_proxy, new_kuai_daili_proxy
 from tools import utils
+from tools.crawler_util import format_proxy_info
+from tools.http_client_pool import http_client_pool
 
 from .base_proxy import ProxyProvider
 from .types import IpInfoModel, ProviderNameEnum
 
 
+class NoAvailableProxyError(Exception):
+    """代理池中没有可用的代理IP"""
+
+
+def make_proxy_key(proxy: IpInfoModel) -> str:
+    return f"{proxy.ip}:{proxy.port}"
+
+
+class ProxyStats:
+    def __init__(self, proxy: IpInfoModel) -> None:
+        """
+        代理IP的健康状态，成功率、延迟和过期时间
+        :param proxy:
+        """
+        self.proxy = proxy
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        # 延迟的指数移动平均值（秒），没有数据时按 1 秒计算
+        self.latency = 1.0
+        self.quarantined_until = 0.0
+
+    @property
+    def key(self) -> str:
+        return make_proxy_key(self.proxy)
+
+    @property
+    def success_rate(self) -> float:
+        # 拉普拉斯平滑，新加入的代理IP按 50% 计算
+        return (self.successes + 1) / (self.successes + self.failures + 2)
+
+    @property
+    def weight(self) -> float:
+        return self.success_rate / max(self.latency, 0.05)
+
+    def is_expired(self, margin: float = 0) -> bool:
+        return bool(self.proxy.expired_time_ts) and time.time() >= self.proxy.expired_time_ts - margin
+
+    def is_quarantined(self) -> bool:
+        return time.monotonic() < self.quarantined_until
+
+    def record_success(self, latency: float) -> None:
+        self.latency = latency if self.successes == 0 else self.latency * 0.7 + latency * 0.3
+        self.successes += 1
+        self.consecutive_failures = 0
+        self.quarantined_until = 0.0
+
+    def record_failure(self, quarantine: bool = False) -> None:
+        """
+        :param quarantine: 是否直接隔离，检测不通过时直接隔离，请求失败时连续失败多次才隔离
+        :return:
+        """
+        self.failures += 1
+        self.consecutive_failures += 1
+        if quarantine or self.consecutive_failures >= config.IP_PROXY_MAX_FAILURES:
+            self.quarantined_until = time.monotonic() + config.IP_PROXY_QUARANTINE_SECONDS
+
+    def __str__(self) -> str:
+        return (f"{self.key} success_rate: {self.success_rate:.2f}, latency: {self.latency * 1000:.0f}ms, "
+                f"quarantined: {self.is_quarantined()}")
+
+
 class ProxyIpPool:
     def __init__(self, ip_pool_count: int, enable_validate_ip: bool, ip_provider: ProxyProvider) -> None:
         """
-
+        代理IP加载时并发检测，之后在后台定期重新检测，按成功率和延迟加权分配
+        连续失败的代理IP会被隔离，可用的代理IP不够时在后台提前补充，获取代理IP不用等待检测
         Args:
             ip_pool_count:
             enable_validate_ip:
@@ -28,61 +94,164 @@ class ProxyIpPool:
         self.valid_ip_url = "https://httpbin.org/ip"  # 验证 IP 是否有效的地址
         self.ip_pool_count = ip_pool_count
         self.enable_validate_ip = enable_validate_ip
-        self.proxy_list: List[IpInfoModel] = []
         self.ip_provider: ProxyProvider = ip_provider
+        self.proxies: Dict[str, ProxyStats] = {}
+        self._refill_task: Optional[asyncio.Task] = None
+        self._validate_task: Optional[asyncio.Task] = None
+        self._close_client_tasks: Set[asyncio.Task] = set()
+
+    @property
+    def proxy_list(self) -> List[IpInfoModel]:
+        return [stats.proxy for stats in self._available()]
 
     async def load_proxies(self) -> None:
         """
-        加载IP代理
+        加载IP代理，并发检测之后开始后台定期检测
         Returns:
 
         """
-        self.proxy_list = await self.ip_provider.get_proxies(self.ip_pool_count)
+        await self._refill()
+        if self.enable_validate_ip and config.IP_PROXY_VALIDATE_INTERVAL > 0 and self._validate_task is None:
+            self._validate_task = asyncio.create_task(self._validate_loop())
 
-    async def _is_valid_proxy(self, proxy: IpInfoModel) -> bool:
+    async def _check_proxy(self, proxy: IpInfoModel) -> bool:
         """
         验证代理IP是否有效
         :param proxy:
         :return:
         """
-        utils.logger.info(f"[ProxyIpPool._is_valid_proxy] testing {proxy.ip} is it valid ")
+        _, httpx_proxy = format_proxy_info(proxy)
+        async with httpx.AsyncClient(proxies=httpx_proxy, timeout=config.IP_PROXY_VALIDATE_TIMEOUT) as client:
+            response = await client.get(self.valid_ip_url)
+        return response.status_code == 200
+
+    async def _validate(self, stats: ProxyStats) -> bool:
+        start = time.perf_counter()
         try:
-            httpx_proxy = {
-                f"{proxy.protocol}": f"http://{proxy.user}:{proxy.password}@{proxy.ip}:{proxy.port}"
-            }
-            async with httpx.AsyncClient(proxies=httpx_proxy) as client:
-                response = await client.get(self.valid_ip_url)
-            if response.status_code == 200:
-                return True
-            else:
-                return False
+            valid = await self._check_proxy(stats.proxy)
         except Exception as e:
-            utils.logger.info(f"[ProxyIpPool._is_valid_proxy] testing {proxy.ip} err: {e}")
-            raise e
+            utils.logger.info(f"[ProxyIpPool._validate] testing {stats.proxy.ip} err: {e}")
+            valid = False
+        if valid:
+            stats.record_success(time.perf_counter() - start)
+        else:
+            self._record_failure(stats, quarantine=True)
+        return valid
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
-    async def get_proxy(self) -> IpInfoModel:
+    async def _validate_loop(self) -> None:
+        while True:
+            await asyncio.sleep(config.IP_PROXY_VALIDATE_INTERVAL)
+            self._remove_expired()
+            # 隔离中的代理IP检测通过之后恢复使用
+            await asyncio.gather(*[self._validate(stats) for stats in list(self.proxies.values())])
+            utils.logger.debug(f"[ProxyIpPool._validate_loop] {[str(stats) for stats in self.proxies.values()]}")
+            if len(self._available()) <= config.IP_PROXY_REFILL_THRESHOLD:
+                self._start_refill()
+
+    def _remove_expired(self) -> None:
+        for key in [key for key, stats in self.proxies.items() if stats.is_expired()]:
+            self._close_clients(self.proxies.pop(key).proxy)
+
+    def _record_failure(self, stats: ProxyStats, quarantine: bool = False) -> None:
+        was_quarantined = stats.is_quarantined()
+        stats.record_failure(quarantine=quarantine)
+        if not was_quarantined and stats.is_quarantined():
+            self._close_clients(stats.proxy)
+
+    def _close_clients(self, proxy: IpInfoModel) -> None:
         """
-        从代理池中随机提取一个代理IP
+        代理IP过期或者被隔离之后关闭它在 http_client_pool 中的长连接客户端，恢复使用时会重新创建
+        :param proxy:
         :return:
         """
-        if len(self.proxy_list) == 0:
-            await self._reload_proxies()
+        _, httpx_proxy = format_proxy_info(proxy)
+        task = asyncio.create_task(http_client_pool.close_proxy(httpx_proxy))
+        self._close_client_tasks.add(task)
+        task.add_done_callback(self._close_client_tasks.discard)
 
-        proxy = random.choice(self.proxy_list)
-        self.proxy_list.remove(proxy) # 取出来一个IP就应该移出掉
+    def _available(self) -> List[ProxyStats]:
+        return [stats for stats in self.proxies.values()
+                if not stats.is_quarantined() and not stats.is_expired(config.IP_PROXY_EXPIRE_MARGIN)]
+
+    async def _load_new_proxies(self) -> None:
+        self._remove_expired()
+        # 代理商会优先返回缓存中的IP，多取已有的数量才能拿到新的IP
+        proxies = await self.ip_provider.get_proxies(len(self.proxies) + self.ip_pool_count)
+        new_stats = [ProxyStats(proxy) for proxy in proxies if make_proxy_key(proxy) not in self.proxies]
+        for stats in new_stats:
+            self.proxies[stats.key] = stats
         if self.enable_validate_ip:
-            if not await self._is_valid_proxy(proxy):
-                raise Exception("[ProxyIpPool.get_proxy] current ip invalid and again get it")
-        return proxy
+            results = await asyncio.gather(*[self._validate(stats) for stats in new_stats])
+            utils.logger.info(f"[ProxyIpPool._load_new_proxies] load {len(new_stats)} proxies, {sum(results)} valid")
+
+    def _start_refill(self) -> asyncio.Task:
+        # 同时只有一个补充任务
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._load_new_proxies())
+            self._refill_task.add_done_callback(self._on_refill_done)
+        return self._refill_task
+
+    @staticmethod
+    def _on_refill_done(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            utils.logger.error(f"[ProxyIpPool._refill] refill proxies err: {task.exception()}")
+
+    async def _refill(self) -> None:
+        await asyncio.shield(self._start_refill())
+
+    async def get_proxy(self) -> IpInfoModel:
+        """
+        按健康度加权随机选择一个代理IP，只有在没有可用的代理IP时才会等待补充
+        :return:
+        """
+        available = self._available()
+        if not available:
+            await self._refill()
+            available = self._available()
+            if not available:
+                raise NoAvailableProxyError("[ProxyIpPool.get_proxy] no available proxy in the pool")
+        if len(available) <= config.IP_PROXY_REFILL_THRESHOLD:
+            self._start_refill()
+        return random.choices(available, weights=[stats.weight for stats in available])[0].proxy
+
+    def report_success(self, proxy: IpInfoModel, latency: float) -> None:
+        """
+        上报代理IP请求成功，用于计算成功率和延迟
+        :param proxy:
+        :param latency: 请求耗时（秒）
+        :return:
+        """
+        stats = self.proxies.get(make_proxy_key(proxy))
+        if stats is not None:
+            stats.record_success(latency)
 
-    async def _reload_proxies(self):
+    def report_failure(self, proxy: IpInfoModel, quarantine: bool = False) -> None:
         """
-        # 重新加载代理池
+        上报代理IP请求失败，连续失败之后隔离
+        :param proxy:
+        :param quarantine: 是否直接隔离，例如代理IP已经被平台封禁
         :return:
         """
-        self.proxy_list = []
-        await self.load_proxies()
+        stats = self.proxies.get(make_proxy_key(proxy))
+        if stats is not None:
+            self._record_failure(stats, quarantine=quarantine)
+
+    def is_available(self, proxy: IpInfoModel) -> bool:
+        """
+        代理IP是否还可以继续使用，已经移除、隔离中或者快要过期的代理IP不可用
+        :param proxy:
+        :return:
+        """
+        stats = self.proxies.get(make_proxy_key(proxy))
+        return stats is not None and not stats.is_quarantined() and not stats.is_expired(config.IP_PROXY_EXPIRE_MARGIN)
+
+    async def close(self) -> None:
+        for task in (self._validate_task, self._refill_task):
+            if task is not None and not task.done():
+                task.cancel()
+        self._validate_task = self._refill_task = None
+        if self._close_client_tasks:
+            await asyncio.gather(*self._close_client_tasks, return_exceptions=True)
 
 
 IpProxyProvider: Dict[str, ProxyProvider] = {
@@ -90,6 +259,9 @@ IpProxyProvider: Dict[str, ProxyProvider] = {
     ProviderNameEnum.KUAI_DAILI_PROVIDER.value: new_kuai_daili_proxy()
 }
 
+# 创建过的代理池，程序退出时停止后台检测
+ip_pools: List[ProxyIpPool] = []
+
 
 async def create_ip_pool(ip_pool_count: int, enable_validate_ip: bool) -> ProxyIpPool:
     """
@@ -103,8 +275,15 @@ async def create_ip_pool(ip_pool_count: int, enable_validate_ip: bool) -> ProxyI
                        ip_provider=IpProxyProvider.get(config.IP_PROXY_PROVIDER_NAME)
                        )
     await pool.load_proxies()
+    ip_pools.append(pool)
     return pool
 
 
+async def close_ip_pools() -> None:
+    for pool in ip_pools:
+        await pool.close()
+    ip_pools.clear()
+
+
 if __name__ == '__main__':
     pass
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/27 20:30
+# @Desc    : API 客户端的代理IP轮换，按请求次数从代理池中换代理IP，被封禁时自动换
+from typing import Optional
+
+import config
+from tools import utils
+
+from .proxy_ip_pool import ProxyIpPool
+from .types import IpInfoModel
+
+
+class ProxyRotator:
+    def __init__(self, ip_pool: ProxyIpPool, proxy: Optional[IpInfoModel] = None,
+                 rotate_every: Optional[int] = None, sticky: bool = False) -> None:
+        """
+        每个 API 客户端（一个账号）一个轮换器，请求前调用 get_proxy 获取本次请求使用的代理IP
+        :param ip_pool: 代理池
+        :param proxy: 初始的代理IP，一般是浏览器使用的代理IP
+        :param rotate_every: 每隔多少次请求换一个代理IP，1 表示每次请求都换，0 表示不按次数换
+        :param sticky: 登录态和 IP 绑定的平台固定使用一个代理IP，只有被封禁或者不可用时才换
+        """
+        self.ip_pool = ip_pool
+        self.current: Optional[IpInfoModel] = proxy
+        self.rotate_every = config.IP_PROXY_ROTATE_EVERY if rotate_every is None else rotate_every
+        self.sticky = sticky
+        self._requests = 0
+
+    def _should_rotate(self) -> bool:
+        if self.current is None or not self.ip_pool.is_available(self.current):
+            return True
+        if self.sticky or self.rotate_every <= 0:
+            return False
+        return self._requests >= self.rotate_every
+
+    async def get_proxy(self) -> IpInfoModel:
+        """
+        获取本次请求使用的代理IP
+        :return:
+        """
+        if self._should_rotate():
+            await self.rotate()
+        self._requests += 1
+        return self.current
+
+    async def rotate(self) -> IpInfoModel:
+        """
+        从代理池中换一个代理IP，已经隔离的代理IP不会再被分配
+        :return:
+        """
+        self.current = await self.ip_pool.get_proxy()
+        self._requests = 0
+        return self.current
+
+    def report_success(self, proxy: IpInfoModel, latency: float) -> None:
+        self.ip_pool.report_success(proxy, latency)
+
+    def report_failure(self, proxy: IpInfoModel) -> None:
+        self.ip_pool.report_failure(proxy)
+
+    def report_blocked(self, proxy: IpInfoModel) -> None:
+        """
+        代理IP被平台封禁，直接隔离，下次请求时换一个代理IP
+        :param proxy:
+        :return:
+        """
+        utils.logger.warning(f"[ProxyRotator.report_blocked] proxy {proxy.ip}:{proxy.port} is blocked, rotate it")
+        self.ip_pool.report_failure(proxy, quarantine=True)
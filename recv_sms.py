@@ -33,7 +33,7 @@ def extract_verification_code(message: str) -> str:
 
 
 @app.post("/")
-def receive_sms_notification(sms: SmsNotification):
+async def receive_sms_notification(sms: SmsNotification):
     """
     Receive SMS notification and send it to Redis.
     Args:
@@ -54,7 +54,7 @@ def receive_sms_notification(sms: SmsNotification):
     if sms_code:
         # Save the verification code in Redis and set the expiration time to 3 minutes.
         key = f"{sms.platform}_{sms.current_number}"
-        cache_client.set(key, sms_code, expire_time=60 * 3)
+        await cache_client.async_set(key, sms_code, expire_time=60 * 3)
 
     return {"status": "ok"}
 
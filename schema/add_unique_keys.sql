@@ -0,0 +1,72 @@
+-- ----------------------------
+-- 已有数据的数据库升级脚本：内容、评论、创作者ID增加唯一索引
+-- 存储时使用 INSERT ... ON DUPLICATE KEY UPDATE 批量写入，不再逐条查询之后插入或者更新
+-- 执行方式：mysql -u root -p media_crawler < schema/add_unique_keys.sql
+-- ----------------------------
+
+-- 删除重复的记录，保留最早添加的一条
+DELETE t1 FROM `bilibili_video` t1 JOIN `bilibili_video` t2 ON t1.`video_id` = t2.`video_id` AND t1.`id` > t2.`id`;
+DELETE t1 FROM `bilibili_video_comment` t1 JOIN `bilibili_video_comment` t2 ON t1.`comment_id` = t2.`comment_id` AND t1.`id` > t2.`id`;
+DELETE t1 FROM `bilibili_up_info` t1 JOIN `bilibili_up_info` t2 ON t1.`user_id` = t2.`user_id` AND t1.`id` > t2.`id`;
+DELETE t1 FROM `douyin_aweme` t1 JOIN `douyin_aweme` t2 ON t1.`aweme_id` = t2.`aweme_id` AND t1.`id` > t2.`id`;
+DELETE t1 FROM `douyin_aweme_comment` t1 JOIN `douyin_aweme_comment` t2 ON t1.`comment_id` = t2.`comment_id` AND t1.`id` > t2.`id`;
+DELETE t1 FROM `dy_creator` t1 JOIN `dy_creator` t2 ON t1.`user_id` = t2.`user_id` AND t1.`id` > t2.`id`;
+DELETE t1 FROM `kuaishou_video` t1 JOIN `kuaishou_video` t2 ON t1.`video_id` = t2.`video_id` AND t1.`id` > t2.`id`;
+DELETE t1 FROM `kuaishou_video_comment` t1 JOIN `kuaishou_video_comment` t2 ON t1.`comment_id` = t2.`comment_id` AND t1.`id` > t2.`id`;
+DELETE t1 FROM `weibo_note` t1 JOIN `weibo_note` t2 ON t1.`note_id` = t2.`note_id` AND t1.`id` > t2.`id`;
+DELETE t1 FROM `weibo_note_comment` t1 JOIN `weibo_note_comment` t2 ON t1.`comment_id` = t2.`comment_id` AND t1.`id` > t2.`id`;
+DELETE t1 FROM `weibo_creator` t1 JOIN `weibo_creator` t2 ON t1.`user_id` = t2.`user_id` AND t1.`id` > t2.`id`;
+DELETE t1 FROM `xhs_note` t1 JOIN `xhs_note` t2 ON t1.`note_id` = t2.`note_id` AND t1.`id` > t2.`id`;
+DELETE t1 FROM `xhs_note_comment` t1 JOIN `xhs_note_comment` t2 ON t1.`comment_id` = t2.`comment_id` AND t1.`id` > t2.`id`;
+DELETE t1 FROM `xhs_creator` t1 JOIN `xhs_creator` t2 ON t1.`user_id` = t2.`user_id` AND t1.`id` > t2.`id`;
+DELETE t1 FROM `tieba_note` t1 JOIN `tieba_note` t2 ON t1.`note_id` = t2.`note_id` AND t1.`id` > t2.`id`;
+DELETE t1 FROM `tieba_comment` t1 JOIN `tieba_comment` t2 ON t1.`comment_id` = t2.`comment_id` AND t1.`id` > t2.`id`;
+DELETE t1 FROM `tieba_creator` t1 JOIN `tieba_creator` t2 ON t1.`user_id` = t2.`user_id` AND t1.`id` > t2.`id`;
+
+-- 增加唯一索引，和唯一索引重复的普通索引一起删除
+ALTER TABLE `bilibili_video`
+    DROP INDEX `idx_bilibili_vi_video_i_31c36e`,
+    ADD UNIQUE KEY `uk_bilibili_video_video_id` (`video_id`);
+ALTER TABLE `bilibili_video_comment`
+    DROP INDEX `idx_bilibili_vi_comment_41c34e`,
+    ADD UNIQUE KEY `uk_bilibili_video_comment_comment_id` (`comment_id`);
+ALTER TABLE `bilibili_up_info`
+    DROP INDEX `idx_bilibili_vi_user_123456`,
+    ADD UNIQUE KEY `uk_bilibili_up_info_user_id` (`user_id`);
+ALTER TABLE `douyin_aweme`
+    DROP INDEX `idx_douyin_awem_aweme_i_6f7bc6`,
+    ADD UNIQUE KEY `uk_douyin_aweme_aweme_id` (`aweme_id`);
+ALTER TABLE `douyin_aweme_comment`
+    DROP INDEX `idx_douyin_awem_comment_fcd7e4`,
+    ADD UNIQUE KEY `uk_douyin_aweme_comment_comment_id` (`comment_id`);
+ALTER TABLE `dy_creator`
+    ADD UNIQUE KEY `uk_dy_creator_user_id` (`user_id`);
+ALTER TABLE `kuaishou_video`
+    DROP INDEX `idx_kuaishou_vi_video_i_c5c6a6`,
+    ADD UNIQUE KEY `uk_kuaishou_video_video_id` (`video_id`);
+ALTER TABLE `kuaishou_video_comment`
+    DROP INDEX `idx_kuaishou_vi_comment_ed48fa`,
+    ADD UNIQUE KEY `uk_kuaishou_video_comment_comment_id` (`comment_id`);
+ALTER TABLE `weibo_note`
+    DROP INDEX `idx_weibo_note_note_id_f95b1a`,
+    ADD UNIQUE KEY `uk_weibo_note_note_id` (`note_id`);
+ALTER TABLE `weibo_note_comment`
+    DROP INDEX `idx_weibo_note__comment_c7611c`,
+    ADD UNIQUE KEY `uk_weibo_note_comment_comment_id` (`comment_id`);
+ALTER TABLE `weibo_creator`
+    ADD UNIQUE KEY `uk_weibo_creator_user_id` (`user_id`);
+ALTER TABLE `xhs_note`
+    DROP INDEX `idx_xhs_note_note_id_209457`,
+    ADD UNIQUE KEY `uk_xhs_note_note_id` (`note_id`);
+ALTER TABLE `xhs_note_comment`
+    DROP INDEX `idx_xhs_note_co_comment_8e8349`,
+    ADD UNIQUE KEY `uk_xhs_note_comment_comment_id` (`comment_id`);
+ALTER TABLE `xhs_creator`
+    ADD UNIQUE KEY `uk_xhs_creator_user_id` (`user_id`);
+ALTER TABLE `tieba_note`
+    DROP INDEX `idx_tieba_note_note_id`,
+    ADD UNIQUE KEY `uk_tieba_note_note_id` (`note_id`);
+ALTER TABLE `tieba_comment`
+    ADD UNIQUE KEY `uk_tieba_comment_comment_id` (`comment_id`);
+ALTER TABLE `tieba_creator`
+    ADD UNIQUE KEY `uk_tieba_creator_user_id` (`user_id`);
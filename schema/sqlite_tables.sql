@@ -0,0 +1,385 @@
+-- ----------------------------
+-- SQLite 表结构，和 schema/tables.sql 保持一致，内容、评论、创作者ID使用唯一索引
+-- SAVE_DATA_OPTION 为 sqlite 时自动执行，表已经存在时不会重复创建
+-- ----------------------------
+
+-- B站视频
+CREATE TABLE IF NOT EXISTS `bilibili_video`
+(
+    `id`                  INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id`             TEXT,
+    `nickname`            TEXT,
+    `avatar`              TEXT,
+    `add_ts`              INTEGER,
+    `last_modify_ts`      INTEGER,
+    `video_id`            TEXT NOT NULL,
+    `video_type`          TEXT,
+    `title`               TEXT,
+    `desc`                TEXT,
+    `create_time`         INTEGER,
+    `liked_count`         TEXT,
+    `video_play_count`    TEXT,
+    `video_danmaku`       TEXT,
+    `video_comment`       TEXT,
+    `video_url`           TEXT,
+    `video_cover_url`     TEXT,
+    `source_keyword`      TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `uk_bilibili_video_video_id` ON `bilibili_video` (`video_id`);
+CREATE INDEX IF NOT EXISTS `idx_bilibili_video_create_time` ON `bilibili_video` (`create_time`);
+
+-- B 站视频评论
+CREATE TABLE IF NOT EXISTS `bilibili_video_comment`
+(
+    `id`                  INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id`             TEXT,
+    `nickname`            TEXT,
+    `avatar`              TEXT,
+    `add_ts`              INTEGER,
+    `last_modify_ts`      INTEGER,
+    `comment_id`          TEXT NOT NULL,
+    `video_id`            TEXT,
+    `content`             TEXT,
+    `create_time`         INTEGER,
+    `sub_comment_count`   TEXT,
+    `parent_comment_id`   TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `uk_bilibili_video_comment_comment_id` ON `bilibili_video_comment` (`comment_id`);
+CREATE INDEX IF NOT EXISTS `idx_bilibili_video_comment_video_id` ON `bilibili_video_comment` (`video_id`);
+
+-- B 站UP主信息
+CREATE TABLE IF NOT EXISTS `bilibili_up_info`
+(
+    `id`                  INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id`             TEXT NOT NULL,
+    `nickname`            TEXT,
+    `avatar`              TEXT,
+    `add_ts`              INTEGER,
+    `last_modify_ts`      INTEGER,
+    `total_fans`          INTEGER,
+    `total_liked`         INTEGER,
+    `user_rank`           INTEGER,
+    `is_official`         INTEGER
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `uk_bilibili_up_info_user_id` ON `bilibili_up_info` (`user_id`);
+
+-- 抖音视频
+CREATE TABLE IF NOT EXISTS `douyin_aweme`
+(
+    `id`                  INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id`             TEXT,
+    `sec_uid`             TEXT,
+    `short_user_id`       TEXT,
+    `user_unique_id`      TEXT,
+    `nickname`            TEXT,
+    `avatar`              TEXT,
+    `user_signature`      TEXT,
+    `ip_location`         TEXT,
+    `add_ts`              INTEGER,
+    `last_modify_ts`      INTEGER,
+    `aweme_id`            TEXT NOT NULL,
+    `aweme_type`          TEXT,
+    `title`               TEXT,
+    `desc`                TEXT,
+    `create_time`         INTEGER,
+    `liked_count`         TEXT,
+    `comment_count`       TEXT,
+    `share_count`         TEXT,
+    `collected_count`     TEXT,
+    `aweme_url`           TEXT,
+    `source_keyword`      TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `uk_douyin_aweme_aweme_id` ON `douyin_aweme` (`aweme_id`);
+CREATE INDEX IF NOT EXISTS `idx_douyin_aweme_create_time` ON `douyin_aweme` (`create_time`);
+
+-- 抖音视频评论
+CREATE TABLE IF NOT EXISTS `douyin_aweme_comment`
+(
+    `id`                  INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id`             TEXT,
+    `sec_uid`             TEXT,
+    `short_user_id`       TEXT,
+    `user_unique_id`      TEXT,
+    `nickname`            TEXT,
+    `avatar`              TEXT,
+    `user_signature`      TEXT,
+    `ip_location`         TEXT,
+    `add_ts`              INTEGER,
+    `last_modify_ts`      INTEGER,
+    `comment_id`          TEXT NOT NULL,
+    `aweme_id`            TEXT,
+    `content`             TEXT,
+    `create_time`         INTEGER,
+    `sub_comment_count`   TEXT,
+    `parent_comment_id`   TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `uk_douyin_aweme_comment_comment_id` ON `douyin_aweme_comment` (`comment_id`);
+CREATE INDEX IF NOT EXISTS `idx_douyin_aweme_comment_aweme_id` ON `douyin_aweme_comment` (`aweme_id`);
+
+-- 抖音博主信息
+CREATE TABLE IF NOT EXISTS `dy_creator`
+(
+    `id`                  INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id`             TEXT NOT NULL,
+    `nickname`            TEXT,
+    `avatar`              TEXT,
+    `ip_location`         TEXT,
+    `add_ts`              INTEGER,
+    `last_modify_ts`      INTEGER,
+    `desc`                TEXT,
+    `gender`              TEXT,
+    `follows`             TEXT,
+    `fans`                TEXT,
+    `interaction`         TEXT,
+    `videos_count`        TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `uk_dy_creator_user_id` ON `dy_creator` (`user_id`);
+
+-- 快手视频
+CREATE TABLE IF NOT EXISTS `kuaishou_video`
+(
+    `id`                  INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id`             TEXT,
+    `nickname`            TEXT,
+    `avatar`              TEXT,
+    `add_ts`              INTEGER,
+    `last_modify_ts`      INTEGER,
+    `video_id`            TEXT NOT NULL,
+    `video_type`          TEXT,
+    `title`               TEXT,
+    `desc`                TEXT,
+    `create_time`         INTEGER,
+    `liked_count`         TEXT,
+    `viewd_count`         TEXT,
+    `video_url`           TEXT,
+    `video_cover_url`     TEXT,
+    `video_play_url`      TEXT,
+    `source_keyword`      TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `uk_kuaishou_video_video_id` ON `kuaishou_video` (`video_id`);
+CREATE INDEX IF NOT EXISTS `idx_kuaishou_video_create_time` ON `kuaishou_video` (`create_time`);
+
+-- 快手视频评论
+CREATE TABLE IF NOT EXISTS `kuaishou_video_comment`
+(
+    `id`                  INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id`             TEXT,
+    `nickname`            TEXT,
+    `avatar`              TEXT,
+    `add_ts`              INTEGER,
+    `last_modify_ts`      INTEGER,
+    `comment_id`          TEXT NOT NULL,
+    `video_id`            TEXT,
+    `content`             TEXT,
+    `create_time`         INTEGER,
+    `sub_comment_count`   TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `uk_kuaishou_video_comment_comment_id` ON `kuaishou_video_comment` (`comment_id`);
+CREATE INDEX IF NOT EXISTS `idx_kuaishou_video_comment_video_id` ON `kuaishou_video_comment` (`video_id`);
+
+-- 微博帖子
+CREATE TABLE IF NOT EXISTS `weibo_note`
+(
+    `id`                  INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id`             TEXT,
+    `nickname`            TEXT,
+    `avatar`              TEXT,
+    `gender`              TEXT,
+    `profile_url`         TEXT,
+    `ip_location`         TEXT,
+    `add_ts`              INTEGER,
+    `last_modify_ts`      INTEGER,
+    `note_id`             TEXT NOT NULL,
+    `content`             TEXT,
+    `create_time`         INTEGER,
+    `create_date_time`    TEXT,
+    `liked_count`         TEXT,
+    `comments_count`      TEXT,
+    `shared_count`        TEXT,
+    `note_url`            TEXT,
+    `source_keyword`      TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `uk_weibo_note_note_id` ON `weibo_note` (`note_id`);
+CREATE INDEX IF NOT EXISTS `idx_weibo_note_create_time` ON `weibo_note` (`create_time`);
+CREATE INDEX IF NOT EXISTS `idx_weibo_note_create_date_time` ON `weibo_note` (`create_date_time`);
+
+-- 微博帖子评论
+CREATE TABLE IF NOT EXISTS `weibo_note_comment`
+(
+    `id`                  INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id`             TEXT,
+    `nickname`            TEXT,
+    `avatar`              TEXT,
+    `gender`              TEXT,
+    `profile_url`         TEXT,
+    `ip_location`         TEXT,
+    `add_ts`              INTEGER,
+    `last_modify_ts`      INTEGER,
+    `comment_id`          TEXT NOT NULL,
+    `note_id`             TEXT,
+    `content`             TEXT,
+    `create_time`         INTEGER,
+    `create_date_time`    TEXT,
+    `comment_like_count`  TEXT,
+    `sub_comment_count`   TEXT,
+    `parent_comment_id`   TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `uk_weibo_note_comment_comment_id` ON `weibo_note_comment` (`comment_id`);
+CREATE INDEX IF NOT EXISTS `idx_weibo_note_comment_note_id` ON `weibo_note_comment` (`note_id`);
+CREATE INDEX IF NOT EXISTS `idx_weibo_note_comment_create_date_time` ON `weibo_note_comment` (`create_date_time`);
+
+-- 小红书博主
+CREATE TABLE IF NOT EXISTS `xhs_creator`
+(
+    `id`                  INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id`             TEXT NOT NULL,
+    `nickname`            TEXT,
+    `avatar`              TEXT,
+    `ip_location`         TEXT,
+    `add_ts`              INTEGER,
+    `last_modify_ts`      INTEGER,
+    `desc`                TEXT,
+    `gender`              TEXT,
+    `follows`             TEXT,
+    `fans`                TEXT,
+    `interaction`         TEXT,
+    `tag_list`            TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `uk_xhs_creator_user_id` ON `xhs_creator` (`user_id`);
+
+-- 小红书笔记
+CREATE TABLE IF NOT EXISTS `xhs_note`
+(
+    `id`                  INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id`             TEXT,
+    `nickname`            TEXT,
+    `avatar`              TEXT,
+    `ip_location`         TEXT,
+    `add_ts`              INTEGER,
+    `last_modify_ts`      INTEGER,
+    `note_id`             TEXT NOT NULL,
+    `type`                TEXT,
+    `title`               TEXT,
+    `desc`                TEXT,
+    `video_url`           TEXT,
+    `time`                INTEGER,
+    `last_update_time`    INTEGER,
+    `liked_count`         TEXT,
+    `collected_count`     TEXT,
+    `comment_count`       TEXT,
+    `share_count`         TEXT,
+    `image_list`          TEXT,
+    `tag_list`            TEXT,
+    `note_url`            TEXT,
+    `source_keyword`      TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `uk_xhs_note_note_id` ON `xhs_note` (`note_id`);
+CREATE INDEX IF NOT EXISTS `idx_xhs_note_time` ON `xhs_note` (`time`);
+
+-- 小红书笔记评论
+CREATE TABLE IF NOT EXISTS `xhs_note_comment`
+(
+    `id`                  INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id`             TEXT,
+    `nickname`            TEXT,
+    `avatar`              TEXT,
+    `ip_location`         TEXT,
+    `add_ts`              INTEGER,
+    `last_modify_ts`      INTEGER,
+    `comment_id`          TEXT NOT NULL,
+    `create_time`         INTEGER,
+    `note_id`             TEXT,
+    `content`             TEXT,
+    `sub_comment_count`   INTEGER,
+    `pictures`            TEXT,
+    `parent_comment_id`   TEXT,
+    `like_count`          TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `uk_xhs_note_comment_comment_id` ON `xhs_note_comment` (`comment_id`);
+CREATE INDEX IF NOT EXISTS `idx_xhs_note_comment_create_time` ON `xhs_note_comment` (`create_time`);
+
+-- 贴吧帖子表
+CREATE TABLE IF NOT EXISTS `tieba_note`
+(
+    `id`                  INTEGER PRIMARY KEY AUTOINCREMENT,
+    `note_id`             TEXT NOT NULL,
+    `title`               TEXT,
+    `desc`                TEXT,
+    `note_url`            TEXT,
+    `publish_time`        TEXT,
+    `user_link`           TEXT,
+    `user_nickname`       TEXT,
+    `user_avatar`         TEXT,
+    `tieba_id`            TEXT,
+    `tieba_name`          TEXT,
+    `tieba_link`          TEXT,
+    `total_replay_num`    INTEGER,
+    `total_replay_page`   INTEGER,
+    `ip_location`         TEXT,
+    `add_ts`              INTEGER,
+    `last_modify_ts`      INTEGER,
+    `source_keyword`      TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `uk_tieba_note_note_id` ON `tieba_note` (`note_id`);
+CREATE INDEX IF NOT EXISTS `idx_tieba_note_publish_time` ON `tieba_note` (`publish_time`);
+
+-- 贴吧评论表
+CREATE TABLE IF NOT EXISTS `tieba_comment`
+(
+    `id`                  INTEGER PRIMARY KEY AUTOINCREMENT,
+    `comment_id`          TEXT NOT NULL,
+    `parent_comment_id`   TEXT,
+    `content`             TEXT,
+    `user_link`           TEXT,
+    `user_nickname`       TEXT,
+    `user_avatar`         TEXT,
+    `tieba_id`            TEXT,
+    `tieba_name`          TEXT,
+    `tieba_link`          TEXT,
+    `publish_time`        TEXT,
+    `ip_location`         TEXT,
+    `sub_comment_count`   INTEGER,
+    `note_id`             TEXT,
+    `note_url`            TEXT,
+    `add_ts`              INTEGER,
+    `last_modify_ts`      INTEGER
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `uk_tieba_comment_comment_id` ON `tieba_comment` (`comment_id`);
+CREATE INDEX IF NOT EXISTS `idx_tieba_comment_note_id` ON `tieba_comment` (`note_id`);
+CREATE INDEX IF NOT EXISTS `idx_tieba_comment_publish_time` ON `tieba_comment` (`publish_time`);
+
+-- 微博博主
+CREATE TABLE IF NOT EXISTS `weibo_creator`
+(
+    `id`                  INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id`             TEXT NOT NULL,
+    `nickname`            TEXT,
+    `avatar`              TEXT,
+    `ip_location`         TEXT,
+    `add_ts`              INTEGER,
+    `last_modify_ts`      INTEGER,
+    `desc`                TEXT,
+    `gender`              TEXT,
+    `follows`             TEXT,
+    `fans`                TEXT,
+    `tag_list`            TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `uk_weibo_creator_user_id` ON `weibo_creator` (`user_id`);
+
+-- 贴吧创作者
+CREATE TABLE IF NOT EXISTS `tieba_creator`
+(
+    `id`                  INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id`             TEXT NOT NULL,
+    `user_name`           TEXT,
+    `nickname`            TEXT,
+    `avatar`              TEXT,
+    `ip_location`         TEXT,
+    `add_ts`              INTEGER,
+    `last_modify_ts`      INTEGER,
+    `gender`              TEXT,
+    `follows`             TEXT,
+    `fans`                TEXT,
+    `registration_duration`TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `uk_tieba_creator_user_id` ON `tieba_creator` (`user_id`);
@@ -453,4 +453,56 @@ CREATE TABLE `tieba_creator`
     `fans`                  varchar(16)  DEFAULT NULL COMMENT '粉丝数',
     `registration_duration` varchar(16)  DEFAULT NULL COMMENT '吧龄',
     PRIMARY KEY (`id`)
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='贴吧创作者';
\ No newline at end of file
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='贴吧创作者';
+
+
+-- ----------------------------
+-- 内容、评论、创作者ID增加唯一索引，存储时使用 INSERT ... ON DUPLICATE KEY UPDATE 批量写入
+-- 已经有数据的数据库请执行 schema/add_unique_keys.sql
+-- ----------------------------
+ALTER TABLE `bilibili_video`
+    DROP INDEX `idx_bilibili_vi_video_i_31c36e`,
+    ADD UNIQUE KEY `uk_bilibili_video_video_id` (`video_id`);
+ALTER TABLE `bilibili_video_comment`
+    DROP INDEX `idx_bilibili_vi_comment_41c34e`,
+    ADD UNIQUE KEY `uk_bilibili_video_comment_comment_id` (`comment_id`);
+ALTER TABLE `bilibili_up_info`
+    DROP INDEX `idx_bilibili_vi_user_123456`,
+    ADD UNIQUE KEY `uk_bilibili_up_info_user_id` (`user_id`);
+ALTER TABLE `douyin_aweme`
+    DROP INDEX `idx_douyin_awem_aweme_i_6f7bc6`,
+    ADD UNIQUE KEY `uk_douyin_aweme_aweme_id` (`aweme_id`);
+ALTER TABLE `douyin_aweme_comment`
+    DROP INDEX `idx_douyin_awem_comment_fcd7e4`,
+    ADD UNIQUE KEY `uk_douyin_aweme_comment_comment_id` (`comment_id`);
+ALTER TABLE `dy_creator`
+    ADD UNIQUE KEY `uk_dy_creator_user_id` (`user_id`);
+ALTER TABLE `kuaishou_video`
+    DROP INDEX `idx_kuaishou_vi_video_i_c5c6a6`,
+    ADD UNIQUE KEY `uk_kuaishou_video_video_id` (`video_id`);
+ALTER TABLE `kuaishou_video_comment`
+    DROP INDEX `idx_kuaishou_vi_comment_ed48fa`,
+    ADD UNIQUE KEY `uk_kuaishou_video_comment_comment_id` (`comment_id`);
+ALTER TABLE `weibo_note`
+    DROP INDEX `idx_weibo_note_note_id_f95b1a`,
+    ADD UNIQUE KEY `uk_weibo_note_note_id` (`note_id`);
+ALTER TABLE `weibo_note_comment`
+    DROP INDEX `idx_weibo_note__comment_c7611c`,
+    ADD UNIQUE KEY `uk_weibo_note_comment_comment_id` (`comment_id`);
+ALTER TABLE `weibo_creator`
+    ADD UNIQUE KEY `uk_weibo_creator_user_id` (`user_id`);
+ALTER TABLE `xhs_note`
+    DROP INDEX `idx_xhs_note_note_id_209457`,
+    ADD UNIQUE KEY `uk_xhs_note_note_id` (`note_id`);
+ALTER TABLE `xhs_note_comment`
+    DROP INDEX `idx_xhs_note_co_comment_8e8349`,
+    ADD UNIQUE KEY `uk_xhs_note_comment_comment_id` (`comment_id`);
+ALTER TABLE `xhs_creator`
+    ADD UNIQUE KEY `uk_xhs_creator_user_id` (`user_id`);
+ALTER TABLE `tieba_note`
+    DROP INDEX `idx_tieba_note_note_id`,
+    ADD UNIQUE KEY `uk_tieba_note_note_id` (`note_id`);
+ALTER TABLE `tieba_comment`
+    ADD UNIQUE KEY `uk_tieba_comment_comment_id` (`comment_id`);
+ALTER TABLE `tieba_creator`
+    ADD UNIQUE KEY `uk_tieba_creator_user_id` (`user_id`);
@@ -3,9 +3,10 @@
 # @Time    : 2024/1/14 19:34
 # @Desc    :
 
-from typing import List
+from typing import List, Optional
 
 import config
+from tools.write_behind import write_behind_stores
 from var import source_keyword_var
 
 from .bilibili_store_impl import *
@@ -16,16 +17,24 @@ class BiliStoreFactory:
     STORES = {
         "csv": BiliCsvStoreImplement,
         "db": BiliDbStoreImplement,
-        "json": BiliJsonStoreImplement
+        "json": BiliJsonStoreImplement,
+        "jsonl": BiliJsonlStoreImplement,
+        "parquet": BiliParquetStoreImplement,
+        # sqlite 和 db 共用存储实现，区别只是 media_crawler_db_var 中的数据库对象
+        "sqlite": BiliDbStoreImplement
     }
+    # 一次运行中复用同一个存储实例，不用每条数据都创建一次
+    _store: Optional[AbstractStore] = None
 
     @staticmethod
     def create_store() -> AbstractStore:
         store_class = BiliStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[BiliStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
-        return store_class()
+                "[BiliStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or parquet or sqlite ...")
+        if type(BiliStoreFactory._store) is not store_class:
+            BiliStoreFactory._store = store_class()
+        return write_behind_stores.wrap(BiliStoreFactory._store)
 
 
 async def update_bilibili_video(video_item: Dict):
@@ -77,11 +86,16 @@ async def update_up_info(video_item: Dict):
 async def batch_update_bilibili_video_comments(video_id: str, comments: List[Dict]):
     if not comments:
         return
-    for comment_item in comments:
-        await update_bilibili_video_comment(video_id, comment_item)
+    save_comment_items = [_make_bilibili_video_comment_item(video_id, comment_item) for comment_item in comments]
+    await BiliStoreFactory.create_store().store_comments(save_comment_items)
 
 
 async def update_bilibili_video_comment(video_id: str, comment_item: Dict):
+    save_comment_item = _make_bilibili_video_comment_item(video_id, comment_item)
+    await BiliStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+
+
+def _make_bilibili_video_comment_item(video_id: str, comment_item: Dict) -> Dict:
     comment_id = str(comment_item.get("rpid"))
     parent_comment_id = str(comment_item.get("parent", 0))
     content: Dict = comment_item.get("content")
@@ -100,7 +114,7 @@ async def update_bilibili_video_comment(video_id: str, comment_item: Dict):
     }
     utils.logger.info(
         f"[store.bilibili.update_bilibili_video_comment] Bilibili video comment: {comment_id}, content: {save_comment_item.get('content')}")
-    await BiliStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    return save_comment_item
 
 
 async def store_video(aid, video_content, extension_file_name):
@@ -111,5 +125,16 @@ async def store_video(aid, video_content, extension_file_name):
         video_content:
         extension_file_name:
     """
-    await BilibiliVideo().store_video(
+    await write_behind_stores.store_media(
+        BilibiliVideo().store_video,
         {"aid": aid, "video_content": video_content, "extension_file_name": extension_file_name})
+
+
+def get_video_file_name(aid, extension_file_name) -> str:
+    """
+    video save path, the video is streamed to the file by the media downloader
+    Args:
+        aid:
+        extension_file_name:
+    """
+    return BilibiliVideo().make_save_file_name(str(aid), extension_file_name)
@@ -2,9 +2,10 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/1/14 18:46
 # @Desc    :
-from typing import List
+from typing import List, Optional
 
 import config
+from tools.write_behind import write_behind_stores
 from var import source_keyword_var
 
 from .douyin_store_impl import *
@@ -14,16 +15,24 @@ class DouyinStoreFactory:
     STORES = {
         "csv": DouyinCsvStoreImplement,
         "db": DouyinDbStoreImplement,
-        "json": DouyinJsonStoreImplement
+        "json": DouyinJsonStoreImplement,
+        "jsonl": DouyinJsonlStoreImplement,
+        "parquet": DouyinParquetStoreImplement,
+        # sqlite 和 db 共用存储实现，区别只是 media_crawler_db_var 中的数据库对象
+        "sqlite": DouyinDbStoreImplement
     }
+    # 一次运行中复用同一个存储实例，不用每条数据都创建一次
+    _store: Optional[AbstractStore] = None
 
     @staticmethod
     def create_store() -> AbstractStore:
         store_class = DouyinStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[DouyinStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
-        return store_class()
+                "[DouyinStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or parquet or sqlite ...")
+        if type(DouyinStoreFactory._store) is not store_class:
+            DouyinStoreFactory._store = store_class()
+        return write_behind_stores.wrap(DouyinStoreFactory._store)
 
 
 async def update_douyin_aweme(aweme_item: Dict):
@@ -60,16 +69,24 @@ async def update_douyin_aweme(aweme_item: Dict):
 async def batch_update_dy_aweme_comments(aweme_id: str, comments: List[Dict]):
     if not comments:
         return
-    for comment_item in comments:
-        await update_dy_aweme_comment(aweme_id, comment_item)
+    save_comment_items = [_make_dy_aweme_comment_item(aweme_id, comment_item) for comment_item in comments]
+    save_comment_items = [item for item in save_comment_items if item]
+    if save_comment_items:
+        await DouyinStoreFactory.create_store().store_comments(save_comment_items)
 
 
 async def update_dy_aweme_comment(aweme_id: str, comment_item: Dict):
+    save_comment_item = _make_dy_aweme_comment_item(aweme_id, comment_item)
+    if save_comment_item:
+        await DouyinStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+
+
+def _make_dy_aweme_comment_item(aweme_id: str, comment_item: Dict) -> Optional[Dict]:
     comment_aweme_id = comment_item.get("aweme_id")
     if aweme_id != comment_aweme_id:
         utils.logger.error(
             f"[store.douyin.update_dy_aweme_comment] comment_aweme_id: {comment_aweme_id} != aweme_id: {aweme_id}")
-        return
+        return None
     user_info = comment_item.get("user", {})
     comment_id = comment_item.get("cid")
     parent_comment_id = comment_item.get("reply_id", "0")
@@ -94,8 +111,7 @@ async def update_dy_aweme_comment(aweme_id: str, comment_item: Dict):
     }
     utils.logger.info(
         f"[store.douyin.update_dy_aweme_comment] douyin aweme comment: {comment_id}, content: {save_comment_item.get('content')}")
-
-    await DouyinStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    return save_comment_item
 
 
 
@@ -3,17 +3,19 @@
 # @Time    : 2024/1/14 18:46
 # @Desc    : 抖音存储实现类
 import asyncio
-import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 import aiofiles
 
 import config
 from base.base_crawler import AbstractStore
 from tools import utils, words
+from tools.csv_writer import csv_writers
+from tools.jsonl_writer import jsonl_writers
+from tools.parquet_writer import parquet_writers
 from var import crawler_type_var
 
 
@@ -57,13 +59,22 @@ class DouyinCsvStoreImplement(AbstractStore):
         Returns: no returns
 
         """
-        pathlib.Path(self.csv_store_path).mkdir(parents=True, exist_ok=True)
-        save_file_name = self.make_save_file_name(store_type=store_type)
-        async with aiofiles.open(save_file_name, mode='a+', encoding="utf-8-sig", newline="") as f:
-            writer = csv.writer(f)
-            if await f.tell() == 0:
-                await writer.writerow(save_item.keys())
-            await writer.writerow(save_item.values())
+        await self.save_items_to_csv([save_item], store_type)
+
+    async def save_items_to_csv(self, save_items: List[Dict], store_type: str):
+        """
+        Save a batch of items in CSV format, the file stays open and rows are buffered by the csv writer
+        Args:
+            save_items: save content dict info list
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns: no returns
+
+        """
+        if not save_items:
+            return
+        writer = csv_writers.get_writer(self.make_save_file_name(store_type=store_type))
+        await writer.write_many(save_items)
 
     async def store_content(self, content_item: Dict):
         """
@@ -98,8 +109,45 @@ class DouyinCsvStoreImplement(AbstractStore):
         """
         await self.save_data_to_csv(save_item=creator, store_type="creator")
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        content CSV storage implementation, one write per batch
+        Args:
+            content_items:
+
+        Returns:
+
+        """
+        await self.save_items_to_csv(content_items, "contents")
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        comment CSV storage implementation, one write per batch
+        Args:
+            comment_items:
+
+        Returns:
+
+        """
+        await self.save_items_to_csv(comment_items, "comments")
+
 
 class DouyinDbStoreImplement(AbstractStore):
+    @staticmethod
+    def fill_add_ts(items: List[Dict]) -> List[Dict]:
+        """
+        insert add_ts for new rows, it is not updated when the row already exists
+        Args:
+            items:
+
+        Returns:
+
+        """
+        add_ts = utils.get_current_timestamp()
+        for item in items:
+            item["add_ts"] = add_ts
+        return items
+
     async def store_content(self, content_item: Dict):
         """
         Douyin content DB storage implementation
@@ -109,58 +157,60 @@ class DouyinDbStoreImplement(AbstractStore):
         Returns:
 
         """
+        await self.store_contents([content_item])
 
-        from .douyin_store_sql import (add_new_content,
-                                       query_content_by_content_id,
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Douyin content DB storage implementation, insert or update the whole batch with one statement
+        Args:
+            content_items: content item dict list
+
+        Returns:
+
+        """
+        from .douyin_store_sql import (add_or_update_contents,
                                        update_content_by_content_id)
-        aweme_id = content_item.get("aweme_id")
-        aweme_detail: Dict = await query_content_by_content_id(content_id=aweme_id)
-        if not aweme_detail:
-            content_item["add_ts"] = utils.get_current_timestamp()
-            if content_item.get("title"):
-                await add_new_content(content_item)
-        else:
-            await update_content_by_content_id(aweme_id, content_item=content_item)
+
+        # 没有标题的视频只更新已有的记录，不新增
+        for content_item in content_items:
+            if not content_item.get("title"):
+                await update_content_by_content_id(content_item.get("aweme_id"), content_item=content_item)
+        await add_or_update_contents(self.fill_add_ts([item for item in content_items if item.get("title")]))
 
     async def store_comment(self, comment_item: Dict):
         """
-        Douyin content DB storage implementation
+        Douyin comment DB storage implementation
         Args:
             comment_item: comment item dict
 
         Returns:
 
         """
-        from .douyin_store_sql import (add_new_comment,
-                                       query_comment_by_comment_id,
-                                       update_comment_by_comment_id)
-        comment_id = comment_item.get("comment_id")
-        comment_detail: Dict = await query_comment_by_comment_id(comment_id=comment_id)
-        if not comment_detail:
-            comment_item["add_ts"] = utils.get_current_timestamp()
-            await add_new_comment(comment_item)
-        else:
-            await update_comment_by_comment_id(comment_id, comment_item=comment_item)
+        await self.store_comments([comment_item])
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Douyin comment DB storage implementation, insert or update the whole batch with one statement
+        Args:
+            comment_items: comment item dict list
+
+        Returns:
+
+        """
+        from .douyin_store_sql import add_or_update_comments
+        await add_or_update_comments(self.fill_add_ts(comment_items))
 
     async def store_creator(self, creator: Dict):
         """
-        Douyin content DB storage implementation
+        Douyin creator DB storage implementation
         Args:
             creator: creator dict
 
         Returns:
 
         """
-        from .douyin_store_sql import (add_new_creator,
-                                       query_creator_by_user_id,
-                                       update_creator_by_user_id)
-        user_id = creator.get("user_id")
-        user_detail: Dict = await query_creator_by_user_id(user_id)
-        if not user_detail:
-            creator["add_ts"] = utils.get_current_timestamp()
-            await add_new_creator(creator)
-        else:
-            await update_creator_by_user_id(user_id, creator)
+        from .douyin_store_sql import add_or_update_creators
+        await add_or_update_creators(self.fill_add_ts([creator]))
 
 class DouyinJsonStoreImplement(AbstractStore):
     json_store_path: str = "data/douyin/json"
@@ -168,7 +218,7 @@ class DouyinJsonStoreImplement(AbstractStore):
 
     lock = asyncio.Lock()
     file_count: int = calculate_number_of_files(json_store_path)
-    WordCloud = words.AsyncWordCloudGenerator()
+    WordCloud = words.word_cloud_generator
 
     def make_save_file_name(self, store_type: str) -> (str,str):
         """
@@ -194,9 +244,23 @@ class DouyinJsonStoreImplement(AbstractStore):
         Returns:
 
         """
+        await self.save_items_to_json([save_item], store_type)
+
+    async def save_items_to_json(self, save_items: List[Dict], store_type: str):
+        """
+        Save a batch of items in json format, the file is read and rewritten once per batch
+        Args:
+            save_items: save content dict info list
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns:
+
+        """
+        if not save_items:
+            return
         pathlib.Path(self.json_store_path).mkdir(parents=True, exist_ok=True)
         pathlib.Path(self.words_store_path).mkdir(parents=True, exist_ok=True)
-        save_file_name,words_file_name_prefix = self.make_save_file_name(store_type=store_type)
+        save_file_name, words_file_name_prefix = self.make_save_file_name(store_type=store_type)
         save_data = []
 
         async with self.lock:
@@ -204,15 +268,16 @@ class DouyinJsonStoreImplement(AbstractStore):
                 async with aiofiles.open(save_file_name, 'r', encoding='utf-8') as file:
                     save_data = json.loads(await file.read())
 
-            save_data.append(save_item)
+            save_data.extend(save_items)
             async with aiofiles.open(save_file_name, 'w', encoding='utf-8') as file:
                 await file.write(json.dumps(save_data, ensure_ascii=False))
 
-            if config.ENABLE_GET_COMMENTS and config.ENABLE_GET_WORDCLOUD:
-                try:
-                    await self.WordCloud.generate_word_frequency_and_cloud(save_data, words_file_name_prefix)
-                except:
-                    pass
+        # 只统计新增数据的词频，分词和生成词云图在进程池中执行
+        if config.ENABLE_GET_COMMENTS and config.ENABLE_GET_WORDCLOUD:
+            try:
+                await self.WordCloud.add_items(save_items, words_file_name_prefix)
+            except Exception as e:
+                utils.logger.error(f"[DouyinJsonStoreImplement.save_items_to_json] word frequency error: {e}")
 
     async def store_content(self, content_item: Dict):
         """
@@ -246,4 +311,216 @@ class DouyinJsonStoreImplement(AbstractStore):
         Returns:
 
         """
-        await self.save_data_to_json(save_item=creator, store_type="creator")
\ No newline at end of file
+        await self.save_data_to_json(save_item=creator, store_type="creator")
+
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        content JSON storage implementation, one write per batch
+        Args:
+            content_items:
+
+        Returns:
+
+        """
+        await self.save_items_to_json(content_items, "contents")
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        comment JSON storage implementation, one write per batch
+        Args:
+            comment_items:
+
+        Returns:
+
+        """
+        await self.save_items_to_json(comment_items, "comments")
+
+
+class DouyinJsonlStoreImplement(AbstractStore):
+    jsonl_store_path: str = "data/douyin/jsonl"
+
+    def make_file_prefix(self, store_type: str) -> str:
+        """
+        make save file prefix by store type
+        Args:
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns: eg: search_comments_2024-08-15, rotated files are search_comments_2024-08-15.0001.jsonl ...
+
+        """
+        return f"{crawler_type_var.get()}_{store_type}_{utils.get_current_date()}"
+
+    async def save_data_to_jsonl(self, save_item: Dict, store_type: str):
+        """
+        Append one item as a line, the writer buffers lines and rotates files
+        Args:
+            save_item: save content dict info
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns:
+
+        """
+        await self.save_items_to_jsonl([save_item], store_type)
+
+    async def save_items_to_jsonl(self, save_items: List[Dict], store_type: str):
+        """
+        Append a batch of items as lines
+        Args:
+            save_items: save content dict info list
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns:
+
+        """
+        writer = jsonl_writers.get_writer(self.jsonl_store_path, self.make_file_prefix(store_type))
+        await writer.write_many(save_items)
+
+    async def store_content(self, content_item: Dict):
+        """
+        content JSON Lines storage implementation
+        Args:
+            content_item:
+
+        Returns:
+
+        """
+        await self.save_data_to_jsonl(content_item, "contents")
+
+    async def store_comment(self, comment_item: Dict):
+        """
+        comment JSON Lines storage implementation
+        Args:
+            comment_item:
+
+        Returns:
+
+        """
+        await self.save_data_to_jsonl(comment_item, "comments")
+
+    async def store_creator(self, creator: Dict):
+        """
+        Douyin creator JSON Lines storage implementation
+        Args:
+            creator: creator dict
+
+        Returns:
+
+        """
+        await self.save_data_to_jsonl(creator, "creator")
+
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        content JSON Lines storage implementation, one write per batch
+        Args:
+            content_items:
+
+        Returns:
+
+        """
+        await self.save_items_to_jsonl(content_items, "contents")
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        comment JSON Lines storage implementation, one write per batch
+        Args:
+            comment_items:
+
+        Returns:
+
+        """
+        await self.save_items_to_jsonl(comment_items, "comments")
+
+
+class DouyinParquetStoreImplement(AbstractStore):
+    parquet_store_path: str = "data/douyin/parquet"
+
+    def make_file_prefix(self, store_type: str) -> str:
+        """
+        make save file prefix by store type
+        Args:
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns: eg: search_comments_2024-08-15, files are search_comments_2024-08-15.0001.parquet ...
+
+        """
+        return f"{crawler_type_var.get()}_{store_type}_{utils.get_current_date()}"
+
+    async def save_data_to_parquet(self, save_item: Dict, store_type: str):
+        """
+        Buffer one item, the writer writes a row group when the buffer is full
+        Args:
+            save_item: save content dict info
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns:
+
+        """
+        await self.save_items_to_parquet([save_item], store_type)
+
+    async def save_items_to_parquet(self, save_items: List[Dict], store_type: str):
+        """
+        Buffer a batch of items
+        Args:
+            save_items: save content dict info list
+            store_type: Save type contains content and comments（contents | comments）
+
+        Returns:
+
+        """
+        writer = parquet_writers.get_writer(self.parquet_store_path, self.make_file_prefix(store_type))
+        await writer.write_many(save_items)
+
+    async def store_content(self, content_item: Dict):
+        """
+        content Parquet storage implementation
+        Args:
+            content_item:
+
+        Returns:
+
+        """
+        await self.save_data_to_parquet(content_item, "contents")
+
+    async def store_comment(self, comment_item: Dict):
+        """
+        comment Parquet storage implementation
+        Args:
+            comment_item:
+
+        Returns:
+
+        """
+        await self.save_data_to_parquet(comment_item, "comments")
+
+    async def store_creator(self, creator: Dict):
+        """
+        Douyin creator Parquet storage implementation
+        Args:
+            creator: creator dict
+
+        Returns:
+
+        """
+        await self.save_data_to_parquet(creator, "creator")
+
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        content Parquet storage implementation, one write per batch
+        Args:
+            content_items:
+
+        Returns:
+
+        """
+        await self.save_items_to_parquet(content_items, "contents")
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        comment Parquet storage implementation, one write per batch
+        Args:
+            comment_items:
+
+        Returns:
+
+        """
+        await self.save_items_to_parquet(comment_items, "comments")
@@ -2,9 +2,10 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/1/14 20:03
 # @Desc    :
-from typing import List
+from typing import List, Optional
 
 import config
+from tools.write_behind import write_behind_stores
 from var import source_keyword_var
 
 from .kuaishou_store_impl import *
@@ -14,16 +15,24 @@ class KuaishouStoreFactory:
     STORES = {
         "csv": KuaishouCsvStoreImplement,
         "db": KuaishouDbStoreImplement,
-        "json": KuaishouJsonStoreImplement
+        "json": KuaishouJsonStoreImplement,
+        "jsonl": KuaishouJsonlStoreImplement,
+        "parquet": KuaishouParquetStoreImplement,
+        # sqlite 和 db 共用存储实现，区别只是 media_crawler_db_var 中的数据库对象
+        "sqlite": KuaishouDbStoreImplement
     }
+    # 一次运行中复用同一个存储实例，不用每条数据都创建一次
+    _store: Optional[AbstractStore] = None
 
     @staticmethod
     def create_store() -> AbstractStore:
         store_class = KuaishouStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[KuaishouStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
-        return store_class()
+                "[KuaishouStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or parquet or sqlite ...")
+        if type(KuaishouStoreFactory._store) is not store_class:
+            KuaishouStoreFactory._store = store_class()
+        return write_behind_stores.wrap(KuaishouStoreFactory._store)
 
 
 async def update_kuaishou_video(video_item: Dict):
@@ -58,11 +67,16 @@ async def batch_update_ks_video_comments(video_id: str, comments: List[Dict]):
     utils.logger.info(f"[store.kuaishou.batch_update_ks_video_comments] video_id:{video_id}, comments:{comments}")
     if not comments:
         return
-    for comment_item in comments:
-        await update_ks_video_comment(video_id, comment_item)
+    save_comment_items = [_make_ks_video_comment_item(video_id, comment_item) for comment_item in comments]
+    await KuaishouStoreFactory.create_store().store_comments(save_comment_items)
 
 
 async def update_ks_video_comment(video_id: str, comment_item: Dict):
+    save_comment_item = _make_ks_video_comment_item(video_id, comment_item)
+    await KuaishouStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+
+
+def _make_ks_video_comment_item(video_id: str, comment_item: Dict) -> Dict:
     comment_id = comment_item.get("commentId")
     save_comment_item = {
         "comment_id": comment_id,
@@ -77,7 +91,7 @@ async def update_ks_video_comment(video_id: str, comment_item: Dict):
     }
     utils.logger.info(
         f"[store.kuaishou.update_ks_video_comment] Kuaishou video comment: {comment_id}, content: {save_comment_item.get('content')}")
-    await KuaishouStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    return save_comment_item
 
 async def save_creator(user_id: str, creator: Dict):
     ownerCount = creator.get('ownerCount', {})
@@ -100,3 +100,37 @@ async def update_comment_by_comment_id(comment_id: str, comment_item: Dict) -> i
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
     effect_row: int = await async_db_conn.update_table("kuaishou_video_comment", comment_item, "comment_id", comment_id)
     return effect_row
+
+
+async def add_or_update_contents(content_items: List[Dict]) -> int:
+    """
+    批量新增或者更新内容记录，video_id 已经存在的记录只更新，add_ts 保持不变
+    Args:
+        content_items:
+
+    Returns:
+
+    """
+    if not content_items:
+        return 0
+    async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
+    update_columns = [column for column in content_items[0] if column not in ("video_id", "add_ts")]
+    effect_row: int = await async_db_conn.bulk_upsert("kuaishou_video", content_items, update_columns)
+    return effect_row
+
+
+async def add_or_update_comments(comment_items: List[Dict]) -> int:
+    """
+    批量新增或者更新评论记录，comment_id 已经存在的记录只更新，add_ts 保持不变
+    Args:
+        comment_items:
+
+    Returns:
+
+    """
+    if not comment_items:
+        return 0
+    async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
+    update_columns = [column for column in comment_items[0] if column not in ("comment_id", "add_ts")]
+    effect_row: int = await async_db_conn.bulk_upsert("kuaishou_video_comment", comment_items, update_columns)
+    return effect_row
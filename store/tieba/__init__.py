@@ -1,7 +1,8 @@
 # -*- coding: utf-8 -*-
-from typing import List
+from typing import List, Optional
 
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
+from tools.write_behind import write_behind_stores
 from var import source_keyword_var
 
 from . import tieba_store_impl
@@ -12,16 +13,24 @@ class TieBaStoreFactory:
     STORES = {
         "csv": TieBaCsvStoreImplement,
         "db": TieBaDbStoreImplement,
-        "json": TieBaJsonStoreImplement
+        "json": TieBaJsonStoreImplement,
+        "jsonl": TieBaJsonlStoreImplement,
+        "parquet": TieBaParquetStoreImplement,
+        # sqlite 和 db 共用存储实现，区别只是 media_crawler_db_var 中的数据库对象
+        "sqlite": TieBaDbStoreImplement
     }
+    # 一次运行中复用同一个存储实例，不用每条数据都创建一次
+    _store: Optional[AbstractStore] = None
 
     @staticmethod
     def create_store() -> AbstractStore:
         store_class = TieBaStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[TieBaStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
-        return store_class()
+                "[TieBaStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or parquet or sqlite ...")
+        if type(TieBaStoreFactory._store) is not store_class:
+            TieBaStoreFactory._store = store_class()
+        return write_behind_stores.wrap(TieBaStoreFactory._store)
 
 
 async def batch_update_tieba_notes(note_list: List[TiebaNote]):
@@ -35,8 +44,8 @@ async def batch_update_tieba_notes(note_list: List[TiebaNote]):
     """
     if not note_list:
         return
-    for note_item in note_list:
-        await update_tieba_note(note_item)
+    save_note_items = [_make_tieba_note_item(note_item) for note_item in note_list]
+    await TieBaStoreFactory.create_store().store_contents(save_note_items)
 
 
 async def update_tieba_note(note_item: TiebaNote):
@@ -47,13 +56,24 @@ async def update_tieba_note(note_item: TiebaNote):
 
     Returns:
 
+    """
+    await TieBaStoreFactory.create_store().store_content(_make_tieba_note_item(note_item))
+
+
+def _make_tieba_note_item(note_item: TiebaNote) -> Dict:
+    """
+    把帖子模型转换成保存的格式
+    Args:
+        note_item:
+
+    Returns:
+
     """
     note_item.source_keyword = source_keyword_var.get()
     save_note_item = note_item.model_dump()
     save_note_item.update({"last_modify_ts": utils.get_current_timestamp()})
     utils.logger.info(f"[store.tieba.update_tieba_note] tieba note: {save_note_item}")
-
-    await TieBaStoreFactory.create_store().store_content(save_note_item)
+    return save_note_item
 
 
 async def batch_update_tieba_note_comments(note_id: str, comments: List[TiebaComment]):
@@ -68,8 +88,8 @@ async def batch_update_tieba_note_comments(note_id: str, comments: List[TiebaCom
     """
     if not comments:
         return
-    for comment_item in comments:
-        await update_tieba_note_comment(note_id, comment_item)
+    save_comment_items = [_make_tieba_note_comment_item(note_id, comment_item) for comment_item in comments]
+    await TieBaStoreFactory.create_store().store_comments(save_comment_items)
 
 
 async def update_tieba_note_comment(note_id: str, comment_item: TiebaComment):
@@ -81,11 +101,24 @@ async def update_tieba_note_comment(note_id: str, comment_item: TiebaComment):
 
     Returns:
 
+    """
+    await TieBaStoreFactory.create_store().store_comment(_make_tieba_note_comment_item(note_id, comment_item))
+
+
+def _make_tieba_note_comment_item(note_id: str, comment_item: TiebaComment) -> Dict:
+    """
+    把评论模型转换成保存的格式
+    Args:
+        note_id:
+        comment_item:
+
+    Returns:
+
     """
     save_comment_item = comment_item.model_dump()
     save_comment_item.update({"last_modify_ts": utils.get_current_timestamp()})
     utils.logger.info(f"[store.tieba.update_tieba_note_comment] tieba note id: {note_id} comment:{save_comment_item}")
-    await TieBaStoreFactory.create_store().store_comment(save_comment_item)
+    return save_comment_item
 
 
 async def save_creator(user_info: TiebaCreator):
@@ -4,8 +4,9 @@
 # @Desc    :
 
 import re
-from typing import List
+from typing import List, Optional
 
+from tools.write_behind import write_behind_stores
 from var import source_keyword_var
 
 from .weibo_store_image import *
@@ -17,15 +18,23 @@ class WeibostoreFactory:
         "csv": WeiboCsvStoreImplement,
         "db": WeiboDbStoreImplement,
         "json": WeiboJsonStoreImplement,
+        "jsonl": WeiboJsonlStoreImplement,
+        "parquet": WeiboParquetStoreImplement,
+        # sqlite 和 db 共用存储实现，区别只是 media_crawler_db_var 中的数据库对象
+        "sqlite": WeiboDbStoreImplement
     }
+    # 一次运行中复用同一个存储实例，不用每条数据都创建一次
+    _store: Optional[AbstractStore] = None
 
     @staticmethod
     def create_store() -> AbstractStore:
         store_class = WeibostoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[WeibotoreFactory.create_store] Invalid save option only supported csv or db or json ...")
-        return store_class()
+                "[WeibotoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or parquet or sqlite ...")
+        if type(WeibostoreFactory._store) is not store_class:
+            WeibostoreFactory._store = store_class()
+        return write_behind_stores.wrap(WeibostoreFactory._store)
 
 
 async def batch_update_weibo_notes(note_list: List[Dict]):
@@ -39,8 +48,9 @@ async def batch_update_weibo_notes(note_list: List[Dict]):
     """
     if not note_list:
         return
-    for note_item in note_list:
-        await update_weibo_note(note_item)
+    save_content_items = [_make_weibo_note_item(note_item) for note_item in note_list if note_item]
+    if save_content_items:
+        await WeibostoreFactory.create_store().store_contents(save_content_items)
 
 
 async def update_weibo_note(note_item: Dict):
@@ -54,7 +64,18 @@ async def update_weibo_note(note_item: Dict):
     """
     if not note_item:
         return
+    await WeibostoreFactory.create_store().store_content(content_item=_make_weibo_note_item(note_item))
 
+
+def _make_weibo_note_item(note_item: Dict) -> Dict:
+    """
+    把接口返回的微博转换成保存的格式
+    Args:
+        note_item:
+
+    Returns:
+
+    """
     mblog: Dict = note_item.get("mblog")
     user_info: Dict = mblog.get("user")
     note_id = mblog.get("id")
@@ -84,7 +105,7 @@ async def update_weibo_note(note_item: Dict):
     }
     utils.logger.info(
         f"[store.weibo.update_weibo_note] weibo note id:{note_id}, title:{save_content_item.get('content')[:24]} ...")
-    await WeibostoreFactory.create_store().store_content(content_item=save_content_item)
+    return save_content_item
 
 
 async def batch_update_weibo_note_comments(note_id: str, comments: List[Dict]):
@@ -97,10 +118,12 @@ async def batch_update_weibo_note_comments(note_id: str, comments: List[Dict]):
     Returns:
 
     """
-    if not comments:
+    if not comments or not note_id:
         return
-    for comment_item in comments:
-        await update_weibo_note_comment(note_id, comment_item)
+    save_comment_items = [_make_weibo_note_comment_item(note_id, comment_item) for comment_item in comments if
+                          comment_item]
+    if save_comment_items:
+        await WeibostoreFactory.create_store().store_comments(save_comment_items)
 
 
 async def update_weibo_note_comment(note_id: str, comment_item: Dict):
@@ -115,6 +138,19 @@ async def update_weibo_note_comment(note_id: str, comment_item: Dict):
     """
     if not comment_item or not note_id:
         return
+    await WeibostoreFactory.create_store().store_comment(_make_weibo_note_comment_item(note_id, comment_item))
+
+
+def _make_weibo_note_comment_item(note_id: str, comment_item: Dict) -> Dict:
+    """
+    把接口返回的评论转换成保存的格式
+    Args:
+        note_id: weibo note id
+        comment_item: weibo comment item
+
+    Returns:
+
+    """
     comment_id = str(comment_item.get("id"))
     user_info: Dict = comment_item.get("user")
     content_text = comment_item.get("text")
@@ -140,7 +176,7 @@ async def update_weibo_note_comment(note_id: str, comment_item: Dict):
     }
     utils.logger.info(
         f"[store.weibo.update_weibo_note_comment] Weibo note comment: {comment_id}, content: {save_comment_item.get('content', '')[:24]} ...")
-    await WeibostoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    return save_comment_item
 
 
 async def update_weibo_note_image(picid: str, pic_content, extension_file_name):
@@ -154,10 +190,24 @@ async def update_weibo_note_image(picid: str, pic_content, extension_file_name):
     Returns:
 
     """
-    await WeiboStoreImage().store_image(
+    await write_behind_stores.store_media(
+        WeiboStoreImage().store_image,
         {"pic_id": picid, "pic_content": pic_content, "extension_file_name": extension_file_name})
 
 
+def get_weibo_note_image_file_name(picid: str, extension_file_name: str) -> str:
+    """
+    Weibo note image save path, the image is streamed to the file by the media downloader
+    Args:
+        picid:
+        extension_file_name:
+
+    Returns:
+
+    """
+    return WeiboStoreImage().make_save_file_name(picid, extension_file_name)
+
+
 async def save_creator(user_id: str, user_info: Dict):
     """
     Save creator information to local
@@ -2,9 +2,10 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/1/14 17:34
 # @Desc    :
-from typing import List
+from typing import List, Optional
 
 import config
+from tools.write_behind import write_behind_stores
 from var import source_keyword_var
 
 from . import xhs_store_impl
@@ -16,15 +17,23 @@ class XhsStoreFactory:
     STORES = {
         "csv": XhsCsvStoreImplement,
         "db": XhsDbStoreImplement,
-        "json": XhsJsonStoreImplement
+        "json": XhsJsonStoreImplement,
+        "jsonl": XhsJsonlStoreImplement,
+        "parquet": XhsParquetStoreImplement,
+        # sqlite 和 db 共用存储实现，区别只是 media_crawler_db_var 中的数据库对象
+        "sqlite": XhsDbStoreImplement
     }
+    # 一次运行中复用同一个存储实例，不用每条数据都创建一次
+    _store: Optional[AbstractStore] = None
 
     @staticmethod
     def create_store() -> AbstractStore:
         store_class = XhsStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[XhsStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
-        return store_class()
+            raise ValueError("[XhsStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or parquet or sqlite ...")
+        if type(XhsStoreFactory._store) is not store_class:
+            XhsStoreFactory._store = store_class()
+        return write_behind_stores.wrap(XhsStoreFactory._store)
 
 
 def get_video_url_arr(note_item: Dict) -> List:
@@ -113,8 +122,8 @@ async def batch_update_xhs_note_comments(note_id: str, comments: List[Dict]):
     """
     if not comments:
         return
-    for comment_item in comments:
-        await update_xhs_note_comment(note_id, comment_item)
+    save_comment_items = [_make_xhs_note_comment_item(note_id, comment_item) for comment_item in comments]
+    await XhsStoreFactory.create_store().store_comments(save_comment_items)
 
 
 async def update_xhs_note_comment(note_id: str, comment_item: Dict):
@@ -126,6 +135,19 @@ async def update_xhs_note_comment(note_id: str, comment_item: Dict):
 
     Returns:
 
+    """
+    await XhsStoreFactory.create_store().store_comment(_make_xhs_note_comment_item(note_id, comment_item))
+
+
+def _make_xhs_note_comment_item(note_id: str, comment_item: Dict) -> Dict:
+    """
+    把接口返回的评论转换成保存的格式
+    Args:
+        note_id:
+        comment_item:
+
+    Returns:
+
     """
     user_info = comment_item.get("user_info", {})
     comment_id = comment_item.get("id")
@@ -147,7 +169,7 @@ async def update_xhs_note_comment(note_id: str, comment_item: Dict):
         "like_count": comment_item.get("like_count", 0),
     }
     utils.logger.info(f"[store.xhs.update_xhs_note_comment] xhs note comment:{local_db_item}")
-    await XhsStoreFactory.create_store().store_comment(local_db_item)
+    return local_db_item
 
 
 async def save_creator(user_id: str, creator: Dict):
@@ -203,5 +225,19 @@ async def update_xhs_note_image(note_id, pic_content, extension_file_name):
 
     """
 
-    await XiaoHongShuImage().store_image(
+    await write_behind_stores.store_media(
+        XiaoHongShuImage().store_image,
         {"notice_id": note_id, "pic_content": pic_content, "extension_file_name": extension_file_name})
+
+
+def get_xhs_note_media_file_name(note_id: str, extension_file_name: str) -> str:
+    """
+    小红书笔记图片、视频的保存路径，媒体文件由下载器直接流式写入
+    Args:
+        note_id:
+        extension_file_name:
+
+    Returns:
+
+    """
+    return XiaoHongShuImage().make_save_file_name(note_id, extension_file_name)
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/17 20:10
+# @Desc    : AsyncMysqlDB 批量写入测试，不需要真实的数据库
+from unittest import IsolatedAsyncioTestCase
+
+from aiomysql.cursors import RE_INSERT_VALUES
+
+from async_db import AsyncMysqlDB
+
+
+class FakeCursor:
+    def __init__(self, executed: list):
+        self.executed = executed
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def executemany(self, sql, args):
+        self.executed.append((sql, args))
+        return len(args)
+
+
+class FakeConnection:
+    def __init__(self, executed: list):
+        self.executed = executed
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def cursor(self, *args):
+        return FakeCursor(self.executed)
+
+
+class FakePool:
+    def __init__(self):
+        self.executed = []
+
+    def acquire(self):
+        return FakeConnection(self.executed)
+
+
+class TestAsyncMysqlDB(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.pool = FakePool()
+        self.db = AsyncMysqlDB(self.pool)
+
+    async def test_bulk_upsert(self):
+        items = [{"comment_id": str(i), "content": f"评论 {i}", "add_ts": 1} for i in range(3)]
+        await self.db.bulk_upsert("xhs_note_comment", items, ["content"])
+        self.assertEqual(len(self.pool.executed), 1)
+        sql, args = self.pool.executed[0]
+        self.assertEqual(
+            sql,
+            "INSERT INTO xhs_note_comment (`comment_id`,`content`,`add_ts`) VALUES (%s,%s,%s) "
+            "ON DUPLICATE KEY UPDATE `content`=VALUES(`content`)"
+        )
+        self.assertEqual(args, [["0", "评论 0", 1], ["1", "评论 1", 1], ["2", "评论 2", 1]])
+        # aiomysql 能识别成多行 INSERT 语句，一次请求写入整批数据
+        self.assertIsNotNone(RE_INSERT_VALUES.match(sql))
+
+    async def test_bulk_upsert_without_update_columns(self):
+        await self.db.bulk_upsert("xhs_creator", [{"user_id": "1"}], [])
+        self.assertTrue(self.pool.executed[0][0].startswith("INSERT IGNORE INTO xhs_creator"))
+
+    async def test_bulk_upsert_empty(self):
+        self.assertEqual(await self.db.bulk_upsert("xhs_note", [], ["title"]), 0)
+        self.assertEqual(self.pool.executed, [])
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/28 21:00
+# @Desc    : 异步 RedisCache 测试，使用本地启动的简易 redis 服务代替真实的 redis
+import asyncio
+import time
+from fnmatch import fnmatchcase
+from typing import Dict, List, Optional, Tuple
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from cache import serializer
+from cache.cache_factory import CacheFactory
+from cache.redis_cache import RedisCache
+
+
+class StandInRedisServer:
+    """
+    只实现了测试用到的命令：AUTH、SELECT、PING、GET、SET EX、MGET、SCAN、DEL
+    """
+
+    def __init__(self) -> None:
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.commands: List[bytes] = []
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def port(self) -> int:
+        return self.server.sockets[0].getsockname()[1]
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+
+    async def close(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    @staticmethod
+    async def read_command(reader: asyncio.StreamReader) -> List[bytes]:
+        line = await reader.readline()
+        if not line:
+            return []
+        args = []
+        for _ in range(int(line[1:])):
+            length = int((await reader.readline())[1:])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+    @staticmethod
+    def encode(value) -> bytes:
+        if value is None:
+            return b"$-1\r\n"
+        if isinstance(value, int):
+            return b":%d\r\n" % value
+        if isinstance(value, list):
+            return b"*%d\r\n" % len(value) + b"".join(StandInRedisServer.encode(item) for item in value)
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        value, expire_at = self.data.get(key, (None, None))
+        if expire_at is not None and expire_at < time.monotonic():
+            self.data.pop(key)
+            return None
+        return value
+
+    def execute(self, args: List[bytes]) -> bytes:
+        command = args[0].upper()
+        self.commands.append(command)
+        if command in (b"AUTH", b"SELECT", b"PING", b"CLIENT"):
+            return b"+OK\r\n"
+        if command == b"GET":
+            return self.encode(self.get(args[1]))
+        if command == b"SET":
+            expire_at = None
+            if len(args) > 3 and args[3].upper() == b"EX":
+                expire_at = time.monotonic() + int(args[4])
+            self.data[args[1]] = (args[2], expire_at)
+            return b"+OK\r\n"
+        if command == b"MGET":
+            return self.encode([self.get(key) for key in args[1:]])
+        if command == b"DEL":
+            return self.encode(sum(self.data.pop(key, None) is not None for key in args[1:]))
+        if command == b"SCAN":
+            # 每次只返回 count 个 key，测试多次迭代
+            options = {args[i].upper(): args[i + 1] for i in range(2, len(args), 2)}
+            pattern = options.get(b"MATCH", b"*").decode()
+            count = int(options.get(b"COUNT", 10))
+            keys = sorted(key for key in list(self.data) if self.get(key) is not None)
+            cursor = int(args[1])
+            next_cursor = cursor + count if cursor + count < len(keys) else 0
+            matched = [key for key in keys[cursor:cursor + count] if fnmatchcase(key.decode(), pattern)]
+            return self.encode([str(next_cursor).encode(), matched])
+        return b"-ERR unknown command\r\n"
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        while True:
+            args = await self.read_command(reader)
+            if not args:
+                break
+            writer.write(self.execute(args))
+            await writer.drain()
+        writer.close()
+
+
+class TestSerializer(TestCase):
+    def test_round_trip(self):
+        for value in ["程序员阿江-Relakkes", "", b"\x00\x01", 1, 1.5, None, True, [1, "a"], {"ip": "127.0.0.1"}]:
+            self.assertEqual(serializer.loads(serializer.dumps(value)), value)
+        self.assertEqual(serializer.dumps("123456"), b"s123456")
+
+    def test_reject_unknown(self):
+        with self.assertRaises(serializer.SerializeError):
+            serializer.dumps(object())
+        with self.assertRaises(serializer.SerializeError):
+            serializer.loads(b"\x80\x04\x95")
+
+
+class TestAsyncRedisCache(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = StandInRedisServer()
+        await self.server.start()
+        self.cache: RedisCache = CacheFactory.create_cache("redis", host="127.0.0.1", port=self.server.port,
+                                                           db=0, password="", scan_count=2)
+
+    async def asyncTearDown(self):
+        await self.cache.close()
+        await self.server.close()
+
+    async def test_set_and_get(self):
+        await self.cache.async_set("key", {"ip": "127.0.0.1", "port": 8080}, 10)
+        self.assertEqual(await self.cache.async_get("key"), {"ip": "127.0.0.1", "port": 8080})
+        self.assertIsNone(await self.cache.async_get("not_exists"))
+
+    async def test_expired_key(self):
+        await self.cache.async_set("key", "value", 1)
+        await asyncio.sleep(1.1)
+        self.assertIsNone(await self.cache.async_get("key"))
+
+    async def test_mget_and_mset(self):
+        self.server.commands.clear()
+        await self.cache.mset({f"kuaidaili_{i}": f"ip_{i}" for i in range(5)}, 10)
+        self.assertEqual(await self.cache.mget(["kuaidaili_0", "kuaidaili_4", "not_exists"]),
+                         ["ip_0", "ip_4", None])
+        self.assertEqual(self.server.commands.count(b"MGET"), 1)
+        self.assertEqual(await self.cache.mget([]), [])
+
+    async def test_keys_by_scan(self):
+        await self.cache.mset({"kuaidaili_1": "1", "kuaidaili_2": "2", "jisu_1": "3"}, 10)
+        self.server.commands.clear()
+        self.assertEqual(sorted(await self.cache.async_keys("kuaidaili_*")), ["kuaidaili_1", "kuaidaili_2"])
+        self.assertNotIn(b"KEYS", self.server.commands)
+        self.assertGreater(self.server.commands.count(b"SCAN"), 1)
+
+    async def test_skip_pickled_value(self):
+        self.server.data[b"old"] = (b"\x80\x04\x95", None)
+        self.assertIsNone(await self.cache.async_get("old"))
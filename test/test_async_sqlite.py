@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/20 21:00
+# @Desc    : SQLite 存储测试
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from async_sqlite import AsyncSqliteDB
+from store.douyin.douyin_store_impl import DouyinDbStoreImplement
+from store.xhs.xhs_store_impl import XhsDbStoreImplement
+from var import media_crawler_db_var
+
+
+def make_comment(comment_id: int, like_count: int = 0):
+    return {
+        "comment_id": str(comment_id),
+        "create_time": 1724150000000 + comment_id,
+        "ip_location": "上海",
+        "note_id": "note_1",
+        "content": f"评论 {comment_id}",
+        "user_id": f"user_{comment_id}",
+        "nickname": "nickname",
+        "avatar": "",
+        "sub_comment_count": 0,
+        "pictures": "",
+        "parent_comment_id": 0,
+        "last_modify_ts": 1724150000000,
+        "like_count": str(like_count),
+    }
+
+
+class TestAsyncSqliteDB(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = AsyncSqliteDB(os.path.join(self.tmp_dir.name, "media_crawler.db"))
+        await self.db.init_schema("schema/sqlite_tables.sql")
+        self.token = media_crawler_db_var.set(self.db)
+
+    async def asyncTearDown(self):
+        media_crawler_db_var.reset(self.token)
+        await self.db.close()
+        self.tmp_dir.cleanup()
+
+    async def test_wal_mode(self):
+        row = await self.db.get_first("PRAGMA journal_mode")
+        self.assertEqual(row["journal_mode"], "wal")
+
+    async def test_store_comments_upsert(self):
+        store = XhsDbStoreImplement()
+        await store.store_comments([make_comment(i) for i in range(100)])
+        rows = await self.db.query("select comment_id, add_ts, like_count from xhs_note_comment order by id")
+        self.assertEqual(len(rows), 100)
+        add_ts = rows[0]["add_ts"]
+
+        # 已经存在的评论只更新，add_ts 保持不变
+        await store.store_comments([make_comment(i, like_count=10) for i in range(50, 150)])
+        rows = await self.db.query("select comment_id, add_ts, like_count from xhs_note_comment order by id")
+        self.assertEqual(len(rows), 150)
+        self.assertEqual({row["like_count"] for row in rows[50:]}, {"10"})
+        self.assertEqual({row["like_count"] for row in rows[:50]}, {"0"})
+        row = await self.db.get_first("select add_ts from xhs_note_comment where comment_id = %s", "60")
+        self.assertEqual(row["add_ts"], add_ts)
+
+    async def test_init_schema_twice(self):
+        await XhsDbStoreImplement().store_creator({"user_id": "1", "nickname": "a", "last_modify_ts": 1})
+        await self.db.init_schema("schema/sqlite_tables.sql")
+        rows = await self.db.query("select * from xhs_creator")
+        self.assertEqual(len(rows), 1)
+
+    async def test_douyin_content_without_title(self):
+        store = DouyinDbStoreImplement()
+        await store.store_content({"aweme_id": "1", "title": "", "last_modify_ts": 1})
+        self.assertEqual(await self.db.query("select * from douyin_aweme"), [])
+        await store.store_content({"aweme_id": "1", "title": "title", "last_modify_ts": 1})
+        await store.store_content({"aweme_id": "1", "title": "", "last_modify_ts": 2})
+        rows = await self.db.query("select title, last_modify_ts from douyin_aweme")
+        self.assertEqual(rows, [{"title": "", "last_modify_ts": 2}])
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/13 22:40
+# @Desc    : 自适应并发控制器测试
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from tools.concurrency_limiter import AdaptiveConcurrencyLimiter
+
+
+class TestAdaptiveConcurrencyLimiter(IsolatedAsyncioTestCase):
+
+    def create_limiter(self, **kwargs) -> AdaptiveConcurrencyLimiter:
+        params = dict(name="test", initial_limit=2, min_limit=1, max_limit=8, window_size=10)
+        params.update(kwargs)
+        return AdaptiveConcurrencyLimiter(**params)
+
+    async def test_limit_in_flight(self):
+        limiter = self.create_limiter(initial_limit=3, max_limit=None)
+        max_in_flight = 0
+
+        async def worker():
+            nonlocal max_in_flight
+            async with limiter:
+                max_in_flight = max(max_in_flight, limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*[worker() for _ in range(20)])
+        self.assertEqual(max_in_flight, 3)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_additive_increase(self):
+        limiter = self.create_limiter()
+        for _ in range(30):
+            limiter.record_success(100)
+        self.assertEqual(limiter.limit, 5)
+        for _ in range(100):
+            limiter.record_success(100)
+        self.assertEqual(limiter.limit, 8)
+
+    def test_multiplicative_decrease_on_failure(self):
+        limiter = self.create_limiter(initial_limit=8)
+        # 一批连续的失败在同一个冷却窗口内只减小一次
+        for _ in range(5):
+            limiter.record_failure("IPBlockError")
+        self.assertEqual(limiter.limit, 4)
+        for _ in range(5):
+            limiter.record_success(100)
+        # 窗口结束之后成功率仍然不达标，但刚刚已经减小过，不再减小
+        self.assertEqual(limiter.limit, 4)
+        limiter.record_failure("DataFetchError")
+        self.assertEqual(limiter.limit, 2)
+
+    def test_decrease_on_latency_spike(self):
+        limiter = self.create_limiter(initial_limit=4)
+        for _ in range(10):
+            limiter.record_success(100)
+        self.assertEqual(limiter.limit, 5)
+        for _ in range(10):
+            limiter.record_success(500)
+        self.assertEqual(limiter.limit, 2)
+
+    def test_fixed_limit(self):
+        limiter = self.create_limiter(initial_limit=3, min_limit=3, max_limit=None)
+        for _ in range(50):
+            limiter.record_success(100)
+        limiter.record_failure("IPBlockError")
+        self.assertEqual(limiter.limit, 3)
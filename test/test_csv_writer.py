@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/19 21:00
+# @Desc    : CSV 写入器测试
+import asyncio
+import csv
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from tools.csv_writer import CsvWriter
+
+
+class TestCsvWriter(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.tmp_dir.name, "csv", "1_search_comments_2024-08-19.csv")
+
+    async def asyncTearDown(self):
+        self.tmp_dir.cleanup()
+
+    def read_rows(self):
+        with open(self.file_name, encoding="utf-8-sig", newline="") as f:
+            return list(csv.reader(f))
+
+    async def test_buffer_and_header_once(self):
+        writer = CsvWriter(self.file_name, flush_records=10, flush_interval=3600)
+        await writer.write_many([{"comment_id": str(i), "content": f"评论,{i}"} for i in range(5)])
+        self.assertEqual(os.path.getsize(self.file_name), 0)
+        await writer.write_many([{"comment_id": str(i), "content": f"评论,{i}"} for i in range(5, 10)])
+        self.assertEqual(len(self.read_rows()), 11)
+        await writer.write({"comment_id": "10", "content": "评论,10"})
+        await writer.close()
+
+        # 再次打开时追加数据，不重复写表头
+        writer = CsvWriter(self.file_name, flush_records=10, flush_interval=3600)
+        await writer.write({"comment_id": "11", "content": "评论,11"})
+        await writer.close()
+        rows = self.read_rows()
+        self.assertEqual(rows[0], ["comment_id", "content"])
+        self.assertEqual([row[0] for row in rows[1:]], [str(i) for i in range(12)])
+        self.assertEqual(rows[1][1], "评论,0")
+
+    async def test_concurrent_write(self):
+        writer = CsvWriter(self.file_name, flush_records=7, flush_interval=3600)
+
+        async def write_task(task_id: int):
+            for i in range(20):
+                await writer.write({"task_id": str(task_id), "index": str(i)})
+                await asyncio.sleep(0)
+
+        await asyncio.gather(*[write_task(task_id) for task_id in range(5)])
+        await writer.close()
+        rows = self.read_rows()
+        self.assertEqual(rows[0], ["task_id", "index"])
+        self.assertEqual(len(rows), 101)
+        self.assertEqual(sorted(tuple(row) for row in rows[1:]),
+                         sorted((str(task_id), str(i)) for task_id in range(5) for i in range(20)))
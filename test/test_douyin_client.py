@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/4 15:20
+# @Desc    : 抖音 API client 并发请求测试
+import asyncio
+import time
+from unittest import IsolatedAsyncioTestCase, mock
+
+import httpx
+
+from media_platform.douyin.client import DOUYINClient
+from media_platform.douyin.exception import IPBlockError
+
+
+class FakePage:
+    """模拟 playwright page, 只返回签名需要的数据"""
+
+    async def evaluate(self, expression, arg=None):
+        if "localStorage" in expression:
+            return "fake_ms_token"
+        return "fake_a_bogus"
+
+
+class TestDouYinClient(IsolatedAsyncioTestCase):
+    request_delay = 0.2
+    concurrency = 5
+
+    async def asyncSetUp(self):
+        async def handler(request: httpx.Request) -> httpx.Response:
+            await asyncio.sleep(self.request_delay)
+            if request.url.params.get("aweme_id") == "blocked":
+                return httpx.Response(200, text="blocked")
+            return httpx.Response(200, json={"aweme_detail": {"aweme_id": request.url.params["aweme_id"]}})
+
+        self.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        self.dy_client = DOUYINClient(
+            headers={"User-Agent": "test-agent", "Origin": "https://www.douyin.com/"},
+            playwright_page=FakePage(),
+            cookie_dict={},
+        )
+        self.patcher = mock.patch.object(DOUYINClient, "get_http_client", return_value=self.http_client)
+        self.patcher.start()
+        # 只测试请求之间是否并发，不受限流配置影响
+        self.rate_limit_patcher = mock.patch("config.ENABLE_RATE_LIMIT", False)
+        self.rate_limit_patcher.start()
+
+    async def test_get_video_by_id_concurrently(self):
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *[self.dy_client.get_video_by_id(str(aweme_id)) for aweme_id in range(self.concurrency)]
+        )
+        elapsed = time.perf_counter() - start
+        print(f"\n{self.concurrency} concurrent get_video_by_id calls took {elapsed:.3f}s, "
+              f"serial would take {self.concurrency * self.request_delay:.3f}s")
+
+        self.assertEqual([item["aweme_id"] for item in results], [str(i) for i in range(self.concurrency)])
+        # 请求之间互相重叠, 总耗时应该远小于串行执行的耗时
+        self.assertLess(elapsed, self.concurrency * self.request_delay / 2)
+
+    async def test_blocked_response(self):
+        # 被封禁时抛出 IPBlockError，开启代理轮换时会隔离当前的代理IP
+        with self.assertRaises(IPBlockError):
+            await self.dy_client.get_video_by_id("blocked")
+
+    async def asyncTearDown(self):
+        self.patcher.stop()
+        self.rate_limit_patcher.stop()
+        await self.http_client.aclose()
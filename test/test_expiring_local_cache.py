@@ -4,10 +4,33 @@
 # @Time    : 2024/6/2 10:35
 # @Desc    :
 
+import os
 import time
 import unittest
+from typing import Any, Dict, List, Tuple
 
-from cache.local_cache import ExpiringLocalCache
+from cache.local_cache import ExpiringLocalCache, get_literal_prefix
+
+
+class LegacyExpiringLocalCache:
+    """
+    重写之前的实现，只用于性能对比：清理时扫描全部的键，keys 按子串匹配
+    """
+
+    def __init__(self):
+        self._cache_container: Dict[str, Tuple[Any, float]] = {}
+
+    def set(self, key: str, value: Any, expire_time: int) -> None:
+        self._cache_container[key] = (value, time.time() + expire_time)
+
+    def keys(self, pattern: str) -> List[str]:
+        pattern = pattern.replace('*', '')
+        return [key for key in self._cache_container.keys() if pattern in key]
+
+    def _clear(self):
+        for key, (value, expire_time) in list(self._cache_container.items()):
+            if expire_time < time.time():
+                del self._cache_container[key]
 
 
 class TestExpiringLocalCache(unittest.TestCase):
@@ -31,6 +54,84 @@ class TestExpiringLocalCache(unittest.TestCase):
         time.sleep(12)
         self.assertIsNone(self.cache.get('key'))
 
+    def test_keys_glob(self):
+        for key in ["kuaidaili_1", "kuaidaili_2", "kuaidaili_10", "jisu_1", "kuaidaili"]:
+            self.cache.set(key, 'value', 10)
+        self.assertEqual(get_literal_prefix("kuaidaili_?"), "kuaidaili_")
+        self.assertEqual(sorted(self.cache.keys("kuaidaili_*")), ["kuaidaili_1", "kuaidaili_10", "kuaidaili_2"])
+        self.assertEqual(sorted(self.cache.keys("kuaidaili_?")), ["kuaidaili_1", "kuaidaili_2"])
+        self.assertEqual(sorted(self.cache.keys("*_1")), ["jisu_1", "kuaidaili_1"])
+        self.assertEqual(self.cache.keys("kuaidaili"), ["kuaidaili"])
+        self.assertEqual(len(self.cache.keys("*")), 5)
+
+        # 删除、重新设置之后索引保持一致
+        self.cache.delete("kuaidaili_1")
+        self.cache.set("kuaidaili_1", 'value', 10)
+        self.cache.set("kuaidaili_3", 'value', 10)
+        self.assertEqual(self.cache.keys("kuaidaili_[13]"), ["kuaidaili_1", "kuaidaili_3"])
+
+    def test_clear_by_heap(self):
+        self.cache.set('key1', 'value', 0)
+        self.cache.set('key2', 'value', 0)
+        self.cache.set('key3', 'value', 10)
+        # 重新设置之后堆中的旧记录不会删除新的值
+        self.cache.set('key2', 'value', 10)
+        time.sleep(0.01)
+        self.cache._clear()
+        self.assertEqual(sorted(self.cache.keys("key*")), ["key2", "key3"])
+        self.assertEqual(self.cache.stats["expirations"], 1)
+
+    def test_lru_eviction(self):
+        cache = ExpiringLocalCache(cron_interval=10, max_entries=2)
+        cache.set('key1', 'value', 10)
+        cache.set('key2', 'value', 10)
+        self.assertEqual(cache.get('key1'), 'value')
+        cache.set('key3', 'value', 10)
+        self.assertIsNone(cache.get('key2'))
+        self.assertEqual(cache.keys("key*"), ["key1", "key3"])
+        self.assertEqual(cache.stats, {"size": 2, "bytes": cache.stats["bytes"], "hits": 1, "misses": 1,
+                                       "evictions": 1, "expirations": 0})
+
+        cache = ExpiringLocalCache(cron_interval=10, max_bytes=2000)
+        for i in range(10):
+            cache.set(f'key{i}', 'v' * 500, 10)
+        self.assertLessEqual(cache.stats["bytes"], 2000)
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(cache.get('key9'), 'v' * 500)
+
+    @unittest.skipUnless(os.getenv("RUN_BENCHMARK"), "set RUN_BENCHMARK=1 to run the benchmark")
+    def test_benchmark(self):
+        key_count = 1000000
+        keys = [f"ip_{i % 100}_{i}" for i in range(key_count)]
+        for cache in (LegacyExpiringLocalCache(), self.cache):
+            start = time.perf_counter()
+            for i, key in enumerate(keys):
+                # 1% 的键马上过期
+                cache.set(key, i, 0 if i % 100 == 0 else 600)
+            set_cost = time.perf_counter() - start
+            time.sleep(0.01)
+
+            start = time.perf_counter()
+            cache._clear()
+            clear_cost = time.perf_counter() - start
+            start = time.perf_counter()
+            cache._clear()
+            second_clear_cost = time.perf_counter() - start
+
+            # 第一次查询时建立有序索引
+            start = time.perf_counter()
+            cache.keys("ip_7_*")
+            keys_cost = time.perf_counter() - start
+            start = time.perf_counter()
+            matched = cache.keys("ip_7_*")
+            second_keys_cost = time.perf_counter() - start
+
+            print(f"\n{type(cache).__name__} with {key_count} keys: set {set_cost:.2f}s, "
+                  f"clear {clear_cost * 1000:.1f}ms, clear again {second_clear_cost * 1000:.2f}ms, "
+                  f"keys {keys_cost * 1000:.1f}ms, keys again {second_keys_cost * 1000:.1f}ms")
+        self.assertEqual(len(matched), key_count // 100)
+        self.assertEqual(len(self.cache), key_count - key_count // 100)
+
     def tearDown(self):
         del self.cache
 
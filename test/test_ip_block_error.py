@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/31 15:10
+# @Desc    : 请求被封禁时爬虫记录错误并跳过，不会中断整批任务
+from unittest import IsolatedAsyncioTestCase, mock
+
+import httpx
+
+from media_platform.bilibili.client import BilibiliClient
+from media_platform.bilibili.core import BilibiliCrawler
+from media_platform.douyin.client import DOUYINClient
+from media_platform.douyin.core import DouYinCrawler
+from media_platform.douyin.exception import DataFetchError, IPBlockError
+
+
+class FakeDouYinPage:
+    async def evaluate(self, expression, arg=None):
+        if "localStorage" in expression:
+            return "fake_ms_token"
+        return "fake_a_bogus"
+
+
+class FakeBilibiliPage:
+    async def evaluate(self, expression, arg=None):
+        return {"wbi_img_urls": "https://i0.hdslb.com/bfs/wbi/7cd084941338484aae1ad9425b84077c.png-"
+                                "https://i0.hdslb.com/bfs/wbi/4932caff0ff746eab6f01bf08b70ac45.png"}
+
+
+class TestIPBlockError(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        async def handler(request: httpx.Request) -> httpx.Response:
+            params = request.url.params
+            if params.get("aweme_id") == "blocked":
+                return httpx.Response(200, text="blocked")
+            if "aweme_id" in params:
+                return httpx.Response(200, json={"aweme_detail": {"aweme_id": params["aweme_id"]}})
+            if params.get("bvid") == "blocked" or params.get("oid") == "412":
+                return httpx.Response(412)
+            if "bvid" in params:
+                return httpx.Response(200, json={"code": 0, "data": {"View": {"aid": 1, "bvid": params["bvid"]}}})
+            return httpx.Response(200, json={"code": 0, "data": {"cursor": {"is_end": True, "next": 0}, "replies": [
+                {"rpid": 1, "oid": params.get("oid")}]}})
+
+        self.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        self.patchers = [
+            mock.patch.object(DOUYINClient, "get_http_client", return_value=self.http_client),
+            mock.patch.object(BilibiliClient, "get_http_client", return_value=self.http_client),
+            mock.patch("config.ENABLE_RATE_LIMIT", False),
+            mock.patch("config.ENABLE_REQUEST_COALESCING", False),
+            mock.patch("config.ENABLE_GET_COMMENTS", True),
+            mock.patch("config.ENABLE_GET_SUB_COMMENTS", False),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+    async def asyncTearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+        await self.http_client.aclose()
+
+    def test_ip_block_error_is_data_fetch_error(self):
+        self.assertTrue(issubclass(IPBlockError, DataFetchError))
+
+    async def test_douyin_specified_awemes(self):
+        crawler = DouYinCrawler()
+        crawler.dy_client = DOUYINClient(headers={"User-Agent": "test-agent", "Origin": "https://www.douyin.com/"},
+                                         playwright_page=FakeDouYinPage(),
+                                         cookie_dict={})
+        with mock.patch("config.DY_SPECIFIED_ID_LIST", ["1", "blocked", "2"]), \
+                mock.patch("config.ENABLE_GET_COMMENTS", False), \
+                mock.patch("store.douyin.update_douyin_aweme") as update_douyin_aweme:
+            await crawler.get_specified_awemes()
+        self.assertEqual([call.args[0]["aweme_id"] for call in update_douyin_aweme.call_args_list], ["1", "2"])
+
+    async def test_bilibili_video_comments(self):
+        crawler = BilibiliCrawler()
+        crawler.bili_client = BilibiliClient(headers={"User-Agent": "test-agent"},
+                                             playwright_page=FakeBilibiliPage(), cookie_dict={})
+        with mock.patch("store.bilibili.batch_update_bilibili_video_comments") as batch_update_comments:
+            await crawler.batch_get_video_comments(["1", "412", "2"])
+        self.assertEqual(sorted(call.args[0] for call in batch_update_comments.call_args_list), ["1", "2"])
+
+    async def test_bilibili_specified_videos(self):
+        crawler = BilibiliCrawler()
+        crawler.bili_client = BilibiliClient(headers={"User-Agent": "test-agent"},
+                                             playwright_page=FakeBilibiliPage(), cookie_dict={})
+        with mock.patch("config.ENABLE_GET_COMMENTS", False), mock.patch("config.ENABLE_GET_IMAGES", False), \
+                mock.patch("store.bilibili.update_bilibili_video") as update_bilibili_video:
+            await crawler.get_specified_videos(["BV1", "blocked", "BV2"])
+        self.assertEqual([call.args[0]["View"]["bvid"] for call in update_bilibili_video.call_args_list],
+                         ["BV1", "BV2"])
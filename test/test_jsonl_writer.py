@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/15 22:00
+# @Desc    : JSON Lines 存储测试
+import json
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from tools.jsonl_writer import JsonlWriter, export_all, export_json_array
+
+
+class TestJsonlWriter(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store_path = os.path.join(self.tmp_dir.name, "jsonl")
+        self.items = [{"note_id": str(i), "title": f"标题 {i}", "liked_count": i} for i in range(25)]
+
+    async def asyncTearDown(self):
+        self.tmp_dir.cleanup()
+
+    def read_manifest(self, file_prefix: str):
+        with open(os.path.join(self.store_path, f"{file_prefix}.manifest.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    async def test_buffered_write(self):
+        writer = JsonlWriter(self.store_path, "search_contents", max_bytes=0, rotate_interval=0,
+                             flush_records=10, flush_interval=3600)
+        await writer.write_many(self.items[:5])
+        self.assertFalse(os.path.exists(writer.manifest_path))
+        await writer.write_many(self.items[5:])
+        await writer.close()
+
+        manifest = self.read_manifest("search_contents")
+        self.assertEqual(manifest["total_records"], 25)
+        self.assertEqual(len(manifest["parts"]), 1)
+        with open(os.path.join(self.store_path, manifest["parts"][0]["file"]), encoding="utf-8") as f:
+            self.assertEqual([json.loads(line) for line in f], self.items)
+
+    async def test_rotate_by_size(self):
+        writer = JsonlWriter(self.store_path, "search_contents", max_bytes=200, rotate_interval=0,
+                             flush_records=1, flush_interval=3600)
+        for item in self.items:
+            await writer.write(item)
+        await writer.close()
+
+        manifest = self.read_manifest("search_contents")
+        self.assertGreater(len(manifest["parts"]), 1)
+        self.assertEqual(sum(part["records"] for part in manifest["parts"]), 25)
+        for part in manifest["parts"]:
+            self.assertEqual(os.path.getsize(os.path.join(self.store_path, part["file"])), part["bytes"])
+            self.assertLess(part["bytes"] - 200, 100)
+
+    async def test_reopen_appends_to_manifest(self):
+        writer = JsonlWriter(self.store_path, "search_contents", max_bytes=0, flush_records=100)
+        await writer.write_many(self.items[:10])
+        await writer.close()
+        writer = JsonlWriter(self.store_path, "search_contents", max_bytes=0, flush_records=100)
+        await writer.write_many(self.items[10:])
+        await writer.close()
+        self.assertEqual(self.read_manifest("search_contents")["total_records"], 25)
+
+    async def test_export_same_as_json_store(self):
+        writer = JsonlWriter(self.store_path, "search_contents", max_bytes=300, rotate_interval=0,
+                             flush_records=3, flush_interval=3600)
+        await writer.write_many(self.items)
+        await writer.close()
+
+        output_file = os.path.join(self.tmp_dir.name, "json", "search_contents.json")
+        count = await export_json_array(self.store_path, "search_contents", output_file)
+        self.assertEqual(count, 25)
+        with open(output_file, encoding="utf-8") as f:
+            # json 存储方式写入的内容
+            self.assertEqual(f.read(), json.dumps(self.items, ensure_ascii=False))
+
+    async def test_export_all(self):
+        for file_prefix in ["search_contents", "search_comments"]:
+            writer = JsonlWriter(self.store_path, file_prefix, flush_records=100)
+            await writer.write_many(self.items)
+            await writer.close()
+        result = await export_all(self.store_path, os.path.join(self.tmp_dir.name, "json"))
+        self.assertEqual(sorted(os.path.basename(path) for path in result),
+                         ["search_comments.json", "search_contents.json"])
+        self.assertEqual(set(result.values()), {25})
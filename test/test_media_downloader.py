@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/24 21:00
+# @Desc    : 流式媒体下载测试
+import asyncio
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from tools.media_downloader import MediaDownloader
+
+CONTENT = bytes(range(256)) * 1024
+
+
+class TestMediaDownloader(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.tmp_dir.name, "videos", "1", "video.mp4")
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        self.tmp_dir.cleanup()
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        range_header = request.headers.get("Range")
+        if range_header:
+            offset = int(range_header[len("bytes="):-1])
+            if offset >= len(CONTENT):
+                return httpx.Response(416)
+            return httpx.Response(206, content=CONTENT[offset:])
+        return httpx.Response(200, content=CONTENT)
+
+    async def test_download_and_skip_existing(self):
+        downloader = MediaDownloader(workers=2, chunk_size=4096, max_file_size=0, max_file_seconds=0)
+        self.assertTrue(await downloader.download(self.client, "https://example.com/v.mp4", self.file_name))
+        with open(self.file_name, "rb") as f:
+            self.assertEqual(f.read(), CONTENT)
+        self.assertFalse(os.path.exists(downloader.make_part_file_name(self.file_name)))
+
+        self.assertTrue(await downloader.download(self.client, "https://example.com/v.mp4", self.file_name))
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_resume_partial_file(self):
+        downloader = MediaDownloader(workers=2, chunk_size=4096, max_file_size=0, max_file_seconds=0)
+        part_file_name = downloader.make_part_file_name(self.file_name)
+        os.makedirs(os.path.dirname(self.file_name))
+        with open(part_file_name, "wb") as f:
+            f.write(CONTENT[:1000])
+        self.assertTrue(await downloader.download(self.client, "https://example.com/v.mp4", self.file_name))
+        self.assertEqual(self.requests[0].headers["Range"], "bytes=1000-")
+        with open(self.file_name, "rb") as f:
+            self.assertEqual(f.read(), CONTENT)
+
+    async def test_size_limit(self):
+        downloader = MediaDownloader(workers=2, chunk_size=4096, max_file_size=1024, max_file_seconds=0)
+        self.assertFalse(await downloader.download(self.client, "https://example.com/v.mp4", self.file_name))
+        self.assertFalse(os.path.exists(self.file_name))
+        self.assertFalse(os.path.exists(downloader.make_part_file_name(self.file_name)))
+
+    async def test_bounded_workers_and_dedup(self):
+        downloader = MediaDownloader(workers=2, chunk_size=4096, max_file_size=0, max_file_seconds=0)
+        file_names = [os.path.join(self.tmp_dir.name, f"{i}.jpg") for i in range(6)]
+        results = await asyncio.gather(
+            *[downloader.download(self.client, f"https://example.com/{i}.jpg", file_name)
+              for i, file_name in enumerate(file_names)],
+            # 同一个文件同时只下载一次
+            downloader.download(self.client, "https://example.com/0.jpg", file_names[0]),
+        )
+        self.assertTrue(all(results))
+        self.assertEqual(len(self.requests), 6)
+        self.assertLessEqual(self.max_in_flight, 2)
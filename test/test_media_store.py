@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/25 21:00
+# @Desc    : 按内容寻址的媒体文件存储测试
+import errno
+import json
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase, mock
+
+from tools.media_store import MediaBlobStore, make_url_key
+
+
+class TestMediaBlobStore(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store_path = os.path.join(self.tmp_dir.name, "media")
+        self.images_path = os.path.join(self.tmp_dir.name, "xhs", "images")
+        self.store = MediaBlobStore(self.store_path, hardlink=True)
+        self.downloaded = []
+
+    async def asyncTearDown(self):
+        self.tmp_dir.cleanup()
+
+    def make_download(self, url: str, content: bytes):
+        async def download(file_name: str) -> bool:
+            self.downloaded.append(url)
+            with open(file_name, "wb") as f:
+                f.write(content)
+            return True
+
+        return download
+
+    async def fetch(self, store: MediaBlobStore, url: str, note_id: str, name: str, content: bytes) -> bool:
+        file_name = os.path.join(self.images_path, note_id, name)
+        return await store.fetch(url, file_name, self.make_download(url, content))
+
+    def read_manifest(self, note_id: str):
+        with open(os.path.join(self.images_path, note_id, "manifest.jsonl"), encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def count_blobs(self) -> int:
+        return sum(len(files) for _, _, files in os.walk(os.path.join(self.store_path, "blobs")))
+
+    def test_url_key_ignore_query(self):
+        self.assertEqual(make_url_key("https://cdn.com/a/1.jpg?sign=1"), make_url_key("http://cdn.com/a/1.jpg?sign=2"))
+        self.assertNotEqual(make_url_key("https://cdn.com/a/1.jpg"), make_url_key("https://cdn.com/a/2.jpg"))
+
+    async def test_dedup_across_notes_and_runs(self):
+        self.assertTrue(await self.fetch(self.store, "https://cdn.com/1.jpg?t=1", "note1", "0.jpg", b"avatar"))
+        # 同一个 url 在别的笔记中出现时不再下载
+        self.assertTrue(await self.fetch(self.store, "https://cdn.com/1.jpg?t=2", "note2", "3.jpg", b"avatar"))
+        # 不同 url 的相同内容只保存一份
+        self.assertTrue(await self.fetch(self.store, "https://cdn.com/2.jpg", "note2", "4.jpg", b"avatar"))
+        self.assertEqual(self.downloaded, ["https://cdn.com/1.jpg?t=1", "https://cdn.com/2.jpg"])
+        self.assertEqual(self.count_blobs(), 1)
+
+        manifest = self.read_manifest("note2")
+        self.assertEqual([item["file"] for item in manifest], ["3.jpg", "4.jpg"])
+        self.assertEqual(manifest[0]["blob"], manifest[1]["blob"])
+        with open(os.path.join(self.images_path, "note2", "3.jpg"), "rb") as f:
+            self.assertEqual(f.read(), b"avatar")
+
+        # 下次运行从 index.jsonl 加载，重新爬取时不再下载
+        store = MediaBlobStore(self.store_path, hardlink=False)
+        self.assertTrue(await self.fetch(store, "https://cdn.com/1.jpg", "note3", "0.jpg", b"avatar"))
+        self.assertEqual(len(self.downloaded), 2)
+        self.assertEqual(store.hits, 1)
+        self.assertFalse(os.path.exists(os.path.join(self.images_path, "note3", "0.jpg")))
+
+    async def test_ingest_existing_file(self):
+        os.makedirs(os.path.join(self.images_path, "note1"))
+        with open(os.path.join(self.images_path, "note1", "0.jpg"), "wb") as f:
+            f.write(b"old")
+        self.assertTrue(await self.fetch(self.store, "https://cdn.com/old.jpg", "note1", "0.jpg", b"new"))
+        self.assertEqual(self.downloaded, [])
+        self.assertEqual(self.count_blobs(), 1)
+
+    async def test_manifest_not_duplicated_on_recrawl(self):
+        await self.fetch(self.store, "https://cdn.com/1.jpg", "note1", "0.jpg", b"avatar")
+        await self.fetch(self.store, "https://cdn.com/1.jpg", "note1", "0.jpg", b"avatar")
+        # 下次运行重新爬取同一篇笔记
+        store = MediaBlobStore(self.store_path, hardlink=False)
+        await self.fetch(store, "https://cdn.com/1.jpg?t=2", "note1", "0.jpg", b"avatar")
+        self.assertEqual(len(self.read_manifest("note1")), 1)
+        # 文件指向了新的 blob 时追加记录
+        await self.fetch(store, "https://cdn.com/1.jpg", "note2", "0.jpg", b"avatar")
+        await self.fetch(store, "https://cdn.com/3.jpg", "note2", "0.jpg", b"cover")
+        manifest = self.read_manifest("note2")
+        self.assertEqual(len(manifest), 2)
+        self.assertNotEqual(manifest[0]["blob"], manifest[1]["blob"])
+
+    async def test_copy_when_hardlink_failed(self):
+        os.makedirs(os.path.join(self.images_path, "note1"))
+        with open(os.path.join(self.images_path, "note1", "0.jpg"), "wb") as f:
+            f.write(b"old")
+        cross_device = OSError(errno.EXDEV, "Invalid cross-device link")
+        with mock.patch("tools.media_store.os.link", side_effect=cross_device):
+            self.assertTrue(await self.fetch(self.store, "https://cdn.com/old.jpg", "note1", "0.jpg", b"new"))
+        self.assertEqual(self.count_blobs(), 1)
+        blob = self.read_manifest("note1")[0]["blob"]
+        with open(os.path.join(self.store_path, blob), "rb") as f:
+            self.assertEqual(f.read(), b"old")
+
+    async def test_download_failed(self):
+        async def download(file_name: str) -> bool:
+            return False
+
+        file_name = os.path.join(self.images_path, "note1", "0.jpg")
+        self.assertFalse(await self.store.fetch("https://cdn.com/1.jpg", file_name, download))
+        self.assertFalse(os.path.exists(self.store.index_file))
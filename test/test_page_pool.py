@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/10 17:05
+# @Desc    : 签名页面池测试
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from playwright.async_api import Error
+
+from tools.page_pool import NoAvailablePageError, PlaywrightPagePool
+
+
+class FakePage:
+    """模拟 playwright page，每次 evaluate 耗时 delay 秒"""
+
+    def __init__(self, name: str, delay: float = 0.1, broken: bool = False):
+        self.name = name
+        self.delay = delay
+        self.broken = broken
+        self.closed = False
+        self.evaluate_count = 0
+        # 签名 JS 本身抛出的异常
+        self.script_error = ""
+        self.reload_failed = False
+        self.reload_delay = 0.0
+
+    async def goto(self, url):
+        pass
+
+    async def reload(self):
+        await asyncio.sleep(self.reload_delay)
+        if self.reload_failed:
+            raise Error("net::ERR_CONNECTION_RESET")
+        self.broken = False
+
+    async def wait_for_function(self, expression, timeout=None):
+        pass
+
+    async def evaluate(self, expression, arg=None):
+        if self.broken:
+            raise Error("Execution context was destroyed")
+        if self.script_error:
+            raise Error(self.script_error)
+        self.evaluate_count += 1
+        await asyncio.sleep(self.delay)
+        return self.name
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowserContext:
+    def __init__(self):
+        self.pages = []
+
+    async def new_page(self):
+        page = FakePage(f"page-{len(self.pages)}")
+        self.pages.append(page)
+        return page
+
+
+class TestPlaywrightPagePool(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.browser_context = FakeBrowserContext()
+        self.main_page = FakePage("main")
+
+    def create_pool(self, **kwargs) -> PlaywrightPagePool:
+        return PlaywrightPagePool(
+            browser_context=self.browser_context,  # type: ignore
+            url="https://example.com",
+            main_page=self.main_page,  # type: ignore
+            ready_js="() => true",
+            **kwargs,
+        )
+
+    async def test_evaluate_spread_across_pages(self):
+        pool = self.create_pool(size=4)
+        await pool.start()
+        results = await asyncio.gather(*[pool.evaluate("sign()") for _ in range(8)])
+        self.assertEqual(len(set(results)), 4)
+        self.assertEqual(self.main_page.evaluate_count, 2)
+        await pool.close()
+        self.assertTrue(all(page.closed for page in self.browser_context.pages))
+        self.assertFalse(self.main_page.closed)
+
+    async def test_retry_on_broken_page(self):
+        pool = self.create_pool(size=2)
+        await pool.start()
+        self.main_page.broken = True
+        results = await asyncio.gather(*[pool.evaluate("sign()") for _ in range(2)])
+        self.assertEqual(results, ["page-0", "page-0"])
+        await asyncio.sleep(0)
+        # 出错的主页面被刷新回收
+        self.assertFalse(self.main_page.broken)
+        self.assertTrue(pool.slots[0].healthy)
+        await pool.close()
+
+    async def test_recycle_after_max_uses(self):
+        pool = self.create_pool(size=2, max_uses=2)
+        await pool.start()
+        for _ in range(4):
+            await pool.evaluate("sign()")
+        await asyncio.sleep(0.01)
+        # 额外页面达到使用次数后被替换，主页面不按次数回收
+        self.assertEqual(len(self.browser_context.pages), 2)
+        self.assertTrue(self.browser_context.pages[0].closed)
+        self.assertIs(pool.slots[0].page, self.main_page)
+        await pool.close()
+
+    async def test_script_error_keep_page(self):
+        pool = self.create_pool(size=2)
+        await pool.start()
+        self.main_page.script_error = "TypeError: window._webmsxyw is not a function"
+        with self.assertRaises(Error) as cm:
+            await pool.evaluate("sign()")
+        self.assertEqual(cm.exception.message, self.main_page.script_error)
+        # JS 异常不重试，也不回收主页面
+        self.assertEqual(self.browser_context.pages[0].evaluate_count, 0)
+        self.assertTrue(pool.slots[0].healthy)
+        await pool.close()
+
+    async def test_no_available_page_after_recycle_failed(self):
+        pool = self.create_pool(size=1)
+        await pool.start()
+        self.main_page.broken = True
+        self.main_page.reload_failed = True
+        # 重试时等待主页面回收，回收失败之后不会一直等下去
+        with self.assertRaises(NoAvailablePageError):
+            await pool.evaluate("sign()")
+        self.assertFalse(pool.slots[0].healthy)
+        with self.assertRaises(NoAvailablePageError):
+            await pool.evaluate("sign()")
+        await pool.close()
+
+    async def test_acquire_timeout(self):
+        pool = self.create_pool(size=1, acquire_timeout=0.2)
+        await pool.start()
+        self.main_page.broken = True
+        self.main_page.reload_delay = 1
+        with self.assertRaises(NoAvailablePageError):
+            await pool.evaluate("sign()")
+        await pool.close()
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/21 21:00
+# @Desc    : Parquet 写入器测试
+import os
+import tempfile
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from tools.parquet_writer import ParquetWriter, ParquetWriterRegistry, is_parquet_available
+
+
+@unittest.skipUnless(is_parquet_available(), "pyarrow is not installed")
+class TestParquetWriter(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.tmp_dir.name, "parquet", "search_comments_2024-08-21.0001.parquet")
+
+    async def asyncTearDown(self):
+        self.tmp_dir.cleanup()
+
+    @staticmethod
+    def make_comment(i: int):
+        return {
+            "comment_id": str(i),
+            "content": f"评论{i}",
+            "like_count": i,
+            "ip_location": "上海" if i % 2 else "北京",
+            "nickname": "user",
+            "pictures": None,
+            "sub_comments": [{"id": i}],
+        }
+
+    async def test_row_groups_and_types(self):
+        import pyarrow.parquet as pq
+
+        writer = ParquetWriter(self.file_name, row_group_size=4, compression="snappy")
+        await writer.write_many([self.make_comment(i) for i in range(3)])
+        self.assertFalse(os.path.exists(self.file_name))
+        await writer.write_many([self.make_comment(i) for i in range(3, 9)])
+        # 后面的数据类型和第一批不一致时转换成第一批的类型
+        await writer.write({**self.make_comment(9), "like_count": "9", "pictures": "a.jpg"})
+        await writer.close()
+
+        parquet_file = pq.ParquetFile(self.file_name)
+        self.assertEqual(parquet_file.metadata.num_rows, 10)
+        self.assertEqual(parquet_file.metadata.num_row_groups, 2)
+        table = parquet_file.read()
+        self.assertEqual(str(table.schema.field("like_count").type), "int64")
+        self.assertEqual(str(table.schema.field("pictures").type), "string")
+        rows = table.to_pylist()
+        self.assertEqual([row["like_count"] for row in rows], list(range(10)))
+        self.assertEqual(rows[9]["pictures"], "a.jpg")
+        self.assertEqual(rows[0]["sub_comments"], '[{"id": 0}]')
+
+        column = parquet_file.metadata.row_group(0).column(table.schema.get_field_index("ip_location"))
+        self.assertIn("RLE_DICTIONARY", column.encodings)
+        column = parquet_file.metadata.row_group(0).column(table.schema.get_field_index("content"))
+        self.assertNotIn("RLE_DICTIONARY", column.encodings)
+
+    async def test_registry_new_file_per_run(self):
+        store_path = os.path.join(self.tmp_dir.name, "parquet")
+        registry = ParquetWriterRegistry()
+        writer = registry.get_writer(store_path, "search_contents_2024-08-21")
+        self.assertIs(writer, registry.get_writer(store_path, "search_contents_2024-08-21"))
+        await writer.write(self.make_comment(1))
+        await registry.close_all()
+
+        # parquet 文件不能追加，下次运行写入新的文件
+        writer = registry.get_writer(store_path, "search_contents_2024-08-21")
+        await writer.write(self.make_comment(2))
+        await registry.close_all()
+        self.assertEqual(sorted(os.listdir(store_path)), [
+            "search_contents_2024-08-21.0001.parquet",
+            "search_contents_2024-08-21.0002.parquet",
+        ])
+
+    async def test_mixed_types_and_new_columns(self):
+        import pyarrow.parquet as pq
+
+        writer = ParquetWriter(self.file_name, row_group_size=2)
+        # xhs 一级评论的 parent_comment_id 是 0，回复是字符串 id；同一批数据中类型混杂的字段保存成字符串
+        await writer.write_many([
+            {"comment_id": "1", "parent_comment_id": 0, "score": 1},
+            {"comment_id": "2", "parent_comment_id": "65a8c1b2", "score": "high"},
+        ])
+        # 后面出现新的字段、已有字段的值无法转换时写入下一个文件，数据不丢失
+        await writer.write_many([
+            {"comment_id": 3, "parent_comment_id": "0", "score": "low", "like_count": 10},
+            {"comment_id": "4", "parent_comment_id": 0, "score": 2, "like_count": 20},
+        ])
+        await writer.write_many([{"comment_id": "5", "parent_comment_id": "0", "score": "mid", "like_count": "1万"}] * 2)
+        await writer.close()
+
+        file_names = sorted(os.listdir(os.path.dirname(self.file_name)))
+        self.assertEqual(file_names, [
+            "search_comments_2024-08-21.0001.parquet",
+            "search_comments_2024-08-21.0002.parquet",
+            "search_comments_2024-08-21.0003.parquet",
+        ])
+        first = pq.read_table(self.file_name)
+        self.assertEqual(str(first.schema.field("parent_comment_id").type), "string")
+        self.assertEqual(first.column("parent_comment_id").to_pylist(), ["0", "65a8c1b2"])
+        self.assertEqual(first.column("score").to_pylist(), ["1", "high"])
+        second = pq.read_table(os.path.join(os.path.dirname(self.file_name), file_names[1]))
+        self.assertEqual(second.column("comment_id").to_pylist(), ["3", "4"])
+        self.assertEqual(second.column("like_count").to_pylist(), [10, 20])
+        third = pq.read_table(writer.file_name)
+        self.assertEqual(str(third.schema.field("like_count").type), "string")
+        self.assertEqual(third.column("like_count").to_pylist(), ["1万", "1万"])
+        self.assertEqual(writer.rows, 6)
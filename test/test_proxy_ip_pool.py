@@ -2,9 +2,13 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2023/12/2 14:42
 # @Desc    :
-from unittest import IsolatedAsyncioTestCase
+import asyncio
+import time
+from typing import List
+from unittest import IsolatedAsyncioTestCase, mock
 
-from proxy.proxy_ip_pool import create_ip_pool
+from proxy.base_proxy import ProxyProvider
+from proxy.proxy_ip_pool import NoAvailableProxyError, ProxyIpPool, create_ip_pool
 from proxy.types import IpInfoModel
 
 
@@ -17,3 +21,83 @@ class TestIpPool(IsolatedAsyncioTestCase):
             print(ip_proxy_info)
             self.assertIsNotNone(ip_proxy_info.ip, msg="验证 ip 是否获取成功")
 
+
+def make_proxy(i: int, expired_time_ts: int = 0) -> IpInfoModel:
+    return IpInfoModel(ip=f"10.0.0.{i}", port=8000, user="user", password="pwd",
+                       expired_time_ts=expired_time_ts or int(time.time()) + 3600)
+
+
+class FakeProvider(ProxyProvider):
+    def __init__(self, proxies: List[IpInfoModel]) -> None:
+        self.proxies = proxies
+        self.calls = 0
+
+    async def get_proxies(self, num: int) -> List[IpInfoModel]:
+        self.calls += 1
+        result, self.proxies = self.proxies[:num], self.proxies[num:]
+        return result
+
+
+class TestHealthScoredIpPool(IsolatedAsyncioTestCase):
+    def make_pool(self, provider: ProxyProvider, invalid_ips=()) -> ProxyIpPool:
+        pool = ProxyIpPool(ip_pool_count=2, enable_validate_ip=True, ip_provider=provider)
+
+        async def _check_proxy(proxy: IpInfoModel) -> bool:
+            await asyncio.sleep(0.01)
+            return proxy.ip not in invalid_ips
+
+        pool._check_proxy = _check_proxy
+        return pool
+
+    async def test_validate_concurrently_and_skip_invalid(self):
+        provider = FakeProvider([make_proxy(1), make_proxy(2)])
+        pool = self.make_pool(provider, invalid_ips={"10.0.0.2"})
+        await pool.load_proxies()
+        try:
+            self.assertEqual([proxy.ip for proxy in pool.proxy_list], ["10.0.0.1"])
+            for _ in range(5):
+                self.assertEqual((await pool.get_proxy()).ip, "10.0.0.1")
+        finally:
+            await pool.close()
+
+    async def test_quarantine_and_refill(self):
+        provider = FakeProvider([make_proxy(1), make_proxy(2), make_proxy(3), make_proxy(4)])
+        pool = self.make_pool(provider)
+        with mock.patch("config.IP_PROXY_MAX_FAILURES", 2), mock.patch("config.IP_PROXY_REFILL_THRESHOLD", 1):
+            await pool.load_proxies()
+            try:
+                proxy = make_proxy(1)
+                pool.report_failure(proxy)
+                self.assertEqual(len(pool.proxy_list), 2)
+                pool.report_failure(proxy)
+                self.assertEqual([proxy.ip for proxy in pool.proxy_list], ["10.0.0.2"])
+
+                # 可用的代理IP不够时后台补充，不阻塞获取
+                self.assertEqual((await pool.get_proxy()).ip, "10.0.0.2")
+                await pool._refill_task
+                self.assertEqual(provider.calls, 2)
+                self.assertEqual(len(pool.proxy_list), 3)
+            finally:
+                await pool.close()
+
+    async def test_expired_and_exhausted(self):
+        provider = FakeProvider([make_proxy(1, expired_time_ts=int(time.time()) + 5)])
+        pool = self.make_pool(provider)
+        await pool.load_proxies()
+        try:
+            with self.assertRaises(NoAvailableProxyError):
+                await pool.get_proxy()
+        finally:
+            await pool.close()
+
+    async def test_latency_weighted(self):
+        pool = self.make_pool(FakeProvider([make_proxy(1), make_proxy(2)]))
+        await pool.load_proxies()
+        try:
+            for _ in range(10):
+                pool.report_success(make_proxy(1), 0.05)
+                pool.report_success(make_proxy(2), 2)
+            picks = [(await pool.get_proxy()).ip for _ in range(200)]
+            self.assertGreater(picks.count("10.0.0.1"), picks.count("10.0.0.2") * 5)
+        finally:
+            await pool.close()
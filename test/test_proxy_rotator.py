@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/27 21:00
+# @Desc    : API 客户端代理IP轮换测试
+import asyncio
+from typing import List
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from base.base_crawler import AbstractApiClient
+from media_platform.tieba.client import BaiduTieBaClient
+from proxy.proxy_ip_pool import NoAvailableProxyError, ProxyIpPool
+from proxy.proxy_rotator import ProxyRotator
+from tools.http_client_pool import http_client_pool
+
+from .test_proxy_ip_pool import FakeProvider, make_proxy
+
+
+class FakeIPBlockError(httpx.RequestError):
+    pass
+
+
+class FakeClient(AbstractApiClient):
+    platform = "test_rotator"
+    ip_block_errors = (FakeIPBlockError,)
+
+    def __init__(self) -> None:
+        self.used_clients: List[httpx.AsyncClient] = []
+
+    async def request(self, method, url, **kwargs):
+        async with self.track_request() as client:
+            self.used_clients.append(client)
+            if kwargs.get("blocked"):
+                raise FakeIPBlockError("ip blocked")
+            return "ok"
+
+    async def update_cookies(self, browser_context):
+        pass
+
+
+class TestProxyRotator(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.pool = ProxyIpPool(ip_pool_count=3, enable_validate_ip=False,
+                                ip_provider=FakeProvider([make_proxy(i) for i in range(1, 4)]))
+        await self.pool.load_proxies()
+
+    async def asyncTearDown(self):
+        await self.pool.close()
+        await http_client_pool.close(FakeClient.platform)
+
+    async def test_rotate_every_n(self):
+        rotator = ProxyRotator(self.pool, make_proxy(1), rotate_every=2)
+        proxies = [(await rotator.get_proxy()).ip for _ in range(6)]
+        self.assertEqual(proxies[:2], ["10.0.0.1", "10.0.0.1"])
+        self.assertEqual(proxies[2], proxies[3])
+        self.assertEqual(proxies[4], proxies[5])
+
+    async def test_sticky_rotate_on_blocked(self):
+        rotator = ProxyRotator(self.pool, make_proxy(1), rotate_every=1, sticky=True)
+        for _ in range(5):
+            self.assertEqual((await rotator.get_proxy()).ip, "10.0.0.1")
+        rotator.report_blocked(make_proxy(1))
+        proxy = await rotator.get_proxy()
+        self.assertNotEqual(proxy.ip, "10.0.0.1")
+        self.assertEqual((await rotator.get_proxy()).ip, proxy.ip)
+
+    async def test_client_per_proxy_connection(self):
+        client = FakeClient()
+        client.proxy_rotator = ProxyRotator(self.pool, make_proxy(1), sticky=True)
+        await client.request("GET", "/")
+        with self.assertRaises(FakeIPBlockError):
+            await client.request("GET", "/", blocked=True)
+        self.assertFalse(self.pool.is_available(make_proxy(1)))
+
+        # 被封禁之后自动换代理IP，每个代理IP使用自己的长连接客户端
+        await client.request("GET", "/")
+        self.assertIs(client.used_clients[0], client.used_clients[1])
+        self.assertIsNot(client.used_clients[1], client.used_clients[2])
+        # 隔离的代理IP的长连接客户端会被关闭
+        await asyncio.sleep(0)
+        self.assertTrue(client.used_clients[1].is_closed)
+        self.assertFalse(client.used_clients[2].is_closed)
+        self.assertNotEqual(client.proxy_rotator.current.ip, "10.0.0.1")
+
+    async def test_no_available_proxy_not_retried(self):
+        pool = ProxyIpPool(ip_pool_count=1, enable_validate_ip=False, ip_provider=FakeProvider([]))
+        client = BaiduTieBaClient()
+        client.set_proxy_pool(pool)
+        try:
+            with self.assertRaises(NoAvailableProxyError):
+                await client.get("/f")
+        finally:
+            await pool.close()
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/12 21:00
+# @Desc    : 令牌桶限流器测试
+import asyncio
+import time
+from unittest import IsolatedAsyncioTestCase, mock
+
+from tools.rate_limiter import RateLimiter, TokenBucket
+
+
+class TestTokenBucket(IsolatedAsyncioTestCase):
+
+    async def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=20, burst=5)
+        start = time.perf_counter()
+        await asyncio.gather(*[bucket.acquire() for _ in range(15)])
+        elapsed = time.perf_counter() - start
+        # 前 5 个请求直接放行，剩下 10 个按每秒 20 个的速率放行
+        self.assertGreaterEqual(elapsed, 0.45)
+        self.assertLess(elapsed, 0.7)
+
+    async def test_unlimited(self):
+        bucket = TokenBucket(rate=0)
+        start = time.perf_counter()
+        await asyncio.gather(*[bucket.acquire() for _ in range(100)])
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+
+class TestRateLimiter(IsolatedAsyncioTestCase):
+    rules = {
+        "xhs": [
+            {"pattern": "/api/sns/web/v1/feed", "rate": 1, "burst": 1},
+            {"pattern": "/api/sns/web/v2/comment/*", "rate": 5, "burst": 2},
+            {"pattern": "*", "rate": 10, "burst": 10},
+        ],
+    }
+
+    def test_match_rules(self):
+        limiter = RateLimiter(self.rules)
+        feed_bucket = limiter.get_bucket("xhs", "https://edith.xiaohongshu.com/api/sns/web/v1/feed")
+        self.assertEqual(feed_bucket.rate, 1)
+        comment_bucket = limiter.get_bucket("xhs", "https://edith.xiaohongshu.com/api/sns/web/v2/comment/page?note_id=1")
+        self.assertEqual(comment_bucket.rate, 5)
+        # 同一个规则匹配到的接口共用一个令牌桶
+        self.assertIs(limiter.get_bucket("xhs", "/api/sns/web/v2/comment/sub/page"), comment_bucket)
+        self.assertEqual(limiter.get_bucket("xhs", "/api/sns/web/v1/search/notes").rate, 10)
+        self.assertIsNone(limiter.get_bucket("dy", "/aweme/v1/web/aweme/detail/"))
+
+    async def test_disabled(self):
+        limiter = RateLimiter(self.rules)
+        with mock.patch("config.ENABLE_RATE_LIMIT", False):
+            start = time.perf_counter()
+            for _ in range(5):
+                await limiter.acquire("xhs", "/api/sns/web/v1/feed")
+            self.assertLess(time.perf_counter() - start, 0.5)
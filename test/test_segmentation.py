@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/23 21:00
+# @Desc    : 多进程分词服务测试
+import asyncio
+import logging
+import os
+import time
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+import jieba
+
+from tools.segmentation import SegmentationService, load_stop_words
+
+STOP_WORDS_FILE = "./docs/hit_stopwords.txt"
+
+
+class TestSegmentationService(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.service = SegmentationService(
+            workers=2, batch_size=2, stop_words_file=STOP_WORDS_FILE, custom_words={"相机博主": "博主"})
+
+    async def asyncTearDown(self):
+        await self.service.close()
+
+    async def test_cut_keep_order(self):
+        texts = ["我的苹果", "这个相机博主推荐的", "  ", "苹果和香蕉"]
+        words = await self.service.cut(texts)
+        self.assertEqual(len(words), len(texts))
+        self.assertEqual(words[0], ["苹果"])
+        # 自定义词语作为一个整体
+        self.assertIn("相机博主", words[1])
+        self.assertEqual(words[2], [])
+        self.assertEqual(await self.service.cut([]), [])
+
+    async def test_count(self):
+        word_freq = await self.service.count(["我的苹果", "苹果和香蕉", "香蕉", "苹果"])
+        self.assertEqual(word_freq["苹果"], 3)
+        self.assertEqual(word_freq["香蕉"], 2)
+        self.assertNotIn("的", word_freq)
+
+    @unittest.skipUnless(os.getenv("RUN_BENCHMARK"), "set RUN_BENCHMARK=1 to run the benchmark")
+    async def test_benchmark(self):
+        texts = ["这个博主推荐的零几年的老相机拍出来的照片真的很有味道，评论区也很热闹"] * 2000
+        self.service.batch_size = 200
+        await self.service.start()
+
+        logging.getLogger('jieba').setLevel(logging.WARNING)
+        stop_words = load_stop_words(STOP_WORDS_FILE)
+        start = time.perf_counter()
+        for text in texts:
+            [word for word in jieba.lcut(text) if word not in stop_words and len(word.strip()) > 0]
+        in_loop_cost = time.perf_counter() - start
+
+        # 分词期间事件循环可以继续执行其他任务
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker_task = asyncio.create_task(ticker())
+        start = time.perf_counter()
+        words = await self.service.cut(texts)
+        service_cost = time.perf_counter() - start
+        ticker_task.cancel()
+
+        print(f"\nsegmentation benchmark: in loop {len(texts) / in_loop_cost:.0f} texts/s, "
+              f"service with {self.service.workers} workers {len(texts) / service_cost:.0f} texts/s, "
+              f"event loop ticks during service: {ticks}")
+        self.assertEqual(len(words), len(texts))
+        self.assertGreater(ticks, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/11 11:30
+# @Desc    : 签名后端测试，内嵌 JS 引擎和 Playwright 浏览器在相同输入下的签名结果需要一致
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from playwright.async_api import Error, async_playwright
+
+from media_platform.xhs.client import SIGN_WITH_B1_JS
+from tools.signer import (JsEngineSigner, PlaywrightSigner, create_signer,
+                          is_js_engine_available)
+
+# 模拟平台签名脚本，用到了 localStorage 和 navigator，结果可以稳定复现
+FAKE_SIGN_SCRIPT = """
+window._webmsxyw = function (url, data) {
+    var s = url + (data ? JSON.stringify(data) : "") + (localStorage.getItem("b1") || "") + navigator.userAgent;
+    var h = 5381;
+    for (var i = 0; i < s.length; i++) {
+        h = (Math.imul(h, 33) ^ s.charCodeAt(i)) >>> 0;
+    }
+    return {"X-s": "XYW_" + h.toString(16), "X-t": 1700000000000 + s.length};
+};
+"""
+
+SIGN_ENV = {
+    "userAgent": "Mozilla/5.0 test",
+    "cookie": "a1=abc",
+    "href": "https://www.xiaohongshu.com/explore",
+    "localStorage": {
+        "b1": "I38rHdgsjopgIvesdVwgIC+oIELmBZ5e3VwXLgFTIxS3bqwErFeexd0ekncAzMFYnqthIhJeSBMDKutRI3KsYorWHPtGrbV0RLRhIgIgIhmkIhrKIkHkGgA1"
+    },
+}
+
+# FAKE_SIGN_SCRIPT 在 SIGN_ENV 环境下计算出的输入和签名结果，不是真实平台的签名，只用来固定内嵌引擎的输出
+# 内嵌引擎和浏览器是否一致由 test_parity_with_playwright 在本地 chromium 中实际比较
+FAKE_SIGN_VECTORS = [
+    (
+        ["/api/sns/web/v1/search/notes",
+         {"keyword": "编程副业", "page": 1, "page_size": 20, "search_id": "2dlq0p8a", "sort": "general", "note_type": 0}],
+        {"X-s": "XYW_d56ac29c", "X-t": 1700000000260},
+    ),
+    (
+        ["/api/sns/web/v1/feed", {"source_note_id": "66a8c1b2000000002701d2e3", "image_formats": ["jpg", "webp", "avif"]}],
+        {"X-s": "XYW_c1d2cc55", "X-t": 1700000000239},
+    ),
+    (
+        ["/api/sns/web/v2/comment/page?note_id=66a8c1b2000000002701d2e3&cursor=", None],
+        {"X-s": "XYW_1630172b", "X-t": 1700000000205},
+    ),
+]
+
+
+class FakePage:
+    async def evaluate(self, expression, arg=None):
+        return {"expression": expression, "arg": arg}
+
+
+class TestSigner(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        fd, self.script_path = tempfile.mkstemp(suffix=".js")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(FAKE_SIGN_SCRIPT)
+
+    async def asyncTearDown(self):
+        os.remove(self.script_path)
+
+    async def test_playwright_signer(self):
+        signer = PlaywrightSigner(FakePage())  # type: ignore
+        result = await signer.evaluate("(arg) => arg", [1, 2])
+        self.assertEqual(result, {"expression": "(arg) => arg", "arg": [1, 2]})
+
+    def test_create_signer_invalid_backend(self):
+        with self.assertRaises(ValueError):
+            create_signer("unknown", None)  # type: ignore
+
+    async def test_js_engine_signer_fake_vectors(self):
+        if not is_js_engine_available():
+            self.skipTest("mini-racer is not installed")
+        signer = JsEngineSigner(script_paths=[self.script_path], env=SIGN_ENV)
+        try:
+            for arg, expected in FAKE_SIGN_VECTORS:
+                result = await signer.evaluate(SIGN_WITH_B1_JS, arg)
+                self.assertEqual(result, {**expected, "b1": SIGN_ENV["localStorage"]["b1"]})
+        finally:
+            await signer.close()
+
+    async def test_js_engine_signer_closed(self):
+        if not is_js_engine_available():
+            self.skipTest("mini-racer is not installed")
+        signer = JsEngineSigner(script_paths=[self.script_path], env=SIGN_ENV)
+        await signer.evaluate(SIGN_WITH_B1_JS, FAKE_SIGN_VECTORS[0][0])
+        await signer.close()
+        await signer.close()
+        with self.assertRaisesRegex(RuntimeError, "closed"):
+            await signer.evaluate(SIGN_WITH_B1_JS, FAKE_SIGN_VECTORS[0][0])
+
+    async def test_parity_with_playwright(self):
+        if not is_js_engine_available():
+            self.skipTest("mini-racer is not installed")
+        async with async_playwright() as playwright:
+            try:
+                browser = await playwright.chromium.launch(headless=True)
+            except Error as e:
+                self.skipTest(f"chromium is not available: {e}")
+            browser_context = await browser.new_context(user_agent=SIGN_ENV["userAgent"])
+            page = await browser_context.new_page()
+            await page.route("https://www.xiaohongshu.com/**", lambda route: route.fulfill(body="<html></html>"))
+            await page.goto(SIGN_ENV["href"])
+            await page.evaluate("(b1) => window.localStorage.setItem('b1', b1)", SIGN_ENV["localStorage"]["b1"])
+            await page.add_script_tag(content=FAKE_SIGN_SCRIPT)
+
+            playwright_signer = PlaywrightSigner(page)
+            js_engine_signer = JsEngineSigner(script_paths=[self.script_path], snapshot_page=page)
+            await js_engine_signer.start()
+            try:
+                for arg, expected in FAKE_SIGN_VECTORS:
+                    browser_result = await playwright_signer.evaluate(SIGN_WITH_B1_JS, arg)
+                    engine_result = await js_engine_signer.evaluate(SIGN_WITH_B1_JS, arg)
+                    self.assertEqual(browser_result, engine_result)
+                    self.assertEqual(browser_result["X-s"], expected["X-s"])
+            finally:
+                await js_engine_signer.close()
+                await browser.close()
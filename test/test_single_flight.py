@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/14 21:30
+# @Desc    : 请求合并测试
+import asyncio
+from unittest import IsolatedAsyncioTestCase, mock
+
+from tools.single_flight import SingleFlight
+
+
+class TestSingleFlight(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.single_flight = SingleFlight()
+        self.call_count = 0
+
+    async def fetch(self, note_id: str, fail: bool = False):
+        self.call_count += 1
+        await asyncio.sleep(0.05)
+        if fail:
+            raise ValueError(note_id)
+        return {"note_id": note_id}
+
+    async def test_concurrent_calls_share_one_request(self):
+        results = await asyncio.gather(
+            *[self.single_flight.do(("xhs", "note_detail", "1"), self.fetch, "1") for _ in range(5)]
+        )
+        self.assertEqual(self.call_count, 1)
+        self.assertEqual(results, [{"note_id": "1"}] * 5)
+        # 每个调用方拿到的是各自的拷贝
+        results[0]["xsec_token"] = "token"
+        self.assertNotIn("xsec_token", results[1])
+
+    async def test_result_cache(self):
+        await self.single_flight.do(("xhs", "note_detail", "1"), self.fetch, "1")
+        await self.single_flight.do(("xhs", "note_detail", "1"), self.fetch, "1")
+        await self.single_flight.do(("xhs", "note_detail", "2"), self.fetch, "2")
+        self.assertEqual(self.call_count, 2)
+        with mock.patch("config.REQUEST_COALESCING_CACHE_TTL", 0):
+            self.single_flight.clear()
+            await self.single_flight.do(("xhs", "note_detail", "1"), self.fetch, "1")
+            await self.single_flight.do(("xhs", "note_detail", "1"), self.fetch, "1")
+        self.assertEqual(self.call_count, 4)
+
+    async def test_exception_shared_not_cached(self):
+        results = await asyncio.gather(
+            *[self.single_flight.do(("bili", "video_detail", 1), self.fetch, "1", fail=True) for _ in range(3)],
+            return_exceptions=True
+        )
+        self.assertEqual(self.call_count, 1)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        await self.single_flight.do(("bili", "video_detail", 1), self.fetch, "1")
+        self.assertEqual(self.call_count, 2)
+
+    async def test_follower_take_over_cancelled_leader(self):
+        key = ("xhs", "note_detail", "1")
+        leader = asyncio.create_task(self.single_flight.do(key, self.fetch, "1"))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(self.single_flight.do(key, self.fetch, "1")) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(*followers)
+        self.assertTrue(leader.cancelled())
+        # 等待的调用方没有收到 CancelledError，其中一个重新发起请求，其他的共享结果
+        self.assertEqual(results, [{"note_id": "1"}] * 3)
+        self.assertEqual(self.call_count, 2)
+
+    async def test_disabled(self):
+        with mock.patch("config.ENABLE_REQUEST_COALESCING", False):
+            await asyncio.gather(*[self.single_flight.do(("ks", "video_detail", "1"), self.fetch, "1") for _ in range(3)])
+        self.assertEqual(self.call_count, 3)
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/16 20:30
+# @Desc    : 批量存储测试
+import csv
+import json
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase, mock
+
+from store import xhs as xhs_store
+from store.xhs.xhs_store_impl import (XhsCsvStoreImplement,
+                                      XhsJsonStoreImplement)
+from tools.csv_writer import csv_writers
+from var import crawler_type_var
+
+
+def make_comment(comment_id: int):
+    return {
+        "id": str(comment_id),
+        "create_time": 1723800000000 + comment_id,
+        "ip_location": "上海",
+        "content": f"评论 {comment_id}",
+        "user_info": {"user_id": f"user_{comment_id}", "nickname": "nickname", "image": ""},
+        "sub_comment_count": "0",
+        "like_count": "1",
+    }
+
+
+class TestStoreBatch(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.write_behind_patcher = mock.patch("config.ENABLE_WRITE_BEHIND", False)
+        self.write_behind_patcher.start()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.token = crawler_type_var.set("search")
+        self.comments = [make_comment(i) for i in range(30)]
+
+    async def asyncTearDown(self):
+        crawler_type_var.reset(self.token)
+        xhs_store.XhsStoreFactory._store = None
+        self.tmp_dir.cleanup()
+        self.write_behind_patcher.stop()
+
+    def test_factory_reuses_store(self):
+        with mock.patch("config.SAVE_DATA_OPTION", "csv"):
+            self.assertIs(xhs_store.XhsStoreFactory.create_store(), xhs_store.XhsStoreFactory.create_store())
+        with mock.patch("config.SAVE_DATA_OPTION", "json"):
+            self.assertIsInstance(xhs_store.XhsStoreFactory.create_store(), XhsJsonStoreImplement)
+
+    async def test_csv_batch_same_as_single(self):
+        with mock.patch("config.SAVE_DATA_OPTION", "csv"), \
+                mock.patch.object(XhsCsvStoreImplement, "csv_store_path", os.path.join(self.tmp_dir.name, "batch")), \
+                mock.patch.object(XhsCsvStoreImplement, "save_data_to_csv") as save_data_to_csv:
+            await xhs_store.batch_update_xhs_note_comments("note_id", self.comments[:20])
+            await xhs_store.batch_update_xhs_note_comments("note_id", self.comments[20:])
+            # 批量写入不走逐条写入的路径
+            save_data_to_csv.assert_not_called()
+            batch_file = xhs_store.XhsStoreFactory.create_store().make_save_file_name("comments")
+
+        with mock.patch("config.SAVE_DATA_OPTION", "csv"), \
+                mock.patch.object(XhsCsvStoreImplement, "csv_store_path", os.path.join(self.tmp_dir.name, "single")):
+            for comment in self.comments:
+                await xhs_store.update_xhs_note_comment("note_id", comment)
+            single_file = xhs_store.XhsStoreFactory.create_store().make_save_file_name("comments")
+        await csv_writers.close_all()
+
+        with open(batch_file, encoding="utf-8-sig", newline="") as f:
+            batch_rows = list(csv.reader(f))
+        with open(single_file, encoding="utf-8-sig", newline="") as f:
+            single_rows = list(csv.reader(f))
+        self.assertEqual(len(batch_rows), 31)
+        self.assertEqual(batch_rows[0][0], "comment_id")
+        # last_modify_ts 列不比较
+        drop_ts = batch_rows[0].index("last_modify_ts")
+        self.assertEqual([row[:drop_ts] + row[drop_ts + 1:] for row in batch_rows],
+                         [row[:drop_ts] + row[drop_ts + 1:] for row in single_rows])
+
+    async def test_json_batch(self):
+        with mock.patch("config.SAVE_DATA_OPTION", "json"), mock.patch("config.ENABLE_GET_WORDCLOUD", False), \
+                mock.patch.object(XhsJsonStoreImplement, "json_store_path", os.path.join(self.tmp_dir.name, "json")), \
+                mock.patch.object(XhsJsonStoreImplement, "words_store_path", os.path.join(self.tmp_dir.name, "words")):
+            await xhs_store.batch_update_xhs_note_comments("note_id", self.comments[:20])
+            await xhs_store.batch_update_xhs_note_comments("note_id", self.comments[20:])
+            save_file_name, _ = xhs_store.XhsStoreFactory.create_store().make_save_file_name("comments")
+        with open(save_file_name, encoding="utf-8") as f:
+            save_data = json.load(f)
+        self.assertEqual([item["comment_id"] for item in save_data], [str(i) for i in range(30)])
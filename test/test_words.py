@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/22 21:00
+# @Desc    : 增量词频统计测试
+import asyncio
+import json
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from tools.segmentation import segmentation_service
+from tools.words import AsyncWordCloudGenerator, WordFrequency
+
+
+class TestAsyncWordCloudGenerator(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.prefix = os.path.join(self.tmp_dir.name, "search_comments_2024-08-22")
+        self.generator = AsyncWordCloudGenerator(save_interval=3600, render_interval=3600, workers=1)
+        self.rendered = []
+
+        async def _render(freq: WordFrequency):
+            freq.unrendered = False
+            self.rendered.append(dict(freq.counter))
+
+        self.generator._render = _render
+
+    async def asyncTearDown(self):
+        await self.generator.close()
+        await segmentation_service.close()
+        self.tmp_dir.cleanup()
+
+    def read_freq(self):
+        with open(f"{self.prefix}_word_freq.json", encoding="utf-8") as f:
+            return json.load(f)
+
+    async def test_incremental_count(self):
+        await self.generator.add_items([{"content": "苹果 香蕉"}, {"note_id": "1"}], self.prefix)
+        # 第一次统计时写入词频文件并在后台生成词云图，之后在间隔内只累加词频
+        await asyncio.sleep(0)
+        self.assertEqual(self.read_freq(), {"苹果": 1, "香蕉": 1})
+        self.assertEqual(len(self.rendered), 1)
+
+        await self.generator.add_items([{"content": "苹果"}], self.prefix)
+        self.assertEqual(self.read_freq(), {"苹果": 1, "香蕉": 1})
+        self.assertEqual(len(self.rendered), 1)
+
+        await self.generator.close()
+        self.assertEqual(self.read_freq(), {"苹果": 2, "香蕉": 1})
+        self.assertEqual(self.rendered[-1], {"苹果": 2, "香蕉": 1})
+
+    async def test_continue_from_saved_frequency(self):
+        with open(f"{self.prefix}_word_freq.json", "w", encoding="utf-8") as f:
+            json.dump({"苹果": 3}, f)
+        await self.generator.add_items([{"content": "苹果"}], self.prefix)
+        await self.generator.close()
+        self.assertEqual(self.read_freq(), {"苹果": 4})
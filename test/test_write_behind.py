@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/18 21:30
+# @Desc    : 异步写入队列测试
+import asyncio
+from typing import Dict, List
+from unittest import IsolatedAsyncioTestCase, mock
+
+from base.base_crawler import AbstractStore
+from tools.write_behind import (WriteBehindQueue, WriteBehindRegistry,
+                                WriteBehindStore)
+
+
+class RecordStore(AbstractStore):
+    def __init__(self):
+        self.content_batches: List[List[Dict]] = []
+        self.comment_batches: List[List[Dict]] = []
+        self.creators: List[Dict] = []
+
+    async def store_content(self, content_item: Dict):
+        await self.store_contents([content_item])
+
+    async def store_contents(self, content_items: List[Dict]):
+        await asyncio.sleep(0.01)
+        self.content_batches.append(content_items)
+
+    async def store_comment(self, comment_item: Dict):
+        await self.store_comments([comment_item])
+
+    async def store_comments(self, comment_items: List[Dict]):
+        await asyncio.sleep(0.01)
+        self.comment_batches.append(comment_items)
+
+    async def store_creator(self, creator: Dict):
+        self.creators.append(creator)
+
+
+class TestWriteBehindQueue(IsolatedAsyncioTestCase):
+    async def test_batch_by_size_and_age(self):
+        batches = []
+
+        async def sink(batch):
+            batches.append(batch)
+
+        queue = WriteBehindQueue("test", sink, max_size=100, batch_size=10, max_batch_age=0.1, workers=1)
+        for i in range(25):
+            await queue.put(i)
+        await asyncio.sleep(0.3)
+        # 满 10 条立即写入，剩下的 5 条等待超时之后写入
+        self.assertEqual([len(batch) for batch in batches], [10, 10, 5])
+        self.assertEqual(sum(batches, []), list(range(25)))
+        await queue.close()
+        self.assertEqual(queue.snapshot()["written"], 25)
+
+    async def test_backpressure(self):
+        release = asyncio.Event()
+
+        async def slow_sink(batch):
+            await release.wait()
+
+        queue = WriteBehindQueue("test", slow_sink, max_size=2, batch_size=1, max_batch_age=0, workers=1)
+        for i in range(3):
+            await queue.put(i)
+        # 一条正在写入，队列里有两条，第四条需要等待
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(queue.put(3), 0.1)
+        release.set()
+        await queue.close()
+        self.assertEqual(queue.depth, 0)
+
+    async def test_close_flushes_without_waiting_batch_age(self):
+        batches = []
+
+        async def sink(batch):
+            batches.append(batch)
+
+        queue = WriteBehindQueue("test", sink, max_size=100, batch_size=100, max_batch_age=60, workers=2)
+        for i in range(10):
+            await queue.put(i)
+        await asyncio.wait_for(queue.close(), 1)
+        self.assertEqual(sorted(sum(batches, [])), list(range(10)))
+
+    async def test_sink_error_does_not_stop_worker(self):
+        written = []
+
+        async def sink(batch):
+            if 0 in batch:
+                raise ValueError("bad item")
+            written.extend(batch)
+
+        queue = WriteBehindQueue("test", sink, max_size=100, batch_size=1, max_batch_age=0, workers=1)
+        for i in range(3):
+            await queue.put(i)
+        await queue.close()
+        self.assertEqual(written, [1, 2])
+        self.assertEqual(queue.snapshot()["failed"], 1)
+
+
+class TestWriteBehindStore(IsolatedAsyncioTestCase):
+    async def test_store_batches_comments(self):
+        store = RecordStore()
+        wrapped = WriteBehindStore(store, "RecordStore")
+        await wrapped.store_comments([{"comment_id": str(i)} for i in range(30)])
+        await wrapped.store_content({"note_id": "1"})
+        await wrapped.store_creator({"user_id": "1"})
+        self.assertEqual(store.comment_batches, [])
+        await wrapped.close()
+        self.assertEqual(sum(len(batch) for batch in store.comment_batches), 30)
+        self.assertLess(len(store.comment_batches), 30)
+        self.assertEqual(store.content_batches, [[{"note_id": "1"}]])
+        self.assertEqual(store.creators, [{"user_id": "1"}])
+
+    async def test_registry(self):
+        registry = WriteBehindRegistry()
+        store = RecordStore()
+        with mock.patch("config.ENABLE_WRITE_BEHIND", False):
+            self.assertIs(registry.wrap(store), store)
+        with mock.patch("config.ENABLE_WRITE_BEHIND", True):
+            wrapped = registry.wrap(store)
+            self.assertIs(registry.wrap(store), wrapped)
+            await wrapped.store_comment({"comment_id": "1"})
+            saved = []
+
+            async def save_image(item):
+                saved.append(item)
+
+            await registry.store_media(save_image, {"pic_id": "1"})
+        await registry.close_all()
+        self.assertEqual(store.comment_batches, [[{"comment_id": "1"}]])
+        self.assertEqual(saved, [{"pic_id": "1"}])
+
+    async def test_flush_data_between_crawls(self):
+        from main import flush_data
+        from tools.write_behind import write_behind_stores
+
+        store = RecordStore()
+        with mock.patch("config.ENABLE_WRITE_BEHIND", True):
+            # api_server 每批爬取结束之后读取保存的文件，读取之前数据需要全部写入
+            for i in range(2):
+                await write_behind_stores.wrap(store).store_comment({"comment_id": str(i)})
+                await flush_data()
+                self.assertEqual(sum(store.comment_batches, []), [{"comment_id": str(j)} for j in range(i + 1)])
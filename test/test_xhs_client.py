@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/31 16:20
+# @Desc    : 小红书 API client 签名和限流顺序测试
+import asyncio
+from unittest import IsolatedAsyncioTestCase, mock
+
+import httpx
+
+from media_platform.xhs.client import XiaoHongShuClient
+
+
+class FakeSigner:
+    """签名结果就是签名时的 url，方便检查请求头和请求地址是否对应"""
+
+    def __init__(self, events):
+        self.events = events
+
+    async def evaluate(self, expression, arg=None):
+        url = arg[0]
+        self.events.append(("sign", url))
+        return {"X-s": url, "X-t": 1700000000000, "b1": "b1"}
+
+
+def fake_sign(a1, b1, x_s, x_t):
+    return {"x-s": x_s, "x-t": x_t, "x-s-common": "common", "x-b3-traceid": "traceid"}
+
+
+class TestXiaoHongShuClient(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.events = []
+        self.sent_headers = {}
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            self.sent_headers[request.url.raw_path.decode()] = request.headers["X-S"]
+            return httpx.Response(200, json={"success": True, "data": {}})
+
+        self.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        self.xhs_client = XiaoHongShuClient(
+            headers={"User-Agent": "test-agent"},
+            playwright_page=None,
+            cookie_dict={"a1": "a1"},
+            signer=FakeSigner(self.events),  # type: ignore
+        )
+
+        async def acquire_rate_limit(url: str):
+            # 笔记详情接口要等待限流令牌，等待期间其他接口的请求先发出去
+            if "/feed" in url:
+                await asyncio.sleep(0.1)
+            self.events.append(("rate_limit", url.replace(self.xhs_client._host, "")))
+
+        self.patchers = [
+            mock.patch.object(XiaoHongShuClient, "get_http_client", return_value=self.http_client),
+            mock.patch.object(self.xhs_client, "acquire_rate_limit", acquire_rate_limit),
+            mock.patch("media_platform.xhs.client.sign", fake_sign),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+    async def asyncTearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+        await self.http_client.aclose()
+
+    async def test_sign_after_rate_limit(self):
+        await asyncio.gather(
+            self.xhs_client.post("/api/sns/web/v1/feed", {"source_note_id": "1"}),
+            self.xhs_client.get("/api/sns/web/v2/comment/page", {"note_id": "1"}),
+        )
+        # 每个请求的签名和自己的请求地址对应
+        self.assertEqual(self.sent_headers, {
+            "/api/sns/web/v1/feed": "/api/sns/web/v1/feed",
+            "/api/sns/web/v2/comment/page?note_id=1": "/api/sns/web/v2/comment/page?note_id=1",
+        })
+        # 拿到限流令牌之后才签名
+        for uri in ["/api/sns/web/v1/feed", "/api/sns/web/v2/comment/page?note_id=1"]:
+            self.assertLess(self.events.index(("rate_limit", uri)), self.events.index(("sign", uri)))
+        self.assertNotIn("X-S", self.xhs_client.headers)
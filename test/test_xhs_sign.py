@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/6 22:15
+# @Desc    : 小红书签名函数的黄金向量测试以及性能对比
+import ctypes
+import json
+import os
+import time
+import unittest
+import urllib.parse
+
+from media_platform.xhs import help
+
+# 以下向量由重写之前的纯 Python 实现生成
+SIGN_GOLDEN_VECTORS = [
+    {
+        'a1': '19c3ac0e1a4yxqkcmz8kmrjtbn4v3b5r0zg3g6wqr50000100853',
+        'b1': 'I38rHdgsjopgIvesdVwgIC+oIELmBZ5e3VwXLgFTIxS3bqwErFeexd0ekncAzMFYnqthIhJeSBMDKutRI3KsYorWHPtGrbV0IGMsYBdMZr5eH9ddsdesKnKsIfLeSBosQFGsIwksW9E4/LJsnQksIEGsWUGxrAIsW5L0mpeJsuHbc0JnI9oeWIc1I3bBpgdsiVdeQnFVHoDFI3WhZ/ZN8LDFI31GsPhTSAGs0ngTIhbyUjGX2oeYcYGPn/P3IxeeeFzIi77sVpGIiqesfB/sxuZxJdvUPqesfVosHfBsfVGsYnesWLaIdeg4Onem6gX6ILeeiutJIEAe1ajkIvvsDB4Y4eKEIh0ekPgsjP8eWAFsDzgsIFDjInwk4VmAHeJs5y3s1gOsYLrI8UWhPSJesUhF2IYsDnAsWuvsj8eskedeVDcAIvNsWt+OIx0sWpzsxut+IvHAaPWgIkeeh/PCIvbscqgsfAeeTWKse/dsdcDDIxm2IEpI4BAsxSAeWdmsI3bOI3qu+dbs3kKDePDsiYLFIijqIZosSgyFIx5sWnbxIE6sYAJs1/bC20qsJ/4wI3SbIkzjnsH/sAp0IiMp+sJeKsPuIAr2/uAeVWL1I3KsYVAe6Pc0OLrMs94FaiSqs/GIHpDhs/DsYcdekbSAP9DelprTIi8yICoeWUWRePh=',
+        'x_s': 'I38rHdgsjopgIvesdVwgIC+oIELmBZ5e3VwXLgFTIxS3bqwErFeexd0ekncAzMFYnqthIhJeSBMDKutRI3KsYorWHPtGrbV0IGMsYBdMZr5eH9ddsdesKnKsIfLeSBosQFGsIwksW9E4/LJsnQksIEGsWUGxrAIsW5L0mpeJsuHbc0JnI9oeWIc1I3bBpgdsiVdeQnFVHoDFI3WhZ/ZN8LDFI31GsPhTSAGs0ngTIhbyUjGX2oeYcYGPn/P3IxeeeFzIi77sVpGIiqesfB',
+        'x_t': '1722585632001',
+        'mrc': -811318837,
+        'x_s_common': '2UQAPsHCPUIjqArjwjHjNsQhPsHCH0rjNsQhPaHCH0P1+UhhN/HjNsQhPjHCHDMYGUmOLUHVHdWAH0ij2BYANgm0Ng4SGjHVHdWFH0ij+shU+UhUHjIj2eLjwjHlwnPAGnPI8/bY+oShqnT0Jgihy9MUydzjJ0z9P9HMq0mC8A+d+d4lq0LIPeZIP/ZIweLAHjIj2eGjwjHl+AHU+/WM+0PUPeZlHjIj2eqjwjQQPAYUaBzdq9k6qB4Q4fpA8b878FSet9RQzLlTcSiM8/+n4MYP8F8LagY/P9Ql4FpUzfpS2BcI8nT1GFbC/L88JdbFyrSiafp/cDMra7pFLDDAa7+8J7QgabmFz7Qjp0mQzFMAnLQD/pkU+npHwnzDq9zSqFT1a7+Q8DlSLFQ6qMbBz7+Q49TApASb+sRPad+1LnTAaLpoqM4pz7YUcLSApApPPBMI8LkA4LYjGAmtJDDEJ9pganPla/+jcdmd8o+kpfzSLnEBpDY6zr8QPM4injRy/0YPzr8QPAboqMmipb+mz7PIJf4LanYj2ppxzMWUJ9p8GMSoLBh6Le+Q2BpS8L8CanD7+7+nqr4QygbSq98sHjIj2eWjwjQQPAYUaBzdq9k6qB4Q4fpA8b878FSet9RQzLlTcSiM8/+n4MYP8F8LagY/P9Ql4FpUzfpS2BcI8nT1GFbC/L88JdbFyrSiafp/cDMra7pFLDDAa7+8J7QgabmFz7Qjp0mQzFMAnLQD/pkU+npHwnzDq9zSqFT1a7+Q8DlSLFQ6qMbBz7+Q49TApASb+sRPad+1LnTAaLpoqM4pz7YUcLSApApPPBMI8LkA4LYjGAmtJDDEJ9pganPla/+jcdmd8o+kpfzSLnEBpDY6zr8QPM4injRy/0YPzr8QPAboqMmipb+mz7PIJf4LanYj2ppxzMWUJ9p8GMSoLBh6Le+Q2BpS8L8CanD7+7+nqr4QygbSq98sN7+h4pkhafz9ppml8g+fpfRAaB8sq98nz7+8JfpApFlYanzS8AzOJfpT+f4G+DSP8npk4gztaLpm8/bYyfTQ4d8AzrHFn/zSaFpQyemSyMmdq9kcwBpgcL8AzokdqFSBzBkQJd43+b8TcLYSadPM2/+APn4OqMSPqDDhpp4iLb+t8g+pyrGUapSAzBEmqM4M4d+xwBpAy9pD8p8rGFbQ4DEAp7c3/FShPo+gqokA2opFtFS9arbYLb4danTS8nW6Lr+Q4fQAG7bdq98m8npLpFTA8aRDq9z0zrzQ2BFUaLpIa/zscg+hLFbSp9zTqFDAGDRQP7bMt9zjqA+3aFzSLrzAypSPzDSkydbQnfRAL94EzDSh+g+gJfQhaLL9qMSmadPlN9QeP0mlqFi6+o4QPM+janTCyfEAasRAcgZIanS+qsTAafpNqMmMaLbUPjRMcnpnpFIla/+NqMSncnL9LBPI/FlU/gPE+r8Yyp+lqURoaLYIzBYANFzAnn+D8nTjLFbcwLzSJomUprSkwoSQc9RSpMpgLfpcyeFjNsQhwaHCN/WlP/PlweWA+UIj2erIH0il+/zR',
+    },
+    {
+        'a1': '18c7a5e5b3d0000000000000000000000000000000000000',
+        'b1': '',
+        'x_s': 'XYW_eyJzaWduU3ZuIjoiNTEiLCJzaWduVHlwZSI6IngxIiwiYXBwSWQiOiJ4aHMtcGMtd2ViIiwic2lnblZlcnNpb24iOiIxIiwicGF5bG9hZCI6IjBmMmE1ZDhhYjIzZGQ3YWMwZmE0ZTIxNGY0MjFlYWZkN2M1NDBkODNlMDVkOTA3MDJjYmVkNGU2ZTk1MDAyMmI2ODllMzVmMjA5OTU0YTk3NDBhZGRlNzFkOWE4NzQ3In0=',
+        'x_t': '1700000000000',
+        'mrc': -3565390821,
+        'x_s_common': '2UQAPsHCPUIjqArjwjHjNsQhPsHCH0rjNsQhPaHCH0P1+UhhN/HjNsQhPjHCHDMYGUmOLUHVHdWAH0ij2BYANgm0Ng4SGjHVHdWFH0ij+shU+UhUHjIj2eLjwjHlwBP7G/pS+nHA8eZIPeZIPeZIPeZIPeZIPeZIPeZIPeZIPeZIPeZIPeZIPeZIPeZjNsQh+jHCH0r7PeZIPeZIPeZIPeZjNsQh+UHCHSY8pMRS2LkCGp4D4pLAndpQyfRk/SzbyLleadkYp9zMpDYV4Mk/a/8QJf4hanS7ypSGcd4/pMbk/9St+BbH/gz0zFMF8eQnyLSk49S0Pfl1GflyJB+1/dmjP0zk/9SQ2rSk49S0zFGMGDqEybkea/8QyDQT/nMbPpkryBY8yDSCnD4zPMSg/g4yJLLInSzQ2rEon/m+yD8Vnp4yyFhU//bwzrQ3/FzwJrMrpfTOprrA/LztySSTpfTwzMLUnSz3PLMrcgS+JLDU/FzVJrMCpfM+yDrM/MzpPbSLyA+wzrQinD4aJrECzfTOpFLF/dkzPFS1PeFjNsQhwsHCHjHVHdWEH0iTPAL9+/PEPeWUPaIj2erIH0il+/zR',
+    },
+    {
+        'a1': 'a1value',
+        'b1': 'XYW_short_but_long_enough_for_the_crc_routine_to_run_xxxxxxxxxxxxxxxx',
+        'x_s': 'b1value',
+        'x_t': '1699999999999',
+        'mrc': -2622836980,
+        'x_s_common': '2UQAPsHCPUIjqArjwjHjNsQhPsHCH0rjNsQhPaHCH0P1+UhhN/HjNsQhPjHCHDMYGUmOLUHVHdWAH0ij2BYANgm0Ng4SGjHVHdWFH0ij+shU+UhUHjIj2eLjwjQYPg8YJopSHjIj2eGjwjHl+0DEw/DEw/DEw/DEHjIj2eqjwjQjPg8YJopSHjIj2eWjwjQGnp4Kq9Y6qdzKGdpFg9l6Jf4K8nE64n4ig986qSRFyBpKG7Q0g7Q64gzkJfpK4BRKqdp1g7Yh2oYh2oYh2oYh2oYh2oWjNsQhwaHCN/H9P0HhPAGEweZVHdWlPsHCP/LFKc==',
+    },
+]
+ENCODE_GOLDEN_VECTORS = [
+    ('', ''),
+    ('a', 'Gc=='),
+    ('ab', 'GnH='),
+    ('abc', 'GnQ0'),
+    ('hello world', 'yBpVJBuW49RUJBc='),
+    ('中文签名测试', 'ENjTEkyoEC9XE8s+E3nNCtXp'),
+    ("emoji 😀 mixed ~()*!.' text", '8nM6yfDWuQXGWsmTygYS8smXtsDxHahdHozS2oc='),
+    ('{"k": "\\u503c", "n": 1}', '2UQ3H0iWHSlM+/ZAGUHVHsQ1H0iWPgF='),
+]
+
+
+def _legacy_crc_table():
+    table = []
+    for n in range(256):
+        c = n
+        for _ in range(8):
+            c = (c >> 1) ^ 0xEDB88320 if c & 1 else c >> 1
+        table.append(c)
+    return table
+
+
+LEGACY_CRC_TABLE = _legacy_crc_table()
+
+
+def legacy_mrc(e):
+    """重写之前逐字符查表的实现"""
+    o = -1
+
+    def right_without_sign(num: int, bit: int = 0) -> int:
+        val = ctypes.c_uint32(num).value >> bit
+        MAX32INT = 4294967295
+        return (val + (MAX32INT + 1)) % (2 * (MAX32INT + 1)) - MAX32INT - 1
+
+    for n in range(57):
+        o = LEGACY_CRC_TABLE[(o & 255) ^ ord(e[n])] ^ right_without_sign(o, 8)
+    return o ^ -1 ^ 3988292384
+
+
+def legacy_encode_utf8(e):
+    """重写之前逐字符解析 %XX 的实现"""
+    b = []
+    m = urllib.parse.quote(e, safe='~()*!.\'')
+    w = 0
+    while w < len(m):
+        T = m[w]
+        if T == "%":
+            b.append(int(m[w + 1] + m[w + 2], 16))
+            w += 2
+        else:
+            b.append(ord(T[0]))
+        w += 1
+    return b
+
+
+def legacy_b64_encode(e):
+    """重写之前按三字节分组查表的实现"""
+    lookup = help.lookup
+    P = len(e)
+    W = P % 3
+    U = []
+    for b in range(0, P - W, 3):
+        n = (16711680 & (e[b] << 16)) + ((e[b + 1] << 8) & 65280) + (e[b + 2] & 255)
+        U.append(lookup[63 & (n >> 18)] + lookup[63 & (n >> 12)] + lookup[(n >> 6) & 63] + lookup[n & 63])
+    if 1 == W:
+        F = e[P - 1]
+        U.append(lookup[F >> 2] + lookup[(F << 4) & 63] + "==")
+    elif 2 == W:
+        F = (e[P - 2] << 8) + e[P - 1]
+        U.append(lookup[F >> 10] + lookup[63 & (F >> 4)] + lookup[(F << 2) & 63] + "=")
+    return "".join(U)
+
+
+def legacy_x_s_common(a1, b1, x_s, x_t):
+    common = {
+        "s0": 3, "s1": "", "x0": "1", "x1": "3.7.8-2", "x2": "Mac OS", "x3": "xhs-pc-web", "x4": "4.27.2",
+        "x5": a1, "x6": x_t, "x7": x_s, "x8": b1, "x9": legacy_mrc(x_t + x_s + b1), "x10": 154,
+    }
+    return legacy_b64_encode(legacy_encode_utf8(json.dumps(common, separators=(',', ':'))))
+
+
+class TestXhsSign(unittest.TestCase):
+
+    def test_sign_golden_vectors(self):
+        for vector in SIGN_GOLDEN_VECTORS:
+            signs = help.sign(a1=vector["a1"], b1=vector["b1"], x_s=vector["x_s"], x_t=vector["x_t"])
+            self.assertEqual(signs["x-s-common"], vector["x_s_common"])
+            self.assertEqual(signs["x-s"], vector["x_s"])
+            self.assertEqual(signs["x-t"], vector["x_t"])
+            self.assertEqual(len(signs["x-b3-traceid"]), 16)
+
+    def test_mrc_golden_vectors(self):
+        for vector in SIGN_GOLDEN_VECTORS:
+            self.assertEqual(help.mrc(vector["x_t"] + vector["x_s"] + vector["b1"]), vector["mrc"])
+
+    def test_encode_golden_vectors(self):
+        for text, expected in ENCODE_GOLDEN_VECTORS:
+            encoded = help.encodeUtf8(text)
+            self.assertEqual(list(encoded), legacy_encode_utf8(text))
+            self.assertEqual(help.b64Encode(encoded), expected)
+            # 兼容之前传入 int 列表的调用方式
+            self.assertEqual(help.b64Encode(list(encoded)), expected)
+
+    def test_same_as_legacy_implementation(self):
+        for vector in SIGN_GOLDEN_VECTORS:
+            self.assertEqual(
+                legacy_x_s_common(vector["a1"], vector["b1"], vector["x_s"], vector["x_t"]),
+                vector["x_s_common"]
+            )
+        long_text = "x" * 40000 + "尾"
+        self.assertEqual(help.b64Encode(help.encodeUtf8(long_text)), legacy_b64_encode(legacy_encode_utf8(long_text)))
+
+    @unittest.skipUnless(os.getenv("RUN_BENCHMARK"), "set RUN_BENCHMARK=1 to run the benchmark")
+    def test_benchmark(self):
+        vector = SIGN_GOLDEN_VECTORS[0]
+        rounds = 500
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            legacy_x_s_common(vector["a1"], vector["b1"], vector["x_s"], vector["x_t"])
+        legacy_cost = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            help.sign(a1=vector["a1"], b1=vector["b1"], x_s=vector["x_s"], x_t=vector["x_t"])
+        current_cost = time.perf_counter() - start
+
+        print(f"\nxhs sign benchmark: before {rounds / legacy_cost:.0f} signatures/s, "
+              f"after {rounds / current_cost:.0f} signatures/s")
+        self.assertLess(current_cost, legacy_cost)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/13 21:30
+# @Desc    : AIMD 自适应并发控制，根据请求成功率和延迟自动调整每个平台的并发数
+import asyncio
+import math
+from typing import Dict, List, Optional
+
+import config
+from tools import utils
+
+
+class AdaptiveConcurrencyLimiter:
+    def __init__(
+            self,
+            name: str,
+            initial_limit: int,
+            min_limit: int = 1,
+            max_limit: Optional[int] = None,
+            window_size: int = 20,
+            success_rate_threshold: float = 0.95,
+            latency_spike_ratio: float = 2.0,
+            backoff_ratio: float = 0.5,
+    ) -> None:
+        """
+        AIMD 并发控制：一个统计窗口内成功率和 p95 延迟正常时并发数加 1，
+        出现失败（被风控、数据获取失败）或者延迟突增时并发数乘以 backoff_ratio
+        用法和 asyncio.Semaphore 一样：async with limiter: ...
+        :param name: 名称，一般是平台名称
+        :param initial_limit: 初始并发数
+        :param min_limit: 最小并发数
+        :param max_limit: 最大并发数，不传表示固定为 initial_limit，也就是不自适应
+        :param window_size: 每个统计窗口包含的请求数
+        :param success_rate_threshold: 窗口内的成功率低于该值时减小并发
+        :param latency_spike_ratio: 窗口 p95 延迟超过基准 p95 的倍数时认为延迟突增
+        :param backoff_ratio: 减小并发时的乘数
+        """
+        self.name = name
+        self.min_limit = max(min_limit, 1)
+        self.max_limit = max(max_limit or initial_limit, self.min_limit)
+        self.limit = min(max(initial_limit, self.min_limit), self.max_limit)
+        self.window_size = window_size
+        self.success_rate_threshold = success_rate_threshold
+        self.latency_spike_ratio = latency_spike_ratio
+        self.backoff_ratio = backoff_ratio
+
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+        self._window_latencies: List[float] = []
+        self._window_failures = 0
+        # 减小并发之后需要等新的统计窗口结束才会再次减小，避免一批失败的请求把并发数直接打到最小
+        self._cooling_down = False
+        self.baseline_p95_ms: Optional[float] = None
+        self.total_successes = 0
+        self.total_failures = 0
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def release(self) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    async def __aenter__(self) -> "AdaptiveConcurrencyLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.release()
+
+    def record_success(self, latency_ms: float) -> None:
+        """
+        记录一次成功的请求
+        :param latency_ms: 请求耗时（毫秒）
+        :return:
+        """
+        self.total_successes += 1
+        self._window_latencies.append(latency_ms)
+        self._maybe_finish_window()
+
+    def record_failure(self, reason: str = "") -> None:
+        """
+        记录一次失败的请求，不在冷却期的时候立即减小并发
+        :param reason: 失败原因，用于日志
+        :return:
+        """
+        self.total_failures += 1
+        self._window_failures += 1
+        if not self._cooling_down:
+            self._decrease(f"request failed: {reason}")
+        self._maybe_finish_window()
+
+    def _maybe_finish_window(self) -> None:
+        window_count = len(self._window_latencies) + self._window_failures
+        if window_count < self.window_size:
+            return
+        success_rate = len(self._window_latencies) / window_count
+        p95_ms = self._percentile(self._window_latencies, 0.95)
+        self._window_latencies = []
+        self._window_failures = 0
+        cooling_down, self._cooling_down = self._cooling_down, False
+
+        if success_rate < self.success_rate_threshold:
+            if not cooling_down:
+                self._decrease(f"success rate {success_rate:.2%}")
+            return
+        if self.baseline_p95_ms is not None and p95_ms > self.baseline_p95_ms * self.latency_spike_ratio:
+            self._decrease(f"p95 latency {p95_ms:.0f}ms, baseline {self.baseline_p95_ms:.0f}ms")
+            return
+        # 基准延迟取健康窗口 p95 的滑动平均
+        self.baseline_p95_ms = p95_ms if self.baseline_p95_ms is None else 0.8 * self.baseline_p95_ms + 0.2 * p95_ms
+        self._increase()
+
+    def _increase(self) -> None:
+        if self.limit >= self.max_limit:
+            return
+        self.limit += 1
+        # 等待中的请求会在下一次 release 时被唤醒
+        utils.logger.info(f"[AdaptiveConcurrencyLimiter] {self.name} concurrency limit increase to {self.limit}")
+
+    def _decrease(self, reason: str) -> None:
+        self._cooling_down = True
+        new_limit = max(self.min_limit, math.floor(self.limit * self.backoff_ratio))
+        if new_limit == self.limit:
+            return
+        self.limit = new_limit
+        utils.logger.info(
+            f"[AdaptiveConcurrencyLimiter] {self.name} concurrency limit decrease to {self.limit}, reason: {reason}")
+
+    @staticmethod
+    def _percentile(values: List[float], percent: float) -> float:
+        if not values:
+            return 0.0
+        values = sorted(values)
+        return values[min(len(values) - 1, math.ceil(len(values) * percent) - 1)]
+
+    def snapshot(self) -> Dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "baseline_p95_ms": round(self.baseline_p95_ms or 0.0, 2),
+            "successes": self.total_successes,
+            "failures": self.total_failures,
+        }
+
+    def __str__(self) -> str:
+        return f"{self.name}_concurrency: {self.snapshot()}"
+
+
+_limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+
+
+def get_concurrency_limiter(platform: str) -> AdaptiveConcurrencyLimiter:
+    """
+    获取平台共用的并发控制器，关闭自适应并发时并发数固定为 MAX_CONCURRENCY_NUM
+    :param platform: 平台名称
+    :return:
+    """
+    limiter = _limiters.get(platform)
+    if limiter is None:
+        limiter = AdaptiveConcurrencyLimiter(
+            name=platform,
+            initial_limit=config.MAX_CONCURRENCY_NUM,
+            min_limit=config.ADAPTIVE_CONCURRENCY_MIN if config.ENABLE_ADAPTIVE_CONCURRENCY else config.MAX_CONCURRENCY_NUM,
+            max_limit=config.ADAPTIVE_CONCURRENCY_MAX if config.ENABLE_ADAPTIVE_CONCURRENCY else None,
+            window_size=config.ADAPTIVE_CONCURRENCY_WINDOW_SIZE,
+        )
+        _limiters[platform] = limiter
+    return limiter
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/19 20:10
+# @Desc    : 长期打开的 CSV 写入器，缓冲数据行，按条数、时间或者退出时写入磁盘
+import asyncio
+import csv
+import io
+import os
+import pathlib
+import time
+from typing import Dict, Iterable, Optional
+
+import aiofiles
+
+import config
+
+
+class CsvWriter:
+    def __init__(
+            self,
+            file_name: str,
+            flush_records: Optional[int] = None,
+            flush_interval: Optional[float] = None,
+    ) -> None:
+        """
+        一个 CSV 文件对应一个写入器，文件只打开一次，表头只写一次
+        :param file_name: CSV 文件路径
+        :param flush_records: 缓冲区达到多少行时写入磁盘
+        :param flush_interval: 距离上次写入磁盘超过多少秒时写入磁盘
+        """
+        self.file_name = file_name
+        self.flush_records = config.CSV_FLUSH_RECORDS if flush_records is None else flush_records
+        self.flush_interval = config.CSV_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self._file = None
+        self._header_written = False
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._buffered_rows = 0
+        self._last_flush_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def _open(self) -> None:
+        pathlib.Path(os.path.dirname(self.file_name) or ".").mkdir(parents=True, exist_ok=True)
+        self._file = await aiofiles.open(self.file_name, mode='a+', encoding="utf-8-sig", newline="")
+        # 追加到已有的文件时不再写表头
+        self._header_written = await self._file.tell() > 0
+
+    async def write(self, item: Dict) -> None:
+        """
+        写入一行数据
+        :param item:
+        :return:
+        """
+        await self.write_many([item])
+
+    async def write_many(self, items: Iterable[Dict]) -> None:
+        """
+        写入多行数据，第一次写入时以第一行的字段作为表头
+        :param items:
+        :return:
+        """
+        async with self._lock:
+            if self._file is None:
+                await self._open()
+            for item in items:
+                if not self._header_written:
+                    self._writer.writerow(item.keys())
+                    self._header_written = True
+                self._writer.writerow(item.values())
+                self._buffered_rows += 1
+            if self._buffered_rows >= self.flush_records or time.monotonic() - self._last_flush_at >= self.flush_interval:
+                await self._flush()
+
+    async def _flush(self) -> None:
+        self._last_flush_at = time.monotonic()
+        data = self._buffer.getvalue()
+        if not data:
+            return
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._buffered_rows = 0
+        await self._file.write(data)
+        await self._file.flush()
+
+    async def flush(self) -> None:
+        """
+        缓冲区的数据写入磁盘
+        :return:
+        """
+        async with self._lock:
+            if self._file is not None:
+                await self._flush()
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self._file is None:
+                return
+            await self._flush()
+            await self._file.close()
+            self._file = None
+
+
+class CsvWriterRegistry:
+    def __init__(self) -> None:
+        self._writers: Dict[str, CsvWriter] = {}
+
+    def get_writer(self, file_name: str) -> CsvWriter:
+        """
+        获取文件对应的写入器，同一个文件在一次运行中只有一个写入器
+        :param file_name: CSV 文件路径
+        :return:
+        """
+        writer = self._writers.get(file_name)
+        if writer is None:
+            writer = CsvWriter(file_name)
+            self._writers[file_name] = writer
+        return writer
+
+    async def close_all(self) -> None:
+        """
+        把所有写入器缓冲区的数据写入磁盘并关闭文件，爬虫结束时调用
+        :return:
+        """
+        for writer in self._writers.values():
+            await writer.close()
+        self._writers.clear()
+
+
+csv_writers = CsvWriterRegistry()
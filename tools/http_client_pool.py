@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/3 10:12
+# @Desc    : 长连接 HTTP 客户端池，按 (平台, 代理) 维度复用 httpx.AsyncClient，避免每次请求都重新握手
+
+import json
+from typing import Dict, List, Optional, Tuple, Union
+
+import httpx
+
+import config
+from tools import utils
+
+ProxiesType = Optional[Union[str, Dict[str, str]]]
+
+
+def is_http2_available() -> bool:
+    """
+    httpx 开启 http2 需要额外安装 h2 依赖 (pip install httpx[http2])
+    :return:
+    """
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class HttpClientPool:
+    def __init__(self) -> None:
+        self._clients: Dict[Tuple[str, str], httpx.AsyncClient] = {}
+        self._http2_warned = False
+
+    @staticmethod
+    def make_proxy_key(proxies: ProxiesType) -> str:
+        """
+        将代理配置转换成可以作为字典 key 的字符串
+        :param proxies: httpx 格式的代理配置
+        :return:
+        """
+        if not proxies:
+            return ""
+        if isinstance(proxies, dict):
+            return json.dumps(proxies, sort_keys=True)
+        return str(proxies)
+
+    def _use_http2(self) -> bool:
+        if not config.ENABLE_HTTP2:
+            return False
+        if is_http2_available():
+            return True
+        if not self._http2_warned:
+            utils.logger.warning(
+                "[HttpClientPool] ENABLE_HTTP2 is on but h2 is not installed, fallback to http/1.1 "
+                "(pip install httpx[http2])")
+            self._http2_warned = True
+        return False
+
+    def _create_client(self, proxies: ProxiesType) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=config.HTTP_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=config.HTTP_POOL_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=config.HTTP_POOL_KEEPALIVE_EXPIRY,
+        )
+        return httpx.AsyncClient(proxies=proxies, limits=limits, http2=self._use_http2())
+
+    def get_client(self, platform: str, proxies: ProxiesType = None) -> httpx.AsyncClient:
+        """
+        获取 (平台, 代理) 对应的长连接客户端，不存在或者已关闭时新建一个
+        :param platform: 平台名称
+        :param proxies: httpx 格式的代理配置
+        :return:
+        """
+        key = (platform, self.make_proxy_key(proxies))
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = self._create_client(proxies)
+            self._clients[key] = client
+        return client
+
+    async def warm_up(self, platform: str, url: str, proxies: ProxiesType = None, timeout: float = 10) -> None:
+        """
+        预热连接，提前完成 TCP + TLS 握手，失败了也不影响后续请求
+        :param platform: 平台名称
+        :param url: 预热请求的地址，一般是平台 API 的 host
+        :param proxies: httpx 格式的代理配置
+        :param timeout: 超时时间
+        :return:
+        """
+        client = self.get_client(platform, proxies)
+        try:
+            await client.head(url, timeout=timeout)
+        except httpx.HTTPError as e:
+            utils.logger.warning(f"[HttpClientPool.warm_up] warm up {url} failed, err: {e}")
+
+    async def close(self, platform: str) -> None:
+        """
+        关闭指定平台下所有代理的长连接客户端
+        :param platform: 平台名称
+        :return:
+        """
+        keys: List[Tuple[str, str]] = [key for key in self._clients if key[0] == platform]
+        for key in keys:
+            client = self._clients.pop(key)
+            await client.aclose()
+
+    async def close_proxy(self, proxies: ProxiesType) -> None:
+        """
+        关闭所有平台下指定代理的长连接客户端，代理IP过期或者被隔离之后不再使用它的连接
+        :param proxies: httpx 格式的代理配置
+        :return:
+        """
+        proxy_key = self.make_proxy_key(proxies)
+        keys: List[Tuple[str, str]] = [key for key in self._clients if key[1] == proxy_key]
+        for key in keys:
+            client = self._clients.pop(key)
+            await client.aclose()
+
+    async def close_all(self) -> None:
+        """
+        关闭所有长连接客户端
+        :return:
+        """
+        for platform in {key[0] for key in self._clients}:
+            await self.close(platform)
+
+
+http_client_pool = HttpClientPool()
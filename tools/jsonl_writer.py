@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/15 21:10
+# @Desc    : JSON Lines 追加写入，按大小或者时间切分文件，并维护一个原子更新的 manifest 文件
+import asyncio
+import glob
+import json
+import os
+import pathlib
+import sys
+import time
+from typing import Dict, Iterable, List, Optional
+
+import aiofiles
+
+import config
+from tools import utils
+
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+class JsonlWriter:
+    def __init__(
+            self,
+            store_path: str,
+            file_prefix: str,
+            max_bytes: Optional[int] = None,
+            rotate_interval: Optional[int] = None,
+            flush_records: Optional[int] = None,
+            flush_interval: Optional[float] = None,
+    ) -> None:
+        """
+        带缓冲的 JSON Lines 写入器，每条数据一行，只追加不重写
+        :param store_path: 保存目录
+        :param file_prefix: 文件名前缀，分片文件为 {file_prefix}.0001.jsonl
+        :param max_bytes: 单个分片的最大字节数，超过之后写入新的分片，0 表示不按大小切分
+        :param rotate_interval: 单个分片的最长写入时间（秒），超过之后写入新的分片，0 表示不按时间切分
+        :param flush_records: 缓冲区达到多少条数据时写入磁盘
+        :param flush_interval: 距离上次写入磁盘超过多少秒时写入磁盘
+        """
+        self.store_path = store_path
+        self.file_prefix = file_prefix
+        self.max_bytes = config.JSONL_ROTATE_MAX_BYTES if max_bytes is None else max_bytes
+        self.rotate_interval = config.JSONL_ROTATE_INTERVAL if rotate_interval is None else rotate_interval
+        self.flush_records = config.JSONL_FLUSH_RECORDS if flush_records is None else flush_records
+        self.flush_interval = config.JSONL_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.manifest_path = os.path.join(store_path, f"{file_prefix}{MANIFEST_SUFFIX}")
+        self.parts: List[Dict] = self._load_manifest()
+        self._buffer: List[str] = []
+        self._last_flush_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _load_manifest(self) -> List[Dict]:
+        if not os.path.exists(self.manifest_path):
+            return []
+        with open(self.manifest_path, encoding="utf-8") as f:
+            return json.load(f).get("parts", [])
+
+    async def write(self, item: Dict) -> None:
+        """
+        写入一条数据
+        :param item:
+        :return:
+        """
+        await self.write_many([item])
+
+    async def write_many(self, items: Iterable[Dict]) -> None:
+        """
+        批量写入数据，缓冲区满了或者距离上次写入磁盘的时间太长时写入磁盘
+        :param items:
+        :return:
+        """
+        self._buffer.extend(json.dumps(item, ensure_ascii=False) + "\n" for item in items)
+        if len(self._buffer) >= self.flush_records or time.monotonic() - self._last_flush_at >= self.flush_interval:
+            await self.flush()
+
+    def _need_rotate(self, part: Dict) -> bool:
+        if self.max_bytes and part["bytes"] >= self.max_bytes:
+            return True
+        return bool(self.rotate_interval) and utils.get_unix_timestamp() - part["created_at"] >= self.rotate_interval
+
+    def _new_part(self) -> Dict:
+        now = utils.get_unix_timestamp()
+        part = {
+            "file": f"{self.file_prefix}.{len(self.parts) + 1:04d}.jsonl",
+            "records": 0,
+            "bytes": 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+        self.parts.append(part)
+        return part
+
+    async def flush(self) -> None:
+        """
+        把缓冲区的数据追加到当前分片，然后更新 manifest
+        :return:
+        """
+        async with self._lock:
+            if not self._buffer:
+                return
+            lines, self._buffer = self._buffer, []
+            self._last_flush_at = time.monotonic()
+            data = "".join(lines)
+
+            part = self.parts[-1] if self.parts else None
+            if part is None or self._need_rotate(part):
+                part = self._new_part()
+            pathlib.Path(self.store_path).mkdir(parents=True, exist_ok=True)
+            async with aiofiles.open(os.path.join(self.store_path, part["file"]), "a", encoding="utf-8") as f:
+                await f.write(data)
+            part["records"] += len(lines)
+            part["bytes"] += len(data.encode("utf-8"))
+            part["updated_at"] = utils.get_unix_timestamp()
+            await self._write_manifest()
+
+    async def _write_manifest(self) -> None:
+        manifest = {
+            "file_prefix": self.file_prefix,
+            "total_records": sum(part["records"] for part in self.parts),
+            "parts": self.parts,
+        }
+        # 先写临时文件再替换，读取方任何时候看到的都是一份完整的 manifest
+        tmp_path = f"{self.manifest_path}.tmp"
+        async with aiofiles.open(tmp_path, "w", encoding="utf-8") as f:
+            await f.write(json.dumps(manifest, ensure_ascii=False, indent=2))
+        os.replace(tmp_path, self.manifest_path)
+
+    async def close(self) -> None:
+        await self.flush()
+
+
+class JsonlWriterRegistry:
+    def __init__(self) -> None:
+        self._writers: Dict[str, JsonlWriter] = {}
+
+    def get_writer(self, store_path: str, file_prefix: str) -> JsonlWriter:
+        """
+        获取保存目录 + 文件前缀对应的写入器，同一个文件在一次运行中只有一个写入器
+        :param store_path: 保存目录
+        :param file_prefix: 文件名前缀
+        :return:
+        """
+        key = os.path.join(store_path, file_prefix)
+        writer = self._writers.get(key)
+        if writer is None:
+            writer = JsonlWriter(store_path, file_prefix)
+            self._writers[key] = writer
+        return writer
+
+    async def close_all(self) -> None:
+        """
+        把所有写入器缓冲区的数据写入磁盘，爬虫结束时调用
+        :return:
+        """
+        for writer in self._writers.values():
+            await writer.close()
+        self._writers.clear()
+
+
+jsonl_writers = JsonlWriterRegistry()
+
+
+async def export_json_array(store_path: str, file_prefix: str, output_file: str) -> int:
+    """
+    按 manifest 中的分片顺序把 JSON Lines 数据导出成和 json 存储方式一样的 JSON 数组文件
+    :param store_path: jsonl 保存目录
+    :param file_prefix: 文件名前缀
+    :param output_file: 导出的 JSON 文件路径
+    :return: 导出的数据条数
+    """
+    with open(os.path.join(store_path, f"{file_prefix}{MANIFEST_SUFFIX}"), encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    pathlib.Path(os.path.dirname(output_file) or ".").mkdir(parents=True, exist_ok=True)
+    count = 0
+    async with aiofiles.open(output_file, "w", encoding="utf-8") as out:
+        await out.write("[")
+        for part in manifest["parts"]:
+            async with aiofiles.open(os.path.join(store_path, part["file"]), "r", encoding="utf-8") as f:
+                async for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    # 和 json.dumps(list) 的分隔符保持一致
+                    await out.write(line if count == 0 else ", " + line)
+                    count += 1
+        await out.write("]")
+    return count
+
+
+async def export_all(store_path: str, output_path: str) -> Dict[str, int]:
+    """
+    导出保存目录下所有的 JSON Lines 数据
+    :param store_path: jsonl 保存目录，例如 data/xhs/jsonl
+    :param output_path: JSON 文件的导出目录，例如 data/xhs/json
+    :return: {导出文件: 数据条数}
+    """
+    result = {}
+    for manifest_path in sorted(glob.glob(os.path.join(store_path, f"*{MANIFEST_SUFFIX}"))):
+        file_prefix = os.path.basename(manifest_path)[:-len(MANIFEST_SUFFIX)]
+        output_file = os.path.join(output_path, f"{file_prefix}.json")
+        result[output_file] = await export_json_array(store_path, file_prefix, output_file)
+    return result
+
+
+if __name__ == '__main__':
+    # python -m tools.jsonl_writer data/xhs/jsonl data/xhs/json
+    if len(sys.argv) != 3:
+        print("usage: python -m tools.jsonl_writer <jsonl_store_path> <json_output_path>")
+        sys.exit(1)
+    for _output_file, _count in asyncio.run(export_all(sys.argv[1], sys.argv[2])).items():
+        print(f"export {_count} items to {_output_file}")
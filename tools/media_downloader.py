@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/24 20:10
+# @Desc    : 图片、视频流式下载，分块写入临时文件，完成后原子重命名，中断的文件下次通过 Range 续传
+import asyncio
+import os
+import pathlib
+from typing import Dict, Optional
+
+import aiofiles
+import httpx
+
+import config
+from tools import utils
+
+
+class MediaTooLargeError(Exception):
+    pass
+
+
+class MediaDownloader:
+    def __init__(
+            self,
+            workers: Optional[int] = None,
+            chunk_size: Optional[int] = None,
+            max_file_size: Optional[int] = None,
+            max_file_seconds: Optional[float] = None,
+    ) -> None:
+        """
+        有并发上限的下载器，内存占用只有每个下载任务的一个数据块，和文件大小无关
+        :param workers: 同时下载的文件数
+        :param chunk_size: 每次写入磁盘的数据块大小（字节）
+        :param max_file_size: 单个文件的最大字节数，0 表示不限制
+        :param max_file_seconds: 单个文件的最长下载时间（秒），0 表示不限制
+        """
+        self.workers = max(config.MEDIA_DOWNLOAD_WORKERS if workers is None else workers, 1)
+        self.chunk_size = config.MEDIA_DOWNLOAD_CHUNK_SIZE if chunk_size is None else chunk_size
+        self.max_file_size = config.MEDIA_MAX_FILE_SIZE if max_file_size is None else max_file_size
+        self.max_file_seconds = config.MEDIA_MAX_FILE_SECONDS if max_file_seconds is None else max_file_seconds
+        self._semaphore = asyncio.Semaphore(self.workers)
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def make_part_file_name(file_name: str) -> str:
+        return f"{file_name}.part"
+
+    async def download(self, client: httpx.AsyncClient, url: str, file_name: str,
+                       headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None) -> bool:
+        """
+        下载文件到 file_name，文件已经存在时跳过，同一个文件同时只有一个下载任务
+        :param client: httpx 客户端，一般是 http_client_pool 中的长连接客户端
+        :param url: 文件地址
+        :param file_name: 保存路径
+        :param headers: 请求头
+        :param timeout: 单次网络读写的超时时间
+        :return: 下载成功或者文件已经存在时返回 True
+        """
+        if os.path.exists(file_name):
+            return True
+        task = self._in_flight.get(file_name)
+        if task is None:
+            task = asyncio.create_task(self._download_with_limit(client, url, file_name, headers, timeout))
+            self._in_flight[file_name] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(file_name, None))
+        return await asyncio.shield(task)
+
+    async def _download_with_limit(self, client: httpx.AsyncClient, url: str, file_name: str,
+                                   headers: Optional[Dict[str, str]], timeout: Optional[float]) -> bool:
+        part_file_name = self.make_part_file_name(file_name)
+        async with self._semaphore:
+            try:
+                if self.max_file_seconds > 0:
+                    await asyncio.wait_for(
+                        self._download(client, url, file_name, part_file_name, headers, timeout),
+                        self.max_file_seconds)
+                else:
+                    await self._download(client, url, file_name, part_file_name, headers, timeout)
+                return True
+            except asyncio.TimeoutError:
+                # 临时文件保留，下次从断点续传
+                utils.logger.error(
+                    f"[MediaDownloader.download] download {url} exceeded {self.max_file_seconds}s, "
+                    f"partial file is kept for resume")
+            except MediaTooLargeError as e:
+                if os.path.exists(part_file_name):
+                    os.remove(part_file_name)
+                utils.logger.error(f"[MediaDownloader.download] download {url} err: {e}")
+            except Exception as e:
+                utils.logger.error(f"[MediaDownloader.download] download {url} err: {e}")
+            return False
+
+    def _check_size(self, size: int) -> None:
+        if 0 < self.max_file_size < size:
+            raise MediaTooLargeError(f"file size {size} exceeds MEDIA_MAX_FILE_SIZE {self.max_file_size}")
+
+    async def _download(self, client: httpx.AsyncClient, url: str, file_name: str, part_file_name: str,
+                        headers: Optional[Dict[str, str]], timeout: Optional[float]) -> None:
+        pathlib.Path(os.path.dirname(file_name) or ".").mkdir(parents=True, exist_ok=True)
+        offset = os.path.getsize(part_file_name) if os.path.exists(part_file_name) else 0
+        request_headers = dict(headers or {})
+        if offset:
+            request_headers["Range"] = f"bytes={offset}-"
+
+        async with client.stream("GET", url, headers=request_headers, timeout=timeout) as response:
+            if response.status_code == 416 and offset:
+                # 临时文件已经是完整的文件，上次只差重命名
+                os.replace(part_file_name, file_name)
+                return
+            response.raise_for_status()
+            if response.status_code != 206:
+                # 服务端不支持 Range 时重新下载
+                offset = 0
+            content_length = response.headers.get("Content-Length")
+            if content_length and content_length.isdigit():
+                self._check_size(offset + int(content_length))
+
+            size = offset
+            async with aiofiles.open(part_file_name, "ab" if offset else "wb") as f:
+                async for chunk in response.aiter_bytes(self.chunk_size):
+                    size += len(chunk)
+                    self._check_size(size)
+                    await f.write(chunk)
+        os.replace(part_file_name, file_name)
+        utils.logger.info(f"[MediaDownloader.download] save {file_name} success, size: {size} ...")
+
+
+media_downloader = MediaDownloader()
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/25 20:10
+# @Desc    : 按内容寻址的媒体文件存储，相同的图片、视频跨笔记、跨运行只下载和保存一次
+import asyncio
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+from typing import Awaitable, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import aiofiles
+
+import config
+from tools import utils
+from tools.media_downloader import MediaDownloader
+
+
+def make_url_key(url: str) -> str:
+    """
+    根据 url 生成 key，去掉协议、查询参数和锚点，签名、过期时间等参数变化时还是同一个文件
+    :param url:
+    :return:
+    """
+    parts = urlsplit(url)
+    return hashlib.sha1(f"{parts.netloc}{parts.path}".encode("utf-8")).hexdigest()
+
+
+def hash_file(file_name: str, chunk_size: int = 1024 * 1024) -> str:
+    sha256 = hashlib.sha256()
+    with open(file_name, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class MediaBlobStore:
+    def __init__(self, store_path: Optional[str] = None, hardlink: Optional[bool] = None) -> None:
+        """
+        文件按内容的 sha256 保存在 blobs 目录下，index.jsonl 记录 url -> blob 的映射，下载之前先查询
+        笔记目录下的 manifest.jsonl 记录笔记中的文件对应的 blob
+        :param store_path: 存储目录
+        :param hardlink: 是否在原来的文件路径创建指向 blob 的硬链接
+        """
+        self.store_path = config.MEDIA_STORE_PATH if store_path is None else store_path
+        self.hardlink = config.MEDIA_STORE_HARDLINK if hardlink is None else hardlink
+        self._index: Optional[Dict[str, Dict]] = None
+        # manifest 路径 -> {文件名: blob}，每个文件最后一条记录对应的 blob
+        self._manifests: Dict[str, Dict[str, str]] = {}
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._lock = asyncio.Lock()
+
+        self.hits = 0
+        self.downloads = 0
+        self.saved_bytes = 0
+
+    @property
+    def index_file(self) -> str:
+        return os.path.join(self.store_path, "index.jsonl")
+
+    def make_blob_path(self, sha256: str, extension: str) -> str:
+        return f"blobs/{sha256[:2]}/{sha256}{extension}"
+
+    async def _load_index(self) -> Dict[str, Dict]:
+        if self._index is None:
+            index = {}
+            if os.path.exists(self.index_file):
+                async with aiofiles.open(self.index_file, "r", encoding="utf-8") as f:
+                    async for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            index[entry["key"]] = entry
+            self._index = index
+        return self._index
+
+    async def _load_manifest(self, manifest_file: str) -> Dict[str, str]:
+        manifest = self._manifests.get(manifest_file)
+        if manifest is None:
+            manifest = {}
+            if os.path.exists(manifest_file):
+                async with aiofiles.open(manifest_file, "r", encoding="utf-8") as f:
+                    async for line in f:
+                        if line.strip():
+                            item = json.loads(line)
+                            manifest[item["file"]] = item["blob"]
+            self._manifests[manifest_file] = manifest
+        return manifest
+
+    def _blob_exists(self, entry: Optional[Dict]) -> bool:
+        return entry is not None and os.path.exists(os.path.join(self.store_path, entry["blob"]))
+
+    async def fetch(self, url: str, file_name: str, download: Callable[[str], Awaitable[bool]]) -> bool:
+        """
+        保存 url 对应的文件，url 已经下载过时不再下载，只在 manifest 中记录，同一个文件有多条记录时以最后一条为准
+        文件最后一条记录已经指向同一个 blob 时不再重复记录
+        :param url: 文件地址
+        :param file_name: 原来的保存路径，manifest 保存在同一个目录下
+        :param download: 下载函数，参数是临时文件路径，例如 partial(media_downloader.download, client, url)
+        :return: 是否保存成功
+        """
+        if not config.ENABLE_MEDIA_DEDUP:
+            return await download(file_name)
+        key = make_url_key(url)
+        index = await self._load_index()
+        entry = index.get(key)
+        if self._blob_exists(entry):
+            self.hits += 1
+            self.saved_bytes += entry["size"]
+        else:
+            # 同一个 url 同时只下载一次
+            task = self._in_flight.get(key)
+            if task is None:
+                task = asyncio.create_task(self._save_blob(key, url, file_name, download))
+                self._in_flight[key] = task
+                task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+            entry = await asyncio.shield(task)
+            if entry is None:
+                return False
+        await self._link(entry, file_name)
+        return True
+
+    async def _save_blob(self, key: str, url: str, file_name: str,
+                         download: Callable[[str], Awaitable[bool]]) -> Optional[Dict]:
+        extension = os.path.splitext(file_name)[1]
+        if os.path.exists(file_name) and not os.path.exists(MediaDownloader.make_part_file_name(file_name)):
+            # 开启去重之前已经下载的文件直接入库，不用重新下载
+            source, move = file_name, False
+        else:
+            source, move = os.path.join(self.store_path, "tmp", f"{key}{extension}"), True
+            pathlib.Path(os.path.dirname(source)).mkdir(parents=True, exist_ok=True)
+            if not await download(source):
+                return None
+            self.downloads += 1
+
+        loop = asyncio.get_running_loop()
+        sha256 = await loop.run_in_executor(None, hash_file, source)
+        blob = self.make_blob_path(sha256, extension)
+        blob_file = os.path.join(self.store_path, blob)
+        size = os.path.getsize(source)
+        if os.path.exists(blob_file):
+            # 不同 url 的相同文件，只保留一份
+            self.saved_bytes += size
+            if move:
+                os.remove(source)
+        else:
+            pathlib.Path(os.path.dirname(blob_file)).mkdir(parents=True, exist_ok=True)
+            if move:
+                os.replace(source, blob_file)
+            else:
+                try:
+                    os.link(source, blob_file)
+                except OSError as e:
+                    # 例如 MEDIA_STORE_PATH 和保存目录不在同一个文件系统
+                    utils.logger.warning(f"[MediaBlobStore.fetch] hardlink {blob_file} failed, copy instead, err: {e}")
+                    await loop.run_in_executor(None, shutil.copy2, source, blob_file)
+
+        entry = {"key": key, "url": url, "blob": blob, "sha256": sha256, "size": size}
+        async with self._lock:
+            self._index[key] = entry
+            async with aiofiles.open(self.index_file, "a", encoding="utf-8") as f:
+                await f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return entry
+
+    async def _link(self, entry: Dict, file_name: str) -> None:
+        dir_name, base_name = os.path.split(file_name)
+        pathlib.Path(dir_name or ".").mkdir(parents=True, exist_ok=True)
+        manifest_file = os.path.join(dir_name, "manifest.jsonl")
+        manifest_item = {"file": base_name, "url": entry["url"], "blob": entry["blob"], "size": entry["size"]}
+        async with self._lock:
+            manifest = await self._load_manifest(manifest_file)
+            if manifest.get(base_name) != entry["blob"]:
+                manifest[base_name] = entry["blob"]
+                async with aiofiles.open(manifest_file, "a", encoding="utf-8") as f:
+                    await f.write(json.dumps(manifest_item, ensure_ascii=False) + "\n")
+
+        if self.hardlink and not os.path.exists(file_name):
+            try:
+                os.link(os.path.join(self.store_path, entry["blob"]), file_name)
+            except OSError as e:
+                utils.logger.warning(f"[MediaBlobStore.fetch] hardlink {file_name} failed, err: {e}")
+
+    async def close(self) -> None:
+        if self.hits or self.downloads:
+            utils.logger.info(
+                f"[MediaBlobStore.close] downloads: {self.downloads}, index hits: {self.hits}, "
+                f"saved bytes: {self.saved_bytes}")
+        self._index = None
+        self._manifests = {}
+
+
+media_store = MediaBlobStore()
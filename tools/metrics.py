@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/5 21:40
+# @Desc    : 简单的耗时统计工具
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+
+class LatencyCounter:
+    def __init__(self, name: str) -> None:
+        """
+        单项操作的调用次数以及耗时统计
+        :param name: 统计项名称
+        """
+        self.name = name
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, elapsed_ms: float) -> None:
+        """
+        记录一次调用耗时
+        :param elapsed_ms: 耗时（毫秒）
+        :return:
+        """
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+
+    @contextmanager
+    def measure(self) -> Iterator[None]:
+        """
+        统计 with 代码块的耗时
+        :return:
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record((time.perf_counter() - start) * 1000)
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.avg_ms, 2),
+            "max_ms": round(self.max_ms, 2),
+            "total_ms": round(self.total_ms, 2),
+        }
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.snapshot()}"
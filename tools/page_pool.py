@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/10 16:32
+# @Desc    : 签名页面池，在同一个已登录的浏览器上下文中维护多个页面并发执行签名 JS
+import asyncio
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, List, Optional, Set
+
+from playwright.async_api import BrowserContext, Error, Page
+
+from tools import utils
+
+# 页面已经关闭、崩溃或者执行上下文被销毁时 playwright 抛出的错误，其他错误是签名 JS 本身的异常
+PAGE_BROKEN_ERRORS = ("has been closed", "Target closed", "crashed", "Execution context was destroyed")
+
+
+class NoAvailablePageError(Exception):
+    """签名页面池中没有可用的页面"""
+
+
+def is_page_broken(page: Page, error: Error) -> bool:
+    """
+    判断 evaluate 出错是不是因为页面本身不可用
+    :param page:
+    :param error:
+    :return:
+    """
+    return page.is_closed() or any(message in str(error) for message in PAGE_BROKEN_ERRORS)
+
+
+class PageSlot:
+    def __init__(self, page: Page, is_main_page: bool = False) -> None:
+        self.page = page
+        # 主页面是爬虫登录用的 context_page，回收的时候只刷新不关闭
+        self.is_main_page = is_main_page
+        self.in_flight = 0
+        self.uses = 0
+        self.healthy = True
+        self.recycling = False
+
+    @property
+    def available(self) -> bool:
+        return self.healthy and not self.recycling and not self.page.is_closed()
+
+
+class PlaywrightPagePool:
+    def __init__(
+            self,
+            browser_context: BrowserContext,
+            url: str,
+            main_page: Page,
+            ready_js: str,
+            size: int = 1,
+            max_uses: int = 0,
+            health_check_interval: int = 0,
+            acquire_timeout: float = 30,
+    ) -> None:
+        """
+        签名页面池，对外提供和 Page 一样的 evaluate 方法
+        :param browser_context: 已登录的浏览器上下文
+        :param url: 新页面需要打开的地址，页面加载之后才有签名函数
+        :param main_page: 爬虫正在使用的页面，作为池中的第一个页面
+        :param ready_js: 判断页面签名函数是否可用的 JS，返回 true 表示可用
+        :param size: 页面数量
+        :param max_uses: 单个页面最多使用次数，超过之后回收，0 表示不限制
+        :param health_check_interval: 后台健康检查的间隔（秒），0 表示不开启
+        :param acquire_timeout: 等待可用页面的最长时间（秒）
+        """
+        self.browser_context = browser_context
+        self.url = url
+        self.ready_js = ready_js
+        self.size = max(size, 1)
+        self.max_uses = max_uses
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+        self.slots: List[PageSlot] = [PageSlot(main_page, is_main_page=True)]
+        self._round_robin = itertools.count()
+        self._health_check_task: Optional[asyncio.Task] = None
+        self._recycle_tasks: Set[asyncio.Task] = set()
+
+    @property
+    def main_page(self) -> Page:
+        return self.slots[0].page
+
+    async def start(self) -> None:
+        """
+        预热页面池，打开剩余的页面并等待签名函数加载完成，一般在登录成功之后调用
+        :return:
+        """
+        new_slot_count = self.size - len(self.slots)
+        if new_slot_count > 0:
+            pages = await asyncio.gather(*[self._new_page() for _ in range(new_slot_count)])
+            self.slots.extend(PageSlot(page) for page in pages)
+        utils.logger.info(f"[PlaywrightPagePool.start] sign page pool started, size: {len(self.slots)}")
+        if self.health_check_interval > 0 and self._health_check_task is None:
+            self._health_check_task = asyncio.create_task(self._health_check_cron())
+
+    async def _new_page(self) -> Page:
+        page = await self.browser_context.new_page()
+        await page.goto(self.url)
+        await self._wait_ready(page)
+        return page
+
+    async def _wait_ready(self, page: Page) -> None:
+        try:
+            await page.wait_for_function(self.ready_js, timeout=30000)
+        except Error as e:
+            utils.logger.warning(f"[PlaywrightPagePool._wait_ready] wait sign function ready failed: {e}")
+
+    def _pick_slot(self) -> Optional[PageSlot]:
+        """
+        选择当前最空闲的页面，空闲程度相同时轮询
+        :return:
+        """
+        available_slots = [slot for slot in self.slots if slot.available]
+        if not available_slots:
+            return None
+        min_in_flight = min(slot.in_flight for slot in available_slots)
+        candidates = [slot for slot in available_slots if slot.in_flight == min_in_flight]
+        return candidates[next(self._round_robin) % len(candidates)]
+
+    def _need_recycle(self, slot: PageSlot) -> bool:
+        if not slot.healthy:
+            return True
+        # 主页面还承担登录等其他操作，不按使用次数回收
+        return bool(self.max_uses) and slot.uses >= self.max_uses and not slot.is_main_page
+
+    def _has_pending_recycle(self) -> bool:
+        """
+        是否有页面正在回收或者等待回收（不健康的页面在最后一个请求归还之后回收）
+        :return:
+        """
+        return bool(self._recycle_tasks) or any(
+            slot.recycling or (not slot.healthy and slot.in_flight > 0) for slot in self.slots)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[PageSlot]:
+        """
+        借出一个页面，用完之后归还
+        没有健康的页面时等待回收完成，没有正在回收的页面或者等待超时时抛出 NoAvailablePageError
+        :return:
+        """
+        deadline = time.monotonic() + self.acquire_timeout
+        slot = self._pick_slot()
+        while slot is None:
+            if not self._has_pending_recycle():
+                raise NoAvailablePageError("[PlaywrightPagePool.acquire] no healthy sign page and no page recycling")
+            if time.monotonic() >= deadline:
+                raise NoAvailablePageError(
+                    f"[PlaywrightPagePool.acquire] wait sign page timeout after {self.acquire_timeout}s")
+            await asyncio.sleep(0.1)
+            slot = self._pick_slot()
+
+        slot.in_flight += 1
+        try:
+            yield slot
+        finally:
+            slot.in_flight -= 1
+            slot.uses += 1
+            if self._need_recycle(slot) and slot.in_flight == 0:
+                task = asyncio.create_task(self.recycle(slot))
+                self._recycle_tasks.add(task)
+                task.add_done_callback(self._recycle_tasks.discard)
+
+    async def evaluate(self, expression: str, arg: Any = None) -> Any:
+        """
+        在池中的页面执行 JS，页面关闭、崩溃时标记为不健康并换一个页面重试一次，JS 本身的异常直接抛出
+        :param expression: JS 表达式
+        :param arg: 参数
+        :return:
+        """
+        async with self.acquire() as slot:
+            try:
+                return await slot.page.evaluate(expression, arg)
+            except Error as e:
+                if not is_page_broken(slot.page, e):
+                    raise
+                slot.healthy = False
+                utils.logger.warning(f"[PlaywrightPagePool.evaluate] sign page broken, retry on another page, err: {e}")
+        async with self.acquire() as slot:
+            return await slot.page.evaluate(expression, arg)
+
+    async def recycle(self, slot: PageSlot) -> None:
+        """
+        回收页面，主页面重新加载，其他页面关闭之后重新打开
+        :param slot:
+        :return:
+        """
+        if slot.recycling:
+            return
+        slot.recycling = True
+        try:
+            if slot.is_main_page:
+                await slot.page.reload()
+                await self._wait_ready(slot.page)
+            else:
+                old_page = slot.page
+                slot.page = await self._new_page()
+                if not old_page.is_closed():
+                    await old_page.close()
+            slot.uses = 0
+            slot.healthy = True
+        except Error as e:
+            utils.logger.error(f"[PlaywrightPagePool.recycle] recycle sign page failed: {e}")
+        finally:
+            slot.recycling = False
+
+    async def health_check(self) -> None:
+        """
+        检查所有空闲页面的签名函数是否可用，不可用的页面回收
+        :return:
+        """
+        for slot in self.slots:
+            if slot.recycling or slot.in_flight > 0:
+                continue
+            try:
+                ready = not slot.page.is_closed() and await slot.page.evaluate(self.ready_js)
+            except Error:
+                ready = False
+            if not ready:
+                utils.logger.info("[PlaywrightPagePool.health_check] sign page unhealthy, begin recycle ...")
+                slot.healthy = False
+                await self.recycle(slot)
+
+    async def _health_check_cron(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            await self.health_check()
+
+    async def close(self) -> None:
+        """
+        关闭池中额外打开的页面，主页面由爬虫自己关闭
+        :return:
+        """
+        if self._health_check_task is not None:
+            self._health_check_task.cancel()
+            self._health_check_task = None
+        for slot in self.slots:
+            if not slot.is_main_page and not slot.page.is_closed():
+                await slot.page.close()
+        self.slots = [slot for slot in self.slots if slot.is_main_page]
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/21 20:10
+# @Desc    : Parquet 列式存储，数据按行组追加写入，重复值多的字段使用字典编码
+import asyncio
+import json
+import os
+import pathlib
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+import config
+from tools import utils
+
+# 取值重复比较多的字段，使用字典编码
+DICTIONARY_COLUMNS = (
+    "ip_location", "nickname", "source_keyword", "user_id", "note_id", "aweme_id", "video_id", "type", "gender",
+    "tieba_name", "tieba_id", "user_nickname", "video_type", "aweme_type",
+)
+
+# id 字段不同平台、不同接口中可能是数字也可能是字符串（例如 xhs 一级评论的 parent_comment_id 是 0），统一保存成字符串
+ID_COLUMNS = ("id", "uid", "mid", "oid", "sec_uid")
+
+# 文件名中的编号，例如 search_comments_2024-08-21.0001.parquet
+FILE_INDEX_PATTERN = re.compile(r"\.(\d{4})\.parquet$")
+
+
+def is_id_column(name: str) -> bool:
+    return name in ID_COLUMNS or name.endswith("_id") or name.endswith("_ids")
+
+
+def is_parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ParquetWriter:
+    def __init__(
+            self,
+            file_name: str,
+            row_group_size: Optional[int] = None,
+            compression: Optional[str] = None,
+    ) -> None:
+        """
+        一个 Parquet 文件对应一个写入器，缓冲的数据达到 row_group_size 时写入一个行组
+        字段类型以第一批数据为准，后面的数据会转换成相同的类型；id 字段和类型混杂的字段保存成字符串
+        后面的数据出现新的字段或者无法转换成已有的类型时，字段加入（或者放宽成字符串）之后写入下一个编号的文件
+        :param file_name: Parquet 文件路径
+        :param row_group_size: 每个行组的行数
+        :param compression: 压缩算法，snappy | zstd | gzip | none
+        """
+        if not is_parquet_available():
+            raise ImportError("Parquet 存储需要安装 pyarrow 依赖: pip install pyarrow")
+        self.file_name = file_name
+        self.row_group_size = config.PARQUET_ROW_GROUP_SIZE if row_group_size is None else row_group_size
+        self.compression = config.PARQUET_COMPRESSION if compression is None else compression
+        self.rows = 0
+        self._buffer: List[Dict] = []
+        self._schema = None
+        self._writer = None
+        self._lock = asyncio.Lock()
+
+    async def write(self, item: Dict) -> None:
+        await self.write_many([item])
+
+    async def write_many(self, items: Iterable[Dict]) -> None:
+        """
+        写入多行数据，缓冲区满了之后写入一个行组
+        :param items:
+        :return:
+        """
+        async with self._lock:
+            self._buffer.extend(items)
+            if len(self._buffer) >= self.row_group_size:
+                await self._flush()
+
+    async def _flush(self) -> None:
+        if not self._buffer:
+            return
+        rows, self._buffer = self._buffer, []
+        # 类型转换和压缩比较耗 CPU，放到线程池中执行
+        await asyncio.get_running_loop().run_in_executor(None, self._write_row_group, rows)
+        self.rows += len(rows)
+
+    @staticmethod
+    def _normalize(value: Any) -> Any:
+        # 嵌套的字段保存成 JSON 字符串
+        if isinstance(value, (dict, list, tuple)):
+            return json.dumps(value, ensure_ascii=False)
+        return value
+
+    @staticmethod
+    def _infer_type(name: str, values: List[Any]):
+        """
+        根据字段名和取值推断字段类型，全部为空、id 字段和类型混杂的字段按字符串处理
+        :param name:
+        :param values:
+        :return:
+        """
+        import pyarrow as pa
+
+        value_types = {type(value) for value in values if value is not None}
+        if not value_types or is_id_column(name):
+            return pa.string()
+        if value_types == {bool}:
+            return pa.bool_()
+        if value_types == {int}:
+            return pa.int64()
+        if value_types <= {int, float}:
+            return pa.float64()
+        return pa.string()
+
+    @staticmethod
+    def _coerce(value: Any, arrow_type) -> Any:
+        """
+        转换成字段的类型，无法无损转换时抛出 ValueError
+        :param value:
+        :param arrow_type:
+        :return:
+        """
+        import pyarrow as pa
+
+        if value is None:
+            return None
+        if pa.types.is_string(arrow_type):
+            return value if isinstance(value, str) else str(value)
+        if pa.types.is_boolean(arrow_type):
+            if isinstance(value, bool):
+                return value
+        elif pa.types.is_integer(arrow_type):
+            if isinstance(value, float) and value.is_integer():
+                return int(value)
+            if not isinstance(value, (bool, float)):
+                return int(value)
+        elif pa.types.is_floating(arrow_type):
+            if not isinstance(value, bool):
+                return float(value)
+        raise ValueError(f"can not convert {value!r} to {arrow_type}")
+
+    def _can_coerce(self, values: List[Any], arrow_type) -> bool:
+        try:
+            for value in values:
+                self._coerce(value, arrow_type)
+        except (TypeError, ValueError):
+            return False
+        return True
+
+    def _merge_schema(self, rows: List[Dict]):
+        """
+        根据新的数据扩展字段：新出现的字段加到最后，已有的值无法转换的字段放宽成字符串
+        :param rows:
+        :return:
+        """
+        import pyarrow as pa
+
+        names: Dict[str, None] = {}
+        for row in rows:
+            names.update(dict.fromkeys(row))
+        fields = []
+        known_names = set()
+        for field in self._schema if self._schema is not None else []:
+            known_names.add(field.name)
+            values = [row.get(field.name) for row in rows]
+            if not pa.types.is_string(field.type) and not self._can_coerce(values, field.type):
+                field = pa.field(field.name, pa.string())
+            fields.append(field)
+        for name in names:
+            if name not in known_names:
+                fields.append(pa.field(name, self._infer_type(name, [row.get(name) for row in rows])))
+        return pa.schema(fields)
+
+    def _next_file_name(self) -> str:
+        match = FILE_INDEX_PATTERN.search(self.file_name)
+        index = int(match.group(1)) if match else 1
+        prefix = self.file_name[:match.start()] if match else self.file_name[:-len(".parquet")]
+        while True:
+            index += 1
+            file_name = f"{prefix}.{index:04d}.parquet"
+            if not os.path.exists(file_name):
+                return file_name
+
+    def _open(self, schema) -> None:
+        import pyarrow.parquet as pq
+
+        if self._writer is not None:
+            # 已经写入的文件不能修改字段，关闭之后写入下一个文件
+            self._writer.close()
+            old_file_name, self.file_name = self.file_name, self._next_file_name()
+            utils.logger.warning(
+                f"[ParquetWriter] columns of {old_file_name} changed, continue in {self.file_name}, "
+                f"old columns: {self._schema}, new columns: {schema}")
+        self._schema = schema
+        pathlib.Path(os.path.dirname(self.file_name) or ".").mkdir(parents=True, exist_ok=True)
+        self._writer = pq.ParquetWriter(
+            self.file_name,
+            self._schema,
+            compression=self.compression,
+            use_dictionary=[name for name in self._schema.names if name in DICTIONARY_COLUMNS],
+        )
+
+    def _write_row_group(self, rows: List[Dict]) -> None:
+        import pyarrow as pa
+
+        rows = [{key: self._normalize(value) for key, value in row.items()} for row in rows]
+        schema = self._merge_schema(rows)
+        if self._schema is None or not schema.equals(self._schema):
+            self._open(schema)
+        columns = {
+            field.name: [self._coerce(row.get(field.name), field.type) for row in rows]
+            for field in self._schema
+        }
+        self._writer.write_table(pa.Table.from_pydict(columns, schema=self._schema), row_group_size=len(rows))
+
+    async def close(self) -> None:
+        async with self._lock:
+            await self._flush()
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+                utils.logger.info(f"[ParquetWriter.close] write {self.rows} rows to {self.file_name}")
+
+
+class ParquetWriterRegistry:
+    def __init__(self) -> None:
+        self._writers: Dict[str, ParquetWriter] = {}
+
+    def get_writer(self, store_path: str, file_prefix: str) -> ParquetWriter:
+        """
+        获取保存目录 + 文件前缀对应的写入器，Parquet 文件不能追加，之前运行生成的文件存在时使用新的文件名
+        :param store_path: 保存目录
+        :param file_prefix: 文件名前缀
+        :return:
+        """
+        key = os.path.join(store_path, file_prefix)
+        writer = self._writers.get(key)
+        if writer is None:
+            index = 1
+            while os.path.exists(os.path.join(store_path, f"{file_prefix}.{index:04d}.parquet")):
+                index += 1
+            writer = ParquetWriter(os.path.join(store_path, f"{file_prefix}.{index:04d}.parquet"))
+            self._writers[key] = writer
+        return writer
+
+    async def close_all(self) -> None:
+        """
+        写入缓冲区剩余的数据并关闭文件，爬虫结束时调用，没有关闭的 Parquet 文件无法读取
+        :return:
+        """
+        for writer in self._writers.values():
+            await writer.close()
+        self._writers.clear()
+
+
+parquet_writers = ParquetWriterRegistry()
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/12 20:10
+# @Desc    : 按平台、按接口配置的令牌桶限流器，替代各个客户端里写死的 sleep
+import asyncio
+import fnmatch
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import config
+from tools import utils
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int = 1, jitter: float = 0.0) -> None:
+        """
+        令牌桶
+        :param rate: 每秒生成的令牌数，也就是允许的平均请求速率，小于等于 0 表示不限速
+        :param burst: 桶容量，允许的最大突发请求数
+        :param jitter: 拿到令牌之后额外的随机延时上限（秒），避免请求间隔过于规律
+        """
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.jitter = jitter
+        self.tokens = float(self.burst)
+        self.updated_at = time.monotonic()
+
+    def reserve(self) -> float:
+        """
+        预定一个令牌，返回需要等待的秒数
+        令牌不够的时候允许欠账（tokens 为负数），后来的请求排在前面的请求之后，不需要加锁轮询
+        :return:
+        """
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    async def acquire(self) -> float:
+        """
+        获取一个令牌，令牌不够的时候等待
+        :return: 实际等待的秒数
+        """
+        wait_seconds = self.reserve()
+        if self.jitter > 0:
+            wait_seconds += random.uniform(0, self.jitter)
+        if wait_seconds > 0:
+            await asyncio.sleep(wait_seconds)
+        return wait_seconds
+
+
+class RateLimiter:
+    def __init__(self, rules: Optional[Dict[str, List[Dict]]] = None) -> None:
+        """
+        按平台、按接口路径限流，同一个规则匹配到的接口共用一个令牌桶
+        :param rules: 限流规则，格式同 config.RATE_LIMIT_RULES，不传的时候每次从配置中读取
+        """
+        self._rules = rules
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+
+    @property
+    def rules(self) -> Dict[str, List[Dict]]:
+        return self._rules if self._rules is not None else config.RATE_LIMIT_RULES
+
+    def get_bucket(self, platform: str, url: str) -> Optional[TokenBucket]:
+        """
+        按顺序匹配第一个符合的规则，返回对应的令牌桶
+        :param platform: 平台名称
+        :param url: 请求地址，只用路径部分匹配
+        :return:
+        """
+        path = urlsplit(url).path or url
+        for rule in self.rules.get(platform, []):
+            if not fnmatch.fnmatchcase(path, rule["pattern"]):
+                continue
+            key = (platform, rule["pattern"])
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(rate=rule["rate"], burst=rule.get("burst", 1), jitter=rule.get("jitter", 0.0))
+                self._buckets[key] = bucket
+            return bucket
+        return None
+
+    async def acquire(self, platform: str, url: str) -> None:
+        """
+        请求之前调用，没有匹配的规则时不限速
+        :param platform: 平台名称
+        :param url: 请求地址
+        :return:
+        """
+        if not config.ENABLE_RATE_LIMIT:
+            return
+        bucket = self.get_bucket(platform, url)
+        if bucket is None:
+            return
+        wait_seconds = await bucket.acquire()
+        if wait_seconds > 0:
+            utils.logger.debug(f"[RateLimiter.acquire] {platform} {url} 限流等待 {wait_seconds:.2f} 秒")
+
+    def reset(self) -> None:
+        """
+        清空所有令牌桶，修改限流配置之后调用
+        :return:
+        """
+        self._buckets.clear()
+
+
+rate_limiter = RateLimiter()
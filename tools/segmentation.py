@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/23 20:10
+# @Desc    : 多进程分词服务，jieba 词典、自定义词语和停用词在每个进程启动时加载一次，按批分词不阻塞事件循环
+import asyncio
+import logging
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import config
+
+# 子进程中的停用词，进程启动时加载
+_worker_stop_words: set = set()
+
+
+def load_stop_words(stop_words_file: str) -> set:
+    with open(stop_words_file, 'r', encoding='utf-8') as f:
+        return set(f.read().strip().split('\n'))
+
+
+def _init_worker(stop_words_file: Optional[str], custom_words: Dict[str, str]) -> None:
+    """
+    子进程启动时执行，jieba 第一次分词时才加载词典，需要几秒，这里提前加载
+    :param stop_words_file: 停用词文件路径
+    :param custom_words: 自定义词语
+    :return:
+    """
+    global _worker_stop_words
+    import jieba
+
+    logging.getLogger('jieba').setLevel(logging.WARNING)
+    jieba.initialize()
+    for word in custom_words:
+        jieba.add_word(word)
+    _worker_stop_words = load_stop_words(stop_words_file) if stop_words_file else set()
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def cut_texts(texts: List[str]) -> List[List[str]]:
+    """
+    在子进程中对一批文本分词，去掉停用词和空白
+    :param texts:
+    :return: 每个文本的分词结果
+    """
+    import jieba
+
+    return [[word for word in jieba.lcut(text) if word not in _worker_stop_words and len(word.strip()) > 0]
+            for text in texts]
+
+
+def count_texts(texts: List[str]) -> Counter:
+    """
+    在子进程中对一批文本分词并统计词频，只返回统计结果，减少进程间传输的数据量
+    :param texts:
+    :return:
+    """
+    counter = Counter()
+    for words in cut_texts(texts):
+        counter.update(words)
+    return counter
+
+
+class SegmentationService:
+    def __init__(
+            self,
+            workers: Optional[int] = None,
+            batch_size: Optional[int] = None,
+            stop_words_file: Optional[str] = None,
+            custom_words: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        分词服务，文本按批分给多个进程，可以用满多个 CPU 核心
+        :param workers: 进程数
+        :param batch_size: 每批发送给一个进程的文本数
+        :param stop_words_file: 停用词文件路径
+        :param custom_words: 自定义词语
+        """
+        self.workers = max(config.SEGMENTATION_WORKERS if workers is None else workers, 1)
+        self.batch_size = max(config.SEGMENTATION_BATCH_SIZE if batch_size is None else batch_size, 1)
+        self.stop_words_file = config.STOP_WORDS_FILE if stop_words_file is None else stop_words_file
+        self.custom_words = config.CUSTOM_WORDS if custom_words is None else custom_words
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    async def start(self) -> None:
+        """
+        启动进程池，等待所有进程加载完词典，第一次调用 cut / count 时会自动启动
+        :return:
+        """
+        if self._executor is not None:
+            return
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.stop_words_file, self.custom_words),
+        )
+        await asyncio.gather(*[self._run(_ping) for _ in range(self.workers)])
+
+    async def _run(self, func: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _make_batches(self, texts: List[str]) -> List[List[str]]:
+        return [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+
+    async def cut(self, texts: List[str]) -> List[List[str]]:
+        """
+        分词
+        :param texts:
+        :return: 每个文本的分词结果，顺序和 texts 一致
+        """
+        if not texts:
+            return []
+        await self.start()
+        results = await asyncio.gather(*[self._run(cut_texts, batch) for batch in self._make_batches(texts)])
+        return [words for batch_words in results for words in batch_words]
+
+    async def count(self, texts: List[str]) -> Counter:
+        """
+        分词并统计词频
+        :param texts:
+        :return:
+        """
+        counter = Counter()
+        if not texts:
+            return counter
+        await self.start()
+        for batch_counter in await asyncio.gather(
+                *[self._run(count_texts, batch) for batch in self._make_batches(texts)]):
+            counter.update(batch_counter)
+        return counter
+
+    async def close(self) -> None:
+        if self._executor is None:
+            return
+        executor, self._executor = self._executor, None
+        await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+
+
+segmentation_service = SegmentationService()
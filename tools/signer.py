@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/11 10:20
+# @Desc    : 签名 JS 执行后端，支持 Playwright 浏览器页面和内嵌 JS 引擎两种实现
+import asyncio
+import json
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Union
+
+from playwright.async_api import Page
+
+from tools import utils
+from tools.page_pool import PlaywrightPagePool
+
+SIGN_ENV_SCRIPT_PATH = "libs/sign_env.js"
+
+# 从浏览器同步到内嵌引擎的环境信息
+SNAPSHOT_ENV_JS = """() => ({
+    userAgent: navigator.userAgent,
+    cookie: document.cookie,
+    href: location.href,
+    localStorage: Object.assign({}, window.localStorage),
+})"""
+
+
+class AbstractSigner(ABC):
+    """
+    签名后端，evaluate 的语义和 playwright Page.evaluate 一致：expression 是一个 JS 函数，arg 作为它唯一的参数
+    """
+
+    async def start(self) -> None:
+        """
+        登录完成之后调用，准备签名环境
+        :return:
+        """
+        pass
+
+    @abstractmethod
+    async def evaluate(self, expression: str, arg: Any = None) -> Any:
+        """
+        执行签名 JS
+        :param expression: JS 函数
+        :param arg: 函数参数，需要可以 JSON 序列化
+        :return:
+        """
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class PlaywrightSigner(AbstractSigner):
+    def __init__(self, page: Union[Page, PlaywrightPagePool]) -> None:
+        """
+        在浏览器页面（或签名页面池）中执行签名 JS
+        :param page: playwright 页面或者签名页面池
+        """
+        self.page = page
+
+    async def start(self) -> None:
+        if isinstance(self.page, PlaywrightPagePool):
+            await self.page.start()
+
+    async def evaluate(self, expression: str, arg: Any = None) -> Any:
+        return await self.page.evaluate(expression, arg)
+
+    async def close(self) -> None:
+        if isinstance(self.page, PlaywrightPagePool):
+            await self.page.close()
+
+
+def is_js_engine_available() -> bool:
+    try:
+        import py_mini_racer  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class JsEngineSigner(AbstractSigner):
+    def __init__(
+            self,
+            script_paths: List[str],
+            snapshot_page: Optional[Page] = None,
+            env: Optional[Dict] = None,
+    ) -> None:
+        """
+        在进程内的 V8 引擎（py_mini_racer）中执行平台签名脚本，签名不再经过浏览器
+        :param script_paths: 平台签名脚本路径，按顺序加载在环境补丁之后
+        :param snapshot_page: 登录后的浏览器页面，start 时从中同步 UA、cookie 和 localStorage
+        :param env: 直接指定的环境信息，格式和 SNAPSHOT_ENV_JS 的返回值一致
+        """
+        if not is_js_engine_available():
+            raise ImportError("JsEngineSigner 需要安装 mini-racer 依赖: pip install mini-racer")
+        for script_path in script_paths:
+            if not script_path or not os.path.exists(script_path):
+                raise FileNotFoundError(f"sign script not found: {script_path!r}")
+        self.script_paths = script_paths
+        self.snapshot_page = snapshot_page
+        self.env: Dict = env or {}
+        self._ctx = None
+        self._closed = False
+        # V8 上下文不是线程安全的，所有调用都放在同一个线程里执行
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="js_engine_signer")
+
+    async def start(self) -> None:
+        self._check_closed()
+        if self.snapshot_page is not None:
+            self.env.update(await self.snapshot_page.evaluate(SNAPSHOT_ENV_JS))
+        await self._run(self._load)
+        utils.logger.info(f"[JsEngineSigner.start] js engine signer loaded, scripts: {self.script_paths}")
+
+    def _check_closed(self) -> None:
+        if self._closed:
+            raise RuntimeError("[JsEngineSigner] signer is closed, create a new signer to evaluate")
+
+    def _load(self) -> None:
+        from py_mini_racer import MiniRacer
+
+        ctx = MiniRacer()
+        ctx.eval(f"this.__SIGN_ENV__ = {json.dumps(self.env)};")
+        for script_path in [SIGN_ENV_SCRIPT_PATH, *self.script_paths]:
+            with open(script_path, encoding="utf-8") as f:
+                ctx.eval(f.read())
+        self._ctx = ctx
+
+    async def _run(self, func, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _execute(self, expression: str, arg: Any) -> Any:
+        # execute 会把返回值 JSON 序列化之后再转换成 Python 对象，和 playwright 的返回值类型保持一致
+        return self._ctx.execute(f"({expression})({json.dumps(arg, ensure_ascii=False)})")
+
+    async def evaluate(self, expression: str, arg: Any = None) -> Any:
+        self._check_closed()
+        if self._ctx is None:
+            await self.start()
+        return await self._run(self._execute, expression, arg)
+
+    async def close(self) -> None:
+        """
+        关闭之后不能再执行签名，重复调用没有影响
+        :return:
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._ctx = None
+        self._executor.shutdown(wait=False)
+
+
+def create_signer(
+        backend: str,
+        page_pool: PlaywrightPagePool,
+        script_path: str = "",
+) -> AbstractSigner:
+    """
+    根据配置创建签名后端
+    :param backend: playwright | js_engine
+    :param page_pool: 签名页面池，js_engine 模式下只用主页面同步登录后的环境
+    :param script_path: js_engine 模式下的平台签名脚本路径
+    :return:
+    """
+    if backend == "playwright":
+        return PlaywrightSigner(page_pool)
+    elif backend == "js_engine":
+        return JsEngineSigner(script_paths=[script_path], snapshot_page=page_pool.main_page)
+    raise ValueError("[create_signer] Invalid sign backend, only supported playwright or js_engine ...")
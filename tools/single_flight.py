@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/14 20:45
+# @Desc    : 请求合并，同一个 key 并发的请求只发一次，结果在短时间内复用
+import asyncio
+import copy
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+import config
+
+
+class LeaderAbortedError(Exception):
+    """正在执行的调用方被取消，等待它的调用方重新发起请求"""
+
+
+class SingleFlight:
+    def __init__(self, max_cache_size: int = 1024) -> None:
+        """
+        :param max_cache_size: 结果缓存的最大条数，超过之后淘汰最早的结果
+        """
+        self.max_cache_size = max_cache_size
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        # key -> (过期时间, 结果)
+        self._results: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def do(self, key: Hashable, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        执行 func，同一个 key 正在执行时等待并共享它的结果，最近执行过时直接返回缓存的结果
+        异常会共享给正在等待的调用方，但不会缓存；执行的调用方被取消时，等待的调用方中的一个接着执行
+        dict 结果返回浅拷贝，调用方在结果上追加字段不会互相影响
+        :param key: 一般是 (平台, 接口, id)
+        :param func: 真正发请求的协程函数
+        :return:
+        """
+        if not config.ENABLE_REQUEST_COALESCING:
+            return await func(*args, **kwargs)
+
+        while True:
+            cached = self._results.get(key)
+            if cached is not None:
+                if cached[0] > time.monotonic():
+                    self.hits += 1
+                    return self._copy(cached[1])
+                del self._results[key]
+
+            future = self._in_flight.get(key)
+            if future is None:
+                break
+            self.hits += 1
+            try:
+                return self._copy(await asyncio.shield(future))
+            except LeaderAbortedError:
+                # 执行的调用方被取消了，重新检查，第一个回来的调用方接着执行
+                continue
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            future.set_exception(e)
+            # 没有其他调用方等待的时候避免 "Future exception was never retrieved" 警告
+            future.exception()
+            raise
+        except BaseException:
+            # 不能 cancel future，否则等待的调用方会收到 CancelledError，像自己被取消了一样
+            future.set_exception(LeaderAbortedError(f"single flight leader of {key!r} aborted"))
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            self._cache(key, result)
+            return self._copy(result)
+        finally:
+            self._in_flight.pop(key, None)
+
+    def _cache(self, key: Hashable, result: Any) -> None:
+        # 空结果一般是请求频繁导致的，不缓存，下次重新请求
+        if config.REQUEST_COALESCING_CACHE_TTL <= 0 or not result:
+            return
+        self._results[key] = (time.monotonic() + config.REQUEST_COALESCING_CACHE_TTL, result)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_cache_size:
+            self._results.popitem(last=False)
+
+    @staticmethod
+    def _copy(result: Any) -> Any:
+        return copy.copy(result) if isinstance(result, dict) else result
+
+    def clear(self) -> None:
+        self._results.clear()
+
+
+single_flight = SingleFlight()
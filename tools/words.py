@@ -1,72 +1,166 @@
 import asyncio
 import json
-import logging
+import os
+import time
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
 
 import aiofiles
-import jieba
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
 
 import config
 from tools import utils
+from tools.segmentation import segmentation_service
 
-plot_lock = asyncio.Lock()
 
-class AsyncWordCloudGenerator:
-    def __init__(self):
-        logging.getLogger('jieba').setLevel(logging.WARNING)
-        self.stop_words_file = config.STOP_WORDS_FILE
+def render_word_cloud(word_freq: Dict[str, int], save_words_prefix: str, font_path: str) -> None:
+    """
+    在子进程中生成词云图
+    :param word_freq: 词频最高的词语
+    :param save_words_prefix: 保存文件前缀
+    :param font_path: 中文字体文件路径
+    :return:
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from wordcloud import WordCloud
+
+    wordcloud = WordCloud(
+        font_path=font_path,
+        width=800,
+        height=400,
+        background_color='white',
+        max_words=200,
+        colormap='viridis',
+        contour_color='steelblue',
+        contour_width=1
+    ).generate_from_frequencies(word_freq)
+
+    # Save word cloud image
+    plt.figure(figsize=(10, 5), facecolor='white')
+    plt.imshow(wordcloud, interpolation='bilinear')
+
+    plt.axis('off')
+    plt.tight_layout(pad=0)
+    plt.savefig(f"{save_words_prefix}_word_cloud.png", format='png', dpi=300)
+    plt.close()
+
+
+class WordFrequency:
+    def __init__(self, save_words_prefix: str) -> None:
+        """
+        一个词频文件对应的累计词频
+        :param save_words_prefix: 保存文件前缀
+        """
+        self.save_words_prefix = save_words_prefix
+        self.counter: Counter = Counter()
+        self.loaded = False
+        self.unsaved = False
+        self.unrendered = False
+        self.last_save_at: Optional[float] = None
+        self.last_render_at: Optional[float] = None
+        self.render_task: Optional[asyncio.Task] = None
         self.lock = asyncio.Lock()
-        self.stop_words = self.load_stop_words()
-        self.custom_words = config.CUSTOM_WORDS
-        for word, group in self.custom_words.items():
-            jieba.add_word(word)
-
-    def load_stop_words(self):
-        with open(self.stop_words_file, 'r', encoding='utf-8') as f:
-            return set(f.read().strip().split('\n'))
-
-    async def generate_word_frequency_and_cloud(self, data, save_words_prefix):
-        all_text = ' '.join(item['content'] for item in data)
-        words = [word for word in jieba.lcut(all_text) if word not in self.stop_words and len(word.strip()) > 0]
-        word_freq = Counter(words)
-
-        # Save word frequency to file
-        freq_file = f"{save_words_prefix}_word_freq.json"
-        async with aiofiles.open(freq_file, 'w', encoding='utf-8') as file:
-            await file.write(json.dumps(word_freq, ensure_ascii=False, indent=4))
-
-        # Try to acquire the plot lock without waiting
-        if plot_lock.locked():
-            utils.logger.info("Skipping word cloud generation as the lock is held.")
+
+    @property
+    def freq_file(self) -> str:
+        return f"{self.save_words_prefix}_word_freq.json"
+
+
+class AsyncWordCloudGenerator:
+    def __init__(
+            self,
+            save_interval: Optional[float] = None,
+            render_interval: Optional[float] = None,
+            workers: Optional[int] = None,
+    ) -> None:
+        """
+        增量词频统计，每次只对新增的评论分词，词频文件和词云图按间隔写入，爬虫结束时再写入一次
+        分词使用多进程分词服务，生成词云图放在进程池中执行，不阻塞事件循环
+        :param save_interval: 词频文件写入的最小间隔（秒）
+        :param render_interval: 词云图生成的最小间隔（秒）
+        :param workers: 生成词云图的进程数
+        """
+        self.save_interval = config.WORDCLOUD_SAVE_INTERVAL if save_interval is None else save_interval
+        self.render_interval = config.WORDCLOUD_RENDER_INTERVAL if render_interval is None else render_interval
+        self.workers = max(config.WORDCLOUD_WORKERS if workers is None else workers, 1)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._frequencies: Dict[str, WordFrequency] = {}
+
+    async def _run(self, func: Callable, *args):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def _get_frequency(self, save_words_prefix: str) -> WordFrequency:
+        freq = self._frequencies.get(save_words_prefix)
+        if freq is None:
+            freq = WordFrequency(save_words_prefix)
+            self._frequencies[save_words_prefix] = freq
+        async with freq.lock:
+            if not freq.loaded:
+                # 同一天多次运行时在已有的词频上累加
+                if os.path.exists(freq.freq_file):
+                    async with aiofiles.open(freq.freq_file, 'r', encoding='utf-8') as file:
+                        freq.counter.update(json.loads(await file.read()))
+                freq.loaded = True
+        return freq
+
+    async def add_items(self, items: List[Dict], save_words_prefix: str) -> None:
+        """
+        统计新增数据的词频，到了间隔时间写入词频文件，后台生成词云图
+        :param items: 新增的数据，使用 content 字段
+        :param save_words_prefix: 保存文件前缀
+        :return:
+        """
+        texts = [item['content'] for item in items if item.get('content')]
+        if not texts:
             return
+        freq = await self._get_frequency(save_words_prefix)
+        freq.counter.update(await segmentation_service.count(texts))
+        freq.unsaved = freq.unrendered = True
+
+        now = time.monotonic()
+        if freq.last_save_at is None or now - freq.last_save_at >= self.save_interval:
+            await self._save(freq)
+        # 上一次的词云图还没生成完时跳过，等下一个间隔或者爬虫结束
+        render_due = freq.last_render_at is None or now - freq.last_render_at >= self.render_interval
+        if render_due and (freq.render_task is None or freq.render_task.done()):
+            freq.render_task = asyncio.create_task(self._render(freq))
+
+    async def _save(self, freq: WordFrequency) -> None:
+        async with freq.lock:
+            freq.unsaved = False
+            freq.last_save_at = time.monotonic()
+            async with aiofiles.open(freq.freq_file, 'w', encoding='utf-8') as file:
+                await file.write(json.dumps(dict(freq.counter.most_common()), ensure_ascii=False, indent=4))
+
+    async def _render(self, freq: WordFrequency) -> None:
+        freq.unrendered = False
+        freq.last_render_at = time.monotonic()
+        top_20_word_freq = dict(freq.counter.most_common(20))
+        try:
+            await self._run(render_word_cloud, top_20_word_freq, freq.save_words_prefix, config.FONT_PATH)
+        except Exception as e:
+            utils.logger.error(f"[AsyncWordCloudGenerator._render] generate {freq.save_words_prefix} word cloud error: {e}")
+
+    async def close(self) -> None:
+        """
+        写入最新的词频文件和词云图，然后关闭进程池，爬虫结束时调用
+        :return:
+        """
+        for freq in self._frequencies.values():
+            if freq.render_task is not None:
+                await freq.render_task
+            if freq.unsaved:
+                await self._save(freq)
+            if freq.unrendered:
+                await self._render(freq)
+        self._frequencies.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
 
-        await self.generate_word_cloud(word_freq, save_words_prefix)
-
-    async def generate_word_cloud(self, word_freq, save_words_prefix):
-        await plot_lock.acquire()
-        top_20_word_freq = {word: freq for word, freq in
-                            sorted(word_freq.items(), key=lambda item: item[1], reverse=True)[:20]}
-        wordcloud = WordCloud(
-            font_path=config.FONT_PATH,
-            width=800,
-            height=400,
-            background_color='white',
-            max_words=200,
-            stopwords=self.stop_words,
-            colormap='viridis',
-            contour_color='steelblue',
-            contour_width=1
-        ).generate_from_frequencies(top_20_word_freq)
-
-        # Save word cloud image
-        plt.figure(figsize=(10, 5), facecolor='white')
-        plt.imshow(wordcloud, interpolation='bilinear')
-
-        plt.axis('off')
-        plt.tight_layout(pad=0)
-        plt.savefig(f"{save_words_prefix}_word_cloud.png", format='png', dpi=300)
-        plt.close()
-
-        plot_lock.release()
\ No newline at end of file
+word_cloud_generator = AsyncWordCloudGenerator()
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/8/18 20:30
+# @Desc    : 异步写入队列，爬取和存储并行，数据先进入有界队列再由后台任务批量写入存储
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import config
+from base.base_crawler import AbstractStore
+from tools import utils
+
+
+class WriteBehindQueue:
+    def __init__(
+            self,
+            name: str,
+            sink: Callable[[List[Any]], Awaitable[Any]],
+            max_size: Optional[int] = None,
+            batch_size: Optional[int] = None,
+            max_batch_age: Optional[float] = None,
+            workers: Optional[int] = None,
+    ) -> None:
+        """
+        有界写入队列，后台任务按条数或者等待时间攒批之后调用 sink 写入
+        队列满了之后 put 会等待，爬取的速度不会超过存储的速度太多
+        :param name: 名称，用于日志
+        :param sink: 批量写入函数，参数是一批数据
+        :param max_size: 队列最大长度
+        :param batch_size: 每批最多的数据条数
+        :param max_batch_age: 一批数据最长的等待时间（秒）
+        :param workers: 后台写入任务数
+        """
+        self.name = name
+        self.sink = sink
+        self.batch_size = max(config.WRITE_BEHIND_BATCH_SIZE if batch_size is None else batch_size, 1)
+        self.max_batch_age = config.WRITE_BEHIND_BATCH_AGE if max_batch_age is None else max_batch_age
+        self.workers = max(config.WRITE_BEHIND_WORKERS if workers is None else workers, 1)
+        self._queue: asyncio.Queue = asyncio.Queue(
+            maxsize=config.WRITE_BEHIND_QUEUE_SIZE if max_size is None else max_size)
+        self._tasks: List[asyncio.Task] = []
+        self._closing = False
+
+        self.max_depth = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.total_flush_ms = 0.0
+        self.last_flush_ms = 0.0
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def _ensure_workers(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def put(self, item: Any) -> None:
+        """
+        数据放入队列，队列满的时候等待
+        :param item:
+        :return:
+        """
+        self._ensure_workers()
+        await self._queue.put(item)
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+
+    async def _next_batch(self) -> List[Any]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_batch_age
+        while len(batch) < self.batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - time.monotonic()
+            if self._closing or timeout <= 0:
+                break
+            try:
+                # 分段等待，flush 的时候不用等到攒批超时
+                batch.append(await asyncio.wait_for(self._queue.get(), min(timeout, 0.1)))
+            except asyncio.TimeoutError:
+                continue
+        return batch
+
+    async def _worker(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            start = time.perf_counter()
+            try:
+                await self.sink(batch)
+                self.written += len(batch)
+            except Exception as e:
+                # 写入失败不影响后面的数据，避免一条脏数据卡住整个队列
+                self.failed += len(batch)
+                utils.logger.error(f"[WriteBehindQueue] {self.name} write {len(batch)} items error: {e}")
+            finally:
+                self.last_flush_ms = (time.perf_counter() - start) * 1000
+                self.total_flush_ms += self.last_flush_ms
+                self.batches += 1
+                for _ in batch:
+                    self._queue.task_done()
+            utils.logger.debug(
+                f"[WriteBehindQueue] {self.name} write {len(batch)} items in {self.last_flush_ms:.1f}ms, "
+                f"depth: {self.depth}")
+
+    async def flush(self) -> None:
+        """
+        等待队列中已有的数据全部写入，不再等待攒批
+        :return:
+        """
+        if not self._tasks:
+            return
+        self._closing = True
+        try:
+            await self._queue.join()
+        finally:
+            self._closing = False
+
+    async def close(self) -> None:
+        """
+        写完队列中的数据之后停止后台任务
+        :return:
+        """
+        await self.flush()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def snapshot(self) -> Dict:
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "avg_flush_ms": round(self.total_flush_ms / self.batches, 2) if self.batches else 0.0,
+        }
+
+    def __str__(self) -> str:
+        return f"{self.name}_write_behind: {self.snapshot()}"
+
+
+class WriteBehindStore(AbstractStore):
+    def __init__(self, store: AbstractStore, name: str) -> None:
+        """
+        给存储实现加上写入队列，内容和评论按批调用 store_contents / store_comments 写入
+        :param store: 真正的存储实现
+        :param name: 名称，一般是存储实现的类名
+        """
+        self.store = store
+        self.contents = WriteBehindQueue(f"{name}.contents", store.store_contents)
+        self.comments = WriteBehindQueue(f"{name}.comments", store.store_comments)
+        self.creators = WriteBehindQueue(f"{name}.creators", self._store_creators)
+
+    @property
+    def queues(self) -> List[WriteBehindQueue]:
+        return [self.contents, self.comments, self.creators]
+
+    async def _store_creators(self, creators: List[Dict]) -> None:
+        for creator in creators:
+            await self.store.store_creator(creator)
+
+    async def store_content(self, content_item: Dict):
+        await self.contents.put(content_item)
+
+    async def store_contents(self, content_items: List[Dict]):
+        for content_item in content_items:
+            await self.contents.put(content_item)
+
+    async def store_comment(self, comment_item: Dict):
+        await self.comments.put(comment_item)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        for comment_item in comment_items:
+            await self.comments.put(comment_item)
+
+    async def store_creator(self, creator: Dict):
+        await self.creators.put(creator)
+
+    async def flush(self) -> None:
+        for queue in self.queues:
+            await queue.flush()
+
+    async def close(self) -> None:
+        for queue in self.queues:
+            await queue.close()
+
+
+class WriteBehindRegistry:
+    def __init__(self) -> None:
+        self._stores: Dict[int, WriteBehindStore] = {}
+        self._media: Optional[WriteBehindQueue] = None
+
+    def wrap(self, store: AbstractStore) -> AbstractStore:
+        """
+        开启异步写入时返回带写入队列的存储，同一个存储实现只包装一次
+        :param store: 存储实现
+        :return:
+        """
+        if not config.ENABLE_WRITE_BEHIND:
+            return store
+        wrapped = self._stores.get(id(store))
+        if wrapped is None or wrapped.store is not store:
+            wrapped = WriteBehindStore(store, store.__class__.__name__)
+            self._stores[id(store)] = wrapped
+        return wrapped
+
+    async def store_media(self, save_func: Callable[[Dict], Awaitable[Any]], item: Dict) -> None:
+        """
+        图片、视频等文件的写入也放到队列中，队列长度限制了内存中待写入的文件数
+        :param save_func: 真正的写入函数，例如 XiaoHongShuImage().store_image
+        :param item: 文件内容
+        :return:
+        """
+        if not config.ENABLE_WRITE_BEHIND:
+            await save_func(item)
+            return
+        if self._media is None:
+            self._media = WriteBehindQueue("media", self._store_media, batch_size=1, max_batch_age=0)
+        await self._media.put((save_func, item))
+
+    @staticmethod
+    async def _store_media(batch: List) -> None:
+        for save_func, item in batch:
+            await save_func(item)
+
+    @property
+    def queues(self) -> List[WriteBehindQueue]:
+        queues = [queue for store in self._stores.values() for queue in store.queues]
+        return queues + [self._media] if self._media else queues
+
+    async def close_all(self) -> None:
+        """
+        爬虫结束、异常退出或者 Ctrl+C 时调用，把队列中的数据全部写入存储
+        :return:
+        """
+        for queue in self.queues:
+            await queue.close()
+            if queue.batches:
+                utils.logger.info(f"[WriteBehindRegistry.close_all] {queue}")
+        self._stores.clear()
+        self._media = None
+
+
+write_behind_stores = WriteBehindRegistry()